@@ -1,25 +1,42 @@
 from flask import Flask, render_template, jsonify, request, send_file, session, redirect, url_for
 from flask_cors import CORS
+import bisect
 import json
 import os
 import re
-from docx import Document
 import PyPDF2
-from gtts import gTTS
-import tempfile
+import threading
 import uuid
+from collections import deque
 from datetime import datetime
 import hashlib
 import secrets
 from pathlib import Path
 from config.settings import config
 from database import (init_database, authenticate_user, get_user_by_id, create_user, get_all_users,
-                      log_user_activity, get_user_achievements, get_user_achievement_stats,
-                      get_global_ranking, get_user_rank, get_category_rankings)
+                      log_user_activity, log_user_activities, get_user_achievements, get_user_achievement_stats,
+                      get_global_ranking, get_user_rank, get_category_rankings,
+                      add_achievement_unlock_listener, record_quiz_result, get_user_counters,
+                      parse_progress_list, get_user_progress as load_user_progress_rows)
+from cache import LRUCache, SingleFlight
+from catalog import StoryCatalog, CatalogSnapshot, CatalogJSONProvider, thaw
+from ingestion import DocumentProcessor, ingest_catalog, list_docx_files, manifest_current
+from asset_watcher import AssetWatcher
+from atomic_file import atomic_write
+from story_store import StoryStore, write_story_store
+from search import index_catalog, search_catalog
+from vocabulary import load_lexicon
+from audio_cache import AudioCache
+from tts import get_backend
+from prerender import prerender_catalog
+from text_analysis import analyze_chapter, analyze_story, needs_analysis
 
 # Initialize Flask app with proper configuration
 app = Flask(__name__)
 
+# Serializes the frozen story catalog (read-only mappings and tuples)
+app.json = CatalogJSONProvider(app)
+
 # Load configuration based on environment
 env = os.environ.get('FLASK_ENV', 'development')
 app.config.from_object(config.get(env, config['default']))
@@ -30,8 +47,74 @@ CORS(app)
 # Configure static folder
 app.static_folder = 'static'
 
-# Initialize database
-init_database()
+# Ranking/achievement responses only change when an achievement is unlocked,
+# so they are cached until check_achievements reports an unlock. The TTL
+# bounds staleness for unlocks made by other worker processes.
+response_cache = LRUCache(
+    capacity=int(os.environ.get('FOLKTALE_RESPONSE_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('FOLKTALE_RESPONSE_CACHE_TTL', 30)) or None
+)
+
+def invalidate_achievement_responses(user_id, unlocked):
+    """Drop cached responses affected by new unlocks (all users if user_id is None)"""
+    response_cache.invalidate_kind('ranking_global')
+    response_cache.invalidate_kind('ranking_categories')
+    if user_id is None:
+        response_cache.invalidate_kind('achievements')
+        response_cache.invalidate_kind('achievement_stats')
+    else:
+        response_cache.invalidate(('achievements', user_id))
+        response_cache.invalidate(('achievement_stats', user_id))
+
+add_achievement_unlock_listener(invalidate_achievement_responses)
+
+# Progress of recently active sessions. Registered users' progress is
+# written through to SQLite; anonymous sessions only live here until evicted.
+PROGRESS_CACHE_SIZE = int(os.environ.get('FOLKTALE_PROGRESS_CACHE_SIZE', 10000))
+PROGRESS_CACHE_TTL = float(os.environ.get('FOLKTALE_PROGRESS_CACHE_TTL', 1800)) or None
+
+# Quiz results kept in the /api/statistics recent scores list
+RECENT_SCORES_LIMIT = 10
+
+# Worker processes for parsing the DOCX files in assets/ (0 = one per core)
+INGEST_WORKERS = int(os.environ.get('FOLKTALE_INGEST_WORKERS', 0)) or None
+
+# Decoded chapters kept in memory when stories are read from the story store
+CHAPTER_CACHE_SIZE = int(os.environ.get('FOLKTALE_CHAPTER_CACHE_SIZE', 256))
+
+# Seconds between checks of assets/ for changed DOCX files (0 = no watcher)
+ASSET_WATCH_INTERVAL = float(os.environ.get('FOLKTALE_WATCH_ASSETS', 0))
+
+# Chapter audio: synthesized once per (text, backend, language, voice, speed)
+# and kept on disk, least recently used files evicted above the size cap
+AUDIO_CACHE_DIR = os.environ.get('FOLKTALE_AUDIO_CACHE_DIR', str(Path(__file__).parent / 'data' / 'audio_cache'))
+AUDIO_CACHE_MAX_MB = int(os.environ.get('FOLKTALE_AUDIO_CACHE_MAX_MB', 512))
+# TTS backend (see tts.py): 'gtts' (Google, online) or 'pyttsx3' (local espeak, offline)
+TTS_BACKEND = os.environ.get('FOLKTALE_TTS_BACKEND', 'gtts')
+TTS_LANG = os.environ.get('FOLKTALE_TTS_LANG', 'en')
+# Backend voice: gTTS Google domain ('com', 'co.uk', ...) or pyttsx3 voice id ('' = default)
+TTS_VOICE = os.environ.get('FOLKTALE_TTS_VOICE', '')
+TTS_SLOW = os.environ.get('FOLKTALE_TTS_SLOW', '0') == '1'
+# Synthesize audio missing from the cache during the request (0 = answer 503;
+# the audio comes from prerender.py / FOLKTALE_TTS_PRERENDER instead)
+TTS_INLINE = os.environ.get('FOLKTALE_TTS_INLINE', '1') != '0'
+# Pre-render the audio of stories added or changed by a DOCX reload, in the background
+TTS_PRERENDER = os.environ.get('FOLKTALE_TTS_PRERENDER', '0') == '1'
+# Worker processes for pre-rendering audio (0 = one per core)
+TTS_WORKERS = int(os.environ.get('FOLKTALE_TTS_WORKERS', 0)) or None
+
+def cached_json_response(key, compute):
+    """JSON response for compute() served from response_cache, with ETag/304 support"""
+    def render():
+        body = app.json.dumps(compute())
+        return body, hashlib.sha1(body.encode('utf-8')).hexdigest()
+    
+    body, etag = response_cache.get_or_set(key, render)
+    response = app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Per-user data: let the browser keep it, but always revalidate
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
 
 def is_admin():
     """Check if current user is administrator"""
@@ -41,6 +124,10 @@ def is_logged_in():
     """Check if user is logged in"""
     return session.get('user_id') is not None
 
+def is_registered_user(user_id):
+    """Logged-in accounts have integer ids; anonymous sessions get a UUID string"""
+    return isinstance(user_id, int)
+
 def login_required(f):
     """Decorator for routes that require login"""
     def decorated_function(*args, **kwargs):
@@ -61,52 +148,133 @@ def login_required_admin(f):
 
 class FolktaleApp:
     def __init__(self):
-        self.stories = {}
-        self.user_progress = {}
+        # The published catalog; reloads swap in a new snapshot (see publish_catalog)
+        self.catalog = CatalogSnapshot(0, StoryCatalog())
+        self._publish_lock = threading.Lock()
+        self._reloads = SingleFlight()
+        self.asset_watcher = None
+        self.user_progress = LRUCache(capacity=PROGRESS_CACHE_SIZE, ttl=PROGRESS_CACHE_TTL)
+        self.user_statistics = LRUCache(capacity=PROGRESS_CACHE_SIZE, ttl=PROGRESS_CACHE_TTL)
         # Use proper data directory paths
         self.data_dir = Path(__file__).parent / "data"
         self.assets_dir = Path(__file__).parent / "assets"
         self.json_file = self.data_dir / 'stories_data.json'
-        self.docx_file = self.assets_dir / 'BrazilianFolktales.docx'
+        # Compact copy of the JSON, memory-mapped and decoded per chapter (see story_store.py)
+        self.store_file = self.data_dir / 'stories_data.store'
+        # Léxico para o vocabulário automático, carregado uma vez
+        self.lexicon = load_lexicon()
+        self.tts_backend = get_backend(TTS_BACKEND, lang=TTS_LANG, voice=TTS_VOICE, slow=TTS_SLOW)
+        self.audio_cache = AudioCache(AUDIO_CACHE_DIR, max_bytes=AUDIO_CACHE_MAX_MB * 1024 * 1024,
+                                      suffix=self.tts_backend.suffix)
+        self.last_reload_changes = None
         self.load_content()
+        self.update_search_index()
+    
+    @property
+    def stories(self):
+        """Stories of the current catalog snapshot
+
+        Take it once per request (stories = folktale_app.stories): a reload
+        may publish a new snapshot in between two reads.
+        """
+        return self.catalog.stories
+    
+    @property
+    def manifest(self):
+        """Content hashes of the converted stories (see convert_docx_to_json)"""
+        return self.catalog.manifest
+    
+    def publish_catalog(self, stories, manifest=None):
+        """Swaps in a new catalog snapshot; readers see either the old or the new one"""
+        with self._publish_lock:
+            snapshot = CatalogSnapshot(self.catalog.version + 1, stories, manifest)
+            self.catalog = snapshot
+        return snapshot
+    
+    @property
+    def docx_files(self):
+        """Every DOCX manuscript in assets/, sorted by name"""
+        return list_docx_files(self.assets_dir)
     
     def load_content(self):
-        """Carrega histórias do JSON ou converte do DOCX se necessário"""
+        """Carrega histórias do JSON e converte os DOCX se necessário"""
         try:
-            # Verifica se JSON existe e se é mais recente que o DOCX
-            if self.should_use_json():
-                self.load_from_json()
-                print("Histórias carregadas do JSON")
-            else:
-                # Converte DOCX para JSON
-                if self.docx_file.exists():
+            if self.json_file.exists():
+                self.load_stories()
+            
+            if self.docx_files:
+                # Verifica se o JSON está em dia com os DOCX
+                if not self.should_use_json():
+                    # Histórias que não mudaram são reaproveitadas
                     print("Convertendo DOCX para JSON...")
                     self.convert_docx_to_json()
-                    self.load_from_json()
                     print("DOCX convertido para JSON e carregado")
-                else:
-                    self.load_example_stories()
-                    self.save_to_json()
-                    print("Histórias de exemplo salvas em JSON")
+            elif not self.json_file.exists():
+                self.load_example_stories()
+                self.save_to_json()
+                print("Histórias de exemplo salvas em JSON")
         except Exception as e:
             print(f"Erro ao carregar conteúdo: {e}")
             self.load_example_stories()
     
     def should_use_json(self):
-        """Verifica se deve usar JSON existente ou reconverter do DOCX"""
+        """Verifica se o JSON carregado está em dia com os DOCX de assets/"""
         if not self.json_file.exists():
             return False
         
-        if not self.docx_file.exists():
+        docx_files = self.docx_files
+        if not docx_files:
             return True
         
+        # Um DOCX novo ou removido exige reconversão
+        manifest = self.manifest or {}
+        documents = manifest.get('documents') or {}
+        if sorted(documents) != [path.name for path in docx_files]:
+            return False
+        
+        # Assim como uma nova versão do parser ou da análise de texto
+        if not manifest_current(manifest):
+            return False
+        
         # Compara datas de modificação
         json_time = self.json_file.stat().st_mtime
-        docx_time = self.docx_file.stat().st_mtime
+        docx_time = max(path.stat().st_mtime for path in docx_files)
         
-        # Se DOCX é mais recente, reconverte
+        # Se algum DOCX é mais recente, reconverte
         return json_time >= docx_time
     
+    def load_stories(self):
+        """Carrega as histórias do store compacto, recriando-o a partir do JSON se necessário"""
+        if self.store_file.exists() and self.store_file.stat().st_mtime >= self.json_file.stat().st_mtime:
+            try:
+                if self.load_from_store():
+                    print("Histórias carregadas do store")
+                    return
+            except Exception as e:
+                print(f"Error loading story store, falling back to JSON: {e}")
+        
+        self.load_from_json()
+        print("Histórias carregadas do JSON")
+        catalog = self.catalog
+        try:
+            write_story_store(str(self.store_file), catalog.stories, catalog.manifest)
+        except OSError as e:
+            print(f"Error writing story store: {e}")
+    
+    def load_from_store(self):
+        """Opens the story store: only the index is read, chapters are decoded on first access
+
+        Returns False, publishing nothing, if the store predates the current
+        text analysis stage.
+        """
+        store = StoryStore(str(self.store_file), cache_size=CHAPTER_CACHE_SIZE)
+        if any(needs_analysis(story) for story in store.stories.values()):
+            print(f"{self.store_file.name} has no current text analysis, rebuilding it from JSON")
+            return False
+        self.publish_catalog(store.stories, store.manifest)
+        print(f"Loaded {len(store.stories)} stories from {self.store_file.name}")
+        return True
+    
     def load_from_json(self):
         """Loads stories from JSON file"""
         try:
@@ -115,355 +283,163 @@ class FolktaleApp:
                 
                 # Handle both old and new JSON formats
                 if 'stories' in data:
-                    self.stories = data['stories']
+                    stories = data['stories']
                 else:
                     # Fallback for old format
-                    self.stories = data
+                    stories = data
                 
                 # Convert string keys to int
-                self.stories = {int(k): v for k, v in self.stories.items()}
-                for story in self.stories.values():
+                stories = {int(k): v for k, v in stories.items()}
+                for story in stories.values():
                     if 'chapters' in story:
                         story['chapters'] = {int(k): v for k, v in story['chapters'].items()}
+                    # JSON written before the text analysis stage (or by an older one)
+                    if needs_analysis(story):
+                        analyze_story(story, self.lexicon)
+                self.publish_catalog(stories, data.get('manifest'))
                 
                 # Print conversion info if available
                 if 'conversion_info' in data:
                     conv_info = data['conversion_info']
-                    print(f"Loaded {conv_info.get('stories_count', len(self.stories))} stories from {conv_info.get('source_file', 'unknown source')}")
+                    print(f"Loaded {conv_info.get('stories_count', len(stories))} stories from {conv_info.get('source_file', 'unknown source')}")
                     print(f"Last conversion: {conv_info.get('conversion_timestamp', 'unknown')}")
                 else:
-                    print(f"Loaded {len(self.stories)} stories from JSON")
+                    print(f"Loaded {len(stories)} stories from JSON")
                     
         except Exception as e:
             print(f"Error loading JSON: {e}")
             raise
     
-    def save_to_json(self):
-        """Saves stories to JSON file with metadata"""
+    def save_to_json(self, catalog=None):
+        """Saves stories to JSON file with metadata, and the story store next to it
+
+        Writes a temporary file and renames it over the JSON, so a crash or
+        a concurrent load never sees a half-written catalog.
+        """
+        catalog = catalog or self.catalog
         try:
+            docx_files = self.docx_files if catalog.manifest else []
             # Include conversion metadata
             conversion_info = {
                 'conversion_timestamp': datetime.now().isoformat(),
-                'source_file': self.docx_file if os.path.exists(self.docx_file) else 'example_data',
-                'stories_count': len(self.stories),
-                'docx_last_modified': datetime.fromtimestamp(os.path.getmtime(self.docx_file)).isoformat() if os.path.exists(self.docx_file) else None
+                'source_file': ', '.join(path.name for path in docx_files) or 'example_data',
+                'source_files': [path.name for path in docx_files],
+                'stories_count': len(catalog.stories),
+                'docx_last_modified': datetime.fromtimestamp(max(path.stat().st_mtime for path in docx_files)).isoformat() if docx_files else None
             }
             
             data = {
-                'stories': self.stories,
+                'stories': thaw(catalog.stories),
                 'conversion_info': conversion_info,
                 'version': '2.0'
             }
+            if catalog.manifest:
+                data['manifest'] = thaw(catalog.manifest)
             
-            with open(str(self.json_file), 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            with atomic_write(self.json_file, prefix='.stories_', suffix='.json') as temp_path:
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=2)
+            write_story_store(str(self.store_file), catalog.stories, catalog.manifest)
                 
-            print(f"Stories saved to {self.json_file} ({len(self.stories)} stories)")
+            print(f"Stories saved to {self.json_file} ({len(catalog.stories)} stories)")
         except Exception as e:
             print(f"Error saving JSON: {e}")
             raise
     
     def convert_docx_to_json(self):
-        """Converts DOCX to JSON format"""
+        """Converts every DOCX in assets/ to one JSON catalog, parsing only what changed
+
+        The manifest saved with the JSON keeps a hash per file and per
+        story. Unchanged files are not read, changed files are parsed in a
+        process pool (skipping stories whose content hash is known), a
+        changed story keeps its id (matched by title) and new stories get
+        ids that were never used, so progress stored per story id stays
+        attached to the right story. See ingestion.merge_documents.
+
+        The new catalog is built from the current snapshot and published
+        in one swap, so readers never see a half-converted catalog.
+
+        Returns {'added': [...], 'changed': [...], 'removed': [...],
+        'unchanged': count}, with {'id', 'title'} entries.
+        """
         try:
-            print(f"Converting {self.docx_file} to JSON...")
+            docx_files = self.docx_files
+            print(f"Converting {len(docx_files)} DOCX file(s) from {self.assets_dir} to JSON...")
             
-            # Clear existing stories before conversion
-            self.stories = {}
+            base = self.catalog
+            stories, manifest, changes = ingest_catalog(docx_files, dict(base.stories), thaw(base.manifest),
+                                                        workers=INGEST_WORKERS)
+            if not (changes['added'] or changes['changed'] or changes['removed']) and self.json_file.exists():
+                if manifest != thaw(base.manifest):
+                    self.save_to_json(self.publish_catalog(base.stories, manifest))
+                print("DOCX content unchanged, keeping existing stories")
+                return changes
             
-            doc = Document(self.docx_file)
-            self.parse_docx_content(doc)
-            self.save_to_json()
+            snapshot = self.publish_catalog(stories, manifest)
+            self.save_to_json(snapshot)
             
-            print(f"Conversion completed. Found {len(self.stories)} stories.")
+            print(f"Conversion completed. Found {len(snapshot.stories)} stories "
+                  f"({len(changes['added'])} added, {len(changes['changed'])} changed, "
+                  f"{len(changes['removed'])} removed, {changes['unchanged']} unchanged).")
+            return changes
         except Exception as e:
             print(f"Error converting DOCX: {e}")
             raise
     
-    def force_reconvert_docx(self):
-        """Forces DOCX reconversion to JSON, clearing existing data"""
-        if os.path.exists(self.docx_file):
-            print(f"Forcing reconversion of {self.docx_file}...")
-            
-            # Clear existing stories data
-            self.stories = {}
-            
-            # Remove existing JSON file to ensure clean conversion
-            if os.path.exists(self.json_file):
-                try:
-                    os.remove(self.json_file)
-                    print(f"Removed existing {self.json_file}")
-                except OSError as e:
-                    print(f"Warning: Could not remove existing JSON file: {e}")
-            
-            # Convert DOCX to new JSON
-            self.convert_docx_to_json()
-            print("DOCX successfully reconverted to new JSON file")
-            return True
-        else:
-            print(f"DOCX file not found: {self.docx_file}")
-            return False
+    def reload_catalog(self):
+        """Reconverts the DOCX files now, even if the JSON looks up to date
+
+        Only changed stories are parsed again. Concurrent calls (admin
+        requests, the asset watcher) share one conversion and get the same
+        change report, also kept in last_reload_changes. Returns None when
+        assets/ has no DOCX file.
+        """
+        return self._reloads.do(self._reload_catalog)
     
-    def parse_docx_content(self, doc):
-        """Parse do documento DOCX para extrair histórias, quizzes e vocabulário"""
-        # Initialize state variables for multi-line quiz parsing
-        self._pending_question = None
-        self._pending_options = []
-        self._pending_correct = -1
-        
-        current_story = None
-        current_chapter = None
-        current_section = None
+    def _reload_catalog(self):
+        if not self.docx_files:
+            print(f"No DOCX file found in {self.assets_dir}")
+            return None
         
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
-            if not text:
-                continue
-            
-            # Detecta nova história (título principal)
-            if self.is_story_title(paragraph):
-                story_id = len(self.stories) + 1
-                current_story = {
-                    'id': story_id,
-                    'title': text,
-                    'chapters': {},
-                    'total_chapters': 0
-                }
-                self.stories[story_id] = current_story
-                current_chapter = None
-                current_section = None
-            
-            # Detecta capítulo
-            elif self.is_chapter_title(text):
-                if current_story:
-                    chapter_num = self.extract_chapter_number(text)
-                    current_story['chapters'][chapter_num] = {
-                        'title': text,
-                        'content': '',
-                        'quiz': [],
-                        'vocabulary': []
-                    }
-                    current_story['total_chapters'] = max(current_story['total_chapters'], chapter_num)
-                    current_chapter = chapter_num
-                    current_section = 'content'
-            
-            # Detecta seção de vocabulário
-            elif self.is_vocabulary_section(text):
-                if current_story and current_chapter:
-                    current_section = 'vocabulary'
-            
-            # Detecta seção de quiz ou conteúdo que pode conter quiz
-            elif 'quiz' in text.lower() or 'question' in text.lower() or self.contains_quiz_elements(text):
-                if current_story and current_chapter:
-                    current_section = 'quiz'
-                    # Processa imediatamente se contém elementos de quiz
-                    if self.contains_quiz_elements(text):
-                        self.parse_quiz_question(text, current_story['chapters'][current_chapter]['quiz'])
-            
-            # Adiciona conteúdo
-            elif current_story and current_chapter:
-                if current_section == 'content':
-                    current_story['chapters'][current_chapter]['content'] += text + '\n'
-                elif current_section == 'vocabulary':
-                    self.parse_vocabulary_entry(text, current_story['chapters'][current_chapter]['vocabulary'])
-                elif current_section == 'quiz':
-                    self.parse_quiz_question(text, current_story['chapters'][current_chapter]['quiz'])
-    
-    def is_story_title(self, paragraph):
-        """Detecta se é título de história"""
-        if not paragraph.runs:
-            return False
-        return (paragraph.runs[0].bold and len(paragraph.text.strip()) < 50) or paragraph.text.isupper()
+        print(f"Forcing reconversion of the DOCX files in {self.assets_dir}...")
+        changes = self.convert_docx_to_json()
+        self.last_reload_changes = changes
+        if changes['added'] or changes['changed'] or changes['removed']:
+            # Statistics use each story's chapter count
+            self.user_statistics.clear()
+            self.update_search_index()
+            changed_ids = [entry['id'] for entry in changes['added'] + changes['changed']]
+            if TTS_PRERENDER and changed_ids:
+                self.start_audio_prerender(changed_ids)
+        print("DOCX successfully reconverted to JSON")
+        return changes
     
-    def is_chapter_title(self, text):
-        """Detecta se é título de capítulo"""
-        return bool(re.match(r'chapter\s+\d+', text.lower()) or re.match(r'capítulo\s+\d+', text.lower()))
-    
-    def contains_quiz_elements(self, text):
-        """Detecta se o texto contém elementos de quiz (questões ou opções)"""
-        text = text.strip()
-        return bool(
-            # Numbered questions
-            re.match(r'^\d+\.', text) or
-            # Option letters
-            re.match(r'^[A-D]\)', text) or
-            # Answer markers
-            '✅' in text or
-            '[resposta:' in text.lower() or
-            # Question patterns
-            ('Q:' in text and '?' in text) or
-            # Multiple choice indicators
-            ('A)' in text and 'B)' in text)
-        )
-    
-    def extract_chapter_number(self, text):
-        """Extrai número do capítulo"""
-        match = re.search(r'(\d+)', text)
-        return int(match.group(1)) if match else 1
+    def update_search_index(self):
+        """Re-indexes the stories of the current catalog whose content changed (see search.py)"""
+        catalog = self.catalog
+        try:
+            indexed, removed = index_catalog(catalog.stories, catalog.manifest)
+            if indexed or removed:
+                print(f"Search index updated: {indexed} stories indexed, {removed} removed")
+        except Exception as e:
+            print(f"Error updating search index: {e}")
     
-    def is_vocabulary_section(self, text):
-        """Detecta se é seção de vocabulário"""
-        vocabulary_keywords = ['vocabulary', 'vocabulário', 'key words', 'palavras-chave', 'glossary']
-        return any(keyword in text.lower() for keyword in vocabulary_keywords)
+    def force_reconvert_docx(self):
+        """Reconverts the DOCX files now; True if there was any to convert"""
+        return self.reload_catalog() is not None
     
-    def parse_vocabulary_entry(self, text, vocabulary_list):
-        """Parse de entrada de vocabulário do DOCX"""
-        # Formatos suportados:
-        # "- word = tradução"
-        # "word: tradução"
-        # "word - tradução"
-        # "word = tradução"
-        
-        # Remove marcadores de lista
-        text = re.sub(r'^[-•*]\s*', '', text.strip())
-        
-        # Tenta diferentes separadores
-        separators = [' = ', ': ', ' - ', ' – ', ' → ', ' -> ']
-        
-        for separator in separators:
-            if separator in text:
-                parts = text.split(separator, 1)
-                if len(parts) == 2:
-                    word = parts[0].strip()
-                    translation = parts[1].strip()
-                    
-                    # Remove caracteres extras
-                    word = re.sub(r'[^\w\s]', '', word).strip()
-                    translation = re.sub(r'[^\w\s]', '', translation).strip()
-                    
-                    if word and translation and len(word) > 1:
-                        # Busca contexto no conteúdo do capítulo (se disponível)
-                        context = f"Used in the context of this chapter."
-                        
-                        vocabulary_list.append({
-                            'word': word.capitalize(),
-                            'translation': translation.lower(),
-                            'context': context
-                        })
-                    break
-    
-    def parse_quiz_question(self, text, quiz_list):
-        """Enhanced quiz parsing supporting multiple formats"""
-        text = text.strip()
-        if not text:
-            return
-            
-        # Format 1: New format with numbered questions and ✅ markers
-        # Example: "1. What is Boitatá?\n   a) A dog\n   b) A snake made of fire ✅\n   c) A bird"
-        if re.match(r'^\d+\.', text):
-            lines = text.split('\n')
-            question_line = lines[0]
-            
-            # Extract question
-            question_match = re.match(r'^\d+\.\s*(.+?)(?:\?|$)', question_line)
-            if not question_match:
-                return
-                
-            question = question_match.group(1).strip()
-            if not question.endswith('?'):
-                question += '?'
-            
-            # Extract options from subsequent lines
-            options = []
-            correct_index = -1
-            
-            for line in lines[1:]:
-                line = line.strip()
-                if not line:
-                    continue
-                    
-                # Match option patterns: a) text ✅ or a) text
-                option_match = re.match(r'^[a-d]\)\s*(.+?)(?:\s*✅)?$', line)
-                if option_match:
-                    option_text = option_match.group(1).strip()
-                    options.append(option_text)
-                    
-                    # Check if this is the correct answer
-                    if '✅' in line:
-                        correct_index = len(options) - 1
-            
-            # Add question if we have enough options and a correct answer
-            if len(options) >= 2 and correct_index >= 0:
-                quiz_list.append({
-                    'question': question,
-                    'options': options,
-                    'correct': correct_index
-                })
-                return
-        
-        # Format 2: Old format with [resposta: X] pattern
-        # Example: "Q: How many legs does the Saci have? A) Two B) One C) Three [resposta: B]"
-        if 'Q:' in text or ('?' in text and any(marker in text for marker in ['A)', 'B)', 'C)', 'D)'])):
-            question_data = {
-                'question': '',
-                'options': [],
-                'correct': 0
-            }
-            
-            # Extract question
-            if '?' in text:
-                question_data['question'] = text.split('?')[0].strip()
-                if 'Q:' in question_data['question']:
-                    question_data['question'] = question_data['question'].split('Q:')[1].strip()
-                question_data['question'] += '?'
-                
-                rest = text.split('?', 1)[1] if '?' in text else text
-                
-                # Extract options using regex
-                options = re.findall(r'[A-D]\)\s*([^A-D\[]+)', rest)
-                question_data['options'] = [opt.strip() for opt in options[:4]]
-                
-                # Extract correct answer
-                correct_match = re.search(r'resposta:\s*([A-D])', text.lower())
-                if correct_match:
-                    correct_letter = correct_match.group(1).upper()
-                    question_data['correct'] = ord(correct_letter) - ord('A')
-                
-                if len(question_data['options']) >= 2:
-                    quiz_list.append(question_data)
-                    return
-        
-        # Format 3: Multi-line format where options are on separate lines
-        # Look for questions that might be split across multiple paragraphs
-        if '?' in text and not any(marker in text for marker in ['A)', 'B)', 'C)', 'D)']):
-            # This might be a question header, store it for potential combination with following options
-            self._pending_question = text.strip()
-            if not self._pending_question.endswith('?'):
-                self._pending_question += '?'
-            return
-            
-        # Check if this line contains options for a pending question
-        if hasattr(self, '_pending_question') and self._pending_question:
-            # Look for option patterns
-            if re.match(r'^[A-D]\)', text) or '✅' in text:
-                if not hasattr(self, '_pending_options'):
-                    self._pending_options = []
-                    self._pending_correct = -1
-                
-                option_match = re.match(r'^[A-D]\)\s*(.+?)(?:\s*✅)?$', text)
-                if option_match:
-                    option_text = option_match.group(1).strip()
-                    self._pending_options.append(option_text)
-                    
-                    if '✅' in text:
-                        self._pending_correct = len(self._pending_options) - 1
-                
-                # If we have enough options, create the quiz question
-                if len(self._pending_options) >= 2 and self._pending_correct >= 0:
-                    quiz_list.append({
-                        'question': self._pending_question,
-                        'options': self._pending_options,
-                        'correct': self._pending_correct
-                    })
-                    
-                    # Reset pending data
-                    self._pending_question = None
-                    self._pending_options = []
-                    self._pending_correct = -1
+    def start_asset_watcher(self, interval=None):
+        """Reloads the catalog in the background whenever a DOCX in assets/ changes"""
+        interval = interval or ASSET_WATCH_INTERVAL
+        if interval and self.asset_watcher is None:
+            self.asset_watcher = AssetWatcher(lambda: self.docx_files, self.reload_catalog, interval)
+            self.asset_watcher.start()
+            print(f"Watching {self.assets_dir} for DOCX changes every {interval:g}s")
+        return self.asset_watcher
     
     def load_example_stories(self):
         """Carrega histórias de exemplo com estrutura de capítulos"""
-        self.stories = {
+        stories = {
             1: {
                 'id': 1,
                 'title': 'The Legend of Curupira',
@@ -637,6 +613,9 @@ Maria never saw her mysterious dancer again, but every year at the festival, she
                 }
             }
         }
+        for story in stories.values():
+            analyze_story(story, self.lexicon)
+        self.publish_catalog(stories)
     
     def get_story_list(self):
         """Retorna lista de histórias para exibição"""
@@ -645,262 +624,276 @@ Maria never saw her mysterious dancer again, but every year at the festival, she
     
     def get_chapter(self, story_id, chapter_num):
         """Retorna capítulo específico"""
-        if story_id in self.stories and chapter_num in self.stories[story_id]['chapters']:
-            return self.stories[story_id]['chapters'][chapter_num]
+        story = self.stories.get(story_id)
+        if story is not None:
+            return story['chapters'].get(chapter_num)
         return None
     
     def extract_vocabulary(self, story_id, chapter_num):
-        """Extrai vocabulário útil do capítulo com traduções"""
+        """Vocabulário do capítulo com traduções e contexto (calculado na conversão, ver text_analysis.py)"""
         chapter = self.get_chapter(story_id, chapter_num)
         if not chapter:
             return []
+        return self.chapter_analysis(chapter)['vocabulary']
+    
+    def chapter_analysis(self, chapter):
+        """Artefatos de análise do capítulo; todo capítulo do catálogo já os tem"""
+        return chapter.get('analysis') or analyze_chapter(chapter, self.lexicon)
+    
+    def chapter_audio(self, chapter, synthesize=None):
+        """(path, cache key) of the chapter's audio file
+
+        On a cache miss the audio is synthesized now if synthesize (default
+        TTS_INLINE) is true; otherwise path is None.
+        """
+        text = chapter['content']
+        backend = self.tts_backend
+        key = backend.cache_key(text)
+        if synthesize is None:
+            synthesize = TTS_INLINE
+        if not synthesize:
+            return self.audio_cache.get(key), key
+        return self.audio_cache.get_or_create(key, lambda path: backend.synthesize(text, path)), key
+    
+    def prerender_audio(self, story_ids=None, workers=None):
+        """Synthesizes the audio missing from the cache for the catalog (or story_ids); see prerender.py"""
+        return prerender_catalog(self.stories, self.tts_backend, self.audio_cache, story_ids,
+                                 workers=workers or TTS_WORKERS)
+    
+    def start_audio_prerender(self, story_ids):
+        """Pre-renders the audio of story_ids in a background thread"""
+        def run():
+            try:
+                report = self.prerender_audio(story_ids)
+                print(f"Audio pre-rendered for {len(story_ids)} stories: {report['rendered']} rendered, "
+                      f"{report['cached']} already cached, {report['failed']} failed")
+            except Exception as e:
+                print(f"Error pre-rendering audio: {e}")
         
-        # Primeiro, verifica se há vocabulário definido no DOCX
-        if 'vocabulary' in chapter and chapter['vocabulary']:
-            # Adiciona contexto do conteúdo para vocabulário do DOCX
-            for vocab_item in chapter['vocabulary']:
-                if 'context' not in vocab_item or vocab_item['context'] == "Used in the context of this chapter.":
-                    vocab_item['context'] = self.get_word_context(chapter['content'], vocab_item['word'])
-            return chapter['vocabulary']
-        
-        # Se não há vocabulário no DOCX, extrai automaticamente
-        return self.extract_automatic_vocabulary(chapter['content'])
+        thread = threading.Thread(target=run, name='audio-prerender', daemon=True)
+        thread.start()
+        return thread
     
-    def extract_automatic_vocabulary(self, text):
-        """Extrai vocabulário automaticamente do texto"""
-    def extract_automatic_vocabulary(self, text):
-        """Extrai vocabulário automaticamente do texto"""
-        # Dicionário de vocabulário com traduções contextuais
-        vocabulary_dict = {
-            # Curupira vocabulary
-            'forest': 'floresta',
-            'creature': 'criatura',
-            'mysterious': 'misterioso',
-            'legendary': 'lendário',
-            'protecting': 'protegendo',
-            'backward': 'para trás',
-            'footprints': 'pegadas',
-            'hunters': 'caçadores',
-            'indigenous': 'indígena',
-            'tribes': 'tribos',
-            'generation': 'geração',
-            'threaten': 'ameaçar',
-            'respect': 'respeitar',
-            'nature': 'natureza',
-            'illegal': 'ilegal',
-            'loggers': 'madeireiros',
-            'chainsaws': 'motosserras',
-            'valuable': 'valioso',
-            'compasses': 'bússolas',
-            'wildly': 'descontroladamente',
-            'directions': 'direções',
-            'paths': 'caminhos',
-            'disappeared': 'desapareceram',
-            'overnight': 'durante a noite',
-            'clearings': 'clareiras',
-            'innocently': 'inocentemente',
-            'exhausted': 'exaustos',
-            'frightened': 'assustados',
-            'revealed': 'revelou',
-            'identity': 'identidade',
-            'guardian': 'guardião',
-            'destroy': 'destruir',
-            'civilization': 'civilização',
-            'protectors': 'protetores',
-            
-            # Pink Dolphin vocabulary
-            'festival': 'festival',
-            'celebrate': 'celebrar',
-            'gifts': 'presentes',
-            'charming': 'encantador',
-            'elegant': 'elegante',
-            'stylish': 'elegante',
-            'recognized': 'reconheceu',
-            'mysterious': 'misterioso',
-            'stranger': 'estranho',
-            'approached': 'se aproximou',
-            'movements': 'movimentos',
-            'fluid': 'fluido',
-            'floating': 'flutuando',
-            'dawn': 'amanhecer',
-            'approached': 'se aproximou',
-            'disappear': 'desaparecer',
-            'mist': 'névoa',
-            'promised': 'prometeu',
-            'removed': 'removeu',
-            'determination': 'determinação',
-            'truth': 'verdade',
-            'closely': 'de perto',
-            'moonlight': 'luar',
-            'glow': 'brilho',
-            'whistling': 'assobiando',
-            'prepared': 'se preparou',
-            'followed': 'seguiu',
-            'quietly': 'silenciosamente',
-            'amazement': 'espanto',
-            'waist': 'cintura',
-            'transform': 'transformar',
-            'dissolved': 'se dissolveu',
-            'flippers': 'nadadeiras',
-            'blowhole': 'respiradouro',
-            'dolphin': 'golfinho',
-            'sensed': 'percebeu',
-            'presence': 'presença',
-            'intelligent': 'inteligente',
-            'gentle': 'gentil',
-            'shallow': 'raso',
-            'touched': 'tocou',
-            'goodbye': 'adeus',
-            
-            # Common vocabulary
-            'heart': 'coração',
-            'lives': 'vive',
-            'appears': 'aparece',
-            'bright': 'brilhante',
-            'hair': 'cabelo',
-            'point': 'apontar',
-            'curious': 'curioso',
-            'feature': 'característica',
-            'serve': 'servir',
-            'purpose': 'propósito',
-            'track': 'rastrear',
-            'follow': 'seguir',
-            'wrong': 'errado',
-            'direction': 'direção',
-            'getting': 'ficando',
-            'lost': 'perdido',
-            'deeper': 'mais fundo',
-            'instead': 'ao invés de',
-            'finding': 'encontrando',
-            'passed': 'passaram',
-            'down': 'para baixo',
-            'stories': 'histórias',
-            'leading': 'conduzindo',
-            'astray': 'desviado',
-            'until': 'até',
-            'promise': 'prometer',
-            'group': 'grupo',
-            'entered': 'entrou',
-            'sacred': 'sagrado',
-            'trucks': 'caminhões',
-            'planned': 'planejaram',
-            'oldest': 'mais velhas',
-            'trees': 'árvores',
-            'sell': 'vender',
-            'wood': 'madeira',
-            'watching': 'observando',
-            'started': 'começaram',
-            'work': 'trabalho',
-            'strange': 'estranho',
-            'things': 'coisas',
-            'began': 'começaram',
-            'happen': 'acontecer',
-            'spinning': 'girando',
-            'pointing': 'apontando',
-            'marked': 'marcaram',
-            'heard': 'ouviram',
-            'sound': 'som',
-            'coming': 'vindo',
-            'empty': 'vazias',
-            'appeared': 'apareceu',
-            'small': 'pequeno',
-            'seeming': 'parecendo',
-            'help': 'ajudar',
-            'find': 'encontrar',
-            'home': 'casa',
-            'asked': 'perguntou',
-            'thinking': 'pensando',
-            'could': 'poderiam',
-            'easily': 'facilmente',
-            'continue': 'continuar',
-            'agreed': 'concordaram',
-            'guide': 'guiar'
+    def chapter_preview(self, chapter, max_chars):
+        """Início do capítulo cortado no fim de uma frase (ou no limite, se a primeira já passa dele)"""
+        content = chapter['content']
+        if len(content) <= max_chars:
+            return content.strip()
+        sentences = self.chapter_analysis(chapter)['sentences']
+        cut = sentences[bisect.bisect_right(sentences, max_chars) - 1] if sentences else 0
+        if cut <= 0:
+            cut = max_chars
+        return content[:cut].rstrip() + "..."
+    
+    def new_progress(self):
+        """Progresso vazio de um usuário"""
+        return {
+            'stories_completed': {},
+            'total_quiz_attempts': 0,
+            'total_correct_answers': 0,
+            'current_story': None,
+            'current_chapter': 1,
+            'badges': [],
+            'start_date': datetime.now().isoformat()
         }
+    
+    def load_progress(self, user_id):
+        """Monta o progresso de um usuário registrado a partir do banco"""
+        progress = self.new_progress()
         
-        # Extrai palavras do texto
-        words = re.findall(r'\b[A-Za-z]{3,}\b', text.lower())
+        for row in load_user_progress_rows(user_id):
+            story_progress = {
+                'chapters_completed': row['completed_chapters'],
+                'quiz_scores': {}
+            }
+            for quiz_data in row['quiz_scores']:
+                chapter = quiz_data.pop('chapter')
+                story_progress['quiz_scores'][f"chapter_{chapter}"] = quiz_data
+            progress['stories_completed'][f"story_{row['story_id']}"] = story_progress
         
-        # Filtra palavras muito comuns
-        common_words = {
-            'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'had', 'her', 'was', 'one', 
-            'our', 'out', 'day', 'get', 'has', 'him', 'his', 'how', 'its', 'may', 'new', 'now', 'old', 
-            'see', 'two', 'way', 'who', 'boy', 'did', 'she', 'use', 'her', 'how', 'said', 'each', 'make', 
-            'most', 'over', 'such', 'very', 'what', 'with', 'have', 'from', 'they', 'know', 'want', 'been', 
-            'good', 'much', 'some', 'time', 'well', 'were'
-        }
+        counters = get_user_counters(user_id)
+        if counters:
+            progress['total_quiz_attempts'] = counters['quiz_attempts']
+            progress['total_correct_answers'] = counters['correct_answers']
+            progress['badges'] = parse_progress_list(counters['badges'])
         
-        # Seleciona vocabulário útil
-        vocabulary = []
-        seen = set()
+        user = get_user_by_id(user_id)
+        if user and user['created_at']:
+            progress['start_date'] = str(user['created_at']).replace(' ', 'T')
         
-        for word in words:
-            if (word in vocabulary_dict and 
-                word not in common_words and 
-                word not in seen and 
-                len(word) > 2):
-                
-                vocabulary.append({
-                    'word': word.capitalize(),
-                    'translation': vocabulary_dict[word],
-                    'context': self.get_word_context(text, word)
-                })
-                seen.add(word)
-                
-                if len(vocabulary) >= 12:  # Limita a 12 palavras por capítulo
-                    break
-        
-        return vocabulary
-    
-    def get_word_context(self, text, word):
-        """Extrai contexto da palavra no texto"""
-        sentences = text.split('.')
-        for sentence in sentences:
-            if word.lower() in sentence.lower():
-                return sentence.strip() + '.'
-        return f"Used in the story about {word}."
+        return progress
     
     def get_user_progress(self, user_id):
         """Retorna progresso do usuário"""
-        if user_id not in self.user_progress:
-            self.user_progress[user_id] = {
-                'stories_completed': {},
-                'total_quiz_attempts': 0,
-                'total_correct_answers': 0,
-                'current_story': None,
-                'current_chapter': 1,
-                'badges': [],
-                'start_date': datetime.now().isoformat()
-            }
-        return self.user_progress[user_id]
+        progress = self.user_progress.get(user_id)
+        if progress is None:
+            if is_registered_user(user_id):
+                progress = self.load_progress(user_id)
+            else:
+                progress = self.new_progress()
+            self.user_progress.set(user_id, progress)
+        return progress
     
     def update_progress(self, user_id, story_id, chapter_num, quiz_score, total_questions):
-        """Atualiza progresso do usuário"""
+        """Atualiza progresso do usuário
+
+        The result is applied to the cached progress and statistics, and a
+        registered user's database rows for this chapter are written in one
+        transaction (record_quiz_result); nothing is read back unless
+        another worker wrote this user's progress in the meantime.
+        """
         progress = self.get_user_progress(user_id)
+        statistics = self.user_statistics.get(user_id)
+        
         progress['total_quiz_attempts'] += 1
         progress['total_correct_answers'] += quiz_score
         
         story_key = f"story_{story_id}"
-        if story_key not in progress['stories_completed']:
+        new_story = story_key not in progress['stories_completed']
+        if new_story:
             progress['stories_completed'][story_key] = {'chapters_completed': [], 'quiz_scores': {}}
         
         chapter_key = f"chapter_{chapter_num}"
-        progress['stories_completed'][story_key]['quiz_scores'][chapter_key] = {
+        quiz_data = {
             'score': quiz_score,
             'total': total_questions,
             'percentage': round((quiz_score / total_questions) * 100),
             'date': datetime.now().isoformat()
         }
+        progress['stories_completed'][story_key]['quiz_scores'][chapter_key] = quiz_data
         
         # Se passou no quiz (70% ou mais), marca capítulo como completo
+        chapter_completed = False
         if (quiz_score / total_questions) >= 0.7:
             if chapter_num not in progress['stories_completed'][story_key]['chapters_completed']:
                 progress['stories_completed'][story_key]['chapters_completed'].append(chapter_num)
+                chapter_completed = True
         
         # Verifica badges
         self.check_and_award_badges(user_id, progress)
         
+        if statistics is not None:
+            self.record_quiz_statistics(statistics, progress, story_key, chapter_key, quiz_data,
+                                        new_story, chapter_completed)
+        
+        if is_registered_user(user_id):
+            stored_attempts = record_quiz_result(user_id, story_id, chapter_num, quiz_data,
+                                                 (quiz_score / total_questions) >= 0.7, progress['badges'])
+            if stored_attempts != progress['total_quiz_attempts']:
+                # Outro worker gravou desde o cache (ou a gravação falhou): recarrega do banco
+                self.user_progress.invalidate(user_id)
+                self.user_statistics.invalidate(user_id)
+                return self.get_user_progress(user_id)
+        self.user_progress.set(user_id, progress)
+        
         return progress
     
+    def story_total_chapters(self, story_key):
+        """Número real de capítulos de uma história ('story_<id>')"""
+        try:
+            story = self.stories.get(int(story_key[len('story_'):]))
+        except ValueError:
+            story = None
+        if story and story.get('total_chapters'):
+            return story['total_chapters']
+        return 3  # História fora do catálogo: mantém o padrão antigo
+    
+    def story_breakdown(self, story_key, chapters_completed):
+        total_chapters = self.story_total_chapters(story_key)
+        return {
+            'chapters_completed': chapters_completed,
+            'total_chapters': total_chapters,
+            'completion_percentage': round((chapters_completed / total_chapters) * 100)
+        }
+    
+    def build_statistics(self, progress):
+        """Snapshot de estatísticas calculado a partir do progresso completo"""
+        statistics = {
+            'stories_started': len(progress['stories_completed']),
+            'stories_finished': 0,
+            'total_chapters_completed': 0,
+            'quiz_attempts': progress['total_quiz_attempts'],
+            'correct_answers': progress['total_correct_answers'],
+            'badges': progress['badges'],
+            'recent_scores': deque(maxlen=RECENT_SCORES_LIMIT),
+            'chapter_breakdown': {}
+        }
+        
+        recent_scores = []
+        for story_key, story_data in progress['stories_completed'].items():
+            breakdown = self.story_breakdown(story_key, len(story_data['chapters_completed']))
+            statistics['chapter_breakdown'][story_key] = breakdown
+            statistics['total_chapters_completed'] += breakdown['chapters_completed']
+            if breakdown['chapters_completed'] >= breakdown['total_chapters']:
+                statistics['stories_finished'] += 1
+            
+            for chapter_key, quiz_data in story_data['quiz_scores'].items():
+                recent_scores.append({
+                    'story': story_key,
+                    'chapter': chapter_key,
+                    'percentage': quiz_data['percentage'],
+                    'date': quiz_data['date']
+                })
+        
+        # Mais recentes primeiro
+        recent_scores.sort(key=lambda x: x['date'], reverse=True)
+        statistics['recent_scores'].extend(recent_scores[:RECENT_SCORES_LIMIT])
+        return statistics
+    
+    def record_quiz_statistics(self, statistics, progress, story_key, chapter_key, quiz_data,
+                               new_story, chapter_completed):
+        """Aplica um resultado de quiz ao snapshot em O(1)"""
+        statistics['quiz_attempts'] = progress['total_quiz_attempts']
+        statistics['correct_answers'] = progress['total_correct_answers']
+        statistics['badges'] = progress['badges']
+        
+        breakdown = statistics['chapter_breakdown'].get(story_key)
+        if new_story or breakdown is None:
+            statistics['stories_started'] += 1
+            breakdown = self.story_breakdown(story_key, 0)
+        
+        if chapter_completed:
+            was_finished = breakdown['chapters_completed'] >= breakdown['total_chapters']
+            breakdown = self.story_breakdown(story_key, breakdown['chapters_completed'] + 1)
+            statistics['total_chapters_completed'] += 1
+            if not was_finished and breakdown['chapters_completed'] >= breakdown['total_chapters']:
+                statistics['stories_finished'] += 1
+        statistics['chapter_breakdown'][story_key] = breakdown
+        
+        # Um resultado por capítulo, como no progresso: o novo substitui o anterior
+        recent_scores = statistics['recent_scores']
+        for entry in recent_scores:
+            if entry['story'] == story_key and entry['chapter'] == chapter_key:
+                recent_scores.remove(entry)
+                break
+        recent_scores.appendleft({
+            'story': story_key,
+            'chapter': chapter_key,
+            'percentage': quiz_data['percentage'],
+            'date': quiz_data['date']
+        })
+    
+    def get_user_statistics(self, user_id):
+        """Estatísticas do usuário, servidas do snapshot"""
+        statistics = self.user_statistics.get(user_id)
+        if statistics is None:
+            statistics = self.build_statistics(self.get_user_progress(user_id))
+            self.user_statistics.set(user_id, statistics)
+        
+        attempts = statistics['quiz_attempts']
+        return {
+            'total_stories': len(self.stories),
+            'stories_started': statistics['stories_started'],
+            'stories_finished': statistics['stories_finished'],
+            'total_chapters_completed': statistics['total_chapters_completed'],
+            'quiz_attempts': attempts,
+            'correct_answers': statistics['correct_answers'],
+            'accuracy_percentage': round((statistics['correct_answers'] / attempts) * 100) if attempts > 0 else 0,
+            'badges': list(statistics['badges']),
+            'recent_scores': list(statistics['recent_scores']),
+            'chapter_breakdown': statistics['chapter_breakdown']
+        }
+    
     def check_and_award_badges(self, user_id, progress):
         """Sistema de badges/conquistas"""
         badges = progress.get('badges', [])
@@ -926,8 +919,18 @@ Maria never saw her mysterious dancer again, but every year at the festival, she
         
         progress['badges'] = badges
 
-# Inicializa a aplicação
-folktale_app = FolktaleApp()
+# Inicializa a aplicação (create_folktale_app). Importing this module does
+# nothing else: the ingestion and audio pre-render pools spawn workers,
+# which re-import the main module (app.py under `python app.py`)
+folktale_app = None
+
+def create_folktale_app():
+    """Migrate the database and load the story catalog, once per process"""
+    global folktale_app
+    if folktale_app is None:
+        init_database()
+        folktale_app = FolktaleApp()
+    return folktale_app
 
 @app.route('/')
 def index():
@@ -1000,13 +1003,14 @@ def get_demo_stories():
     """Public API endpoint to show sample stories on welcome screen"""
     # Return only basic information for demonstration
     demo_stories = []
-    for story_id, story in folktale_app.stories.items():
+    stories = folktale_app.stories
+    for story_id, story in stories.items():
         demo_stories.append({
             'id': story_id,
             'title': story['title'],
             'chapters': story['total_chapters'],
             'description': f"A fascinating Brazilian folktale with {story['total_chapters']} interactive chapters.",
-            'duration': f"~{story['total_chapters'] * 5} minutes"
+            'duration': f"~{max(1, round(story['reading_minutes']))} minutes"
         })
     
     return jsonify(demo_stories[:3])  # Only first 3 for demo
@@ -1015,12 +1019,13 @@ def get_demo_stories():
 def get_demo_sample():
     """Public API endpoint to show a sample chapter"""
     # Get first chapter of first story as example
-    if folktale_app.stories:
-        first_story = list(folktale_app.stories.values())[0]
+    stories = folktale_app.stories
+    if stories:
+        first_story = next(iter(stories.values()))
         if first_story['chapters']:
             first_chapter = first_story['chapters'][1]
             # Return only a preview of the content
-            content_preview = first_chapter['content'][:400] + "..."
+            content_preview = folktale_app.chapter_preview(first_chapter, 400)
             return jsonify({
                 'title': first_story['title'],
                 'chapter_title': first_chapter['title'],
@@ -1088,12 +1093,13 @@ def get_all_users_endpoint():
 def get_demo_chapter():
     """API endpoint público para mostrar um trecho de exemplo"""
     # Pega o primeiro capítulo da primeira história como exemplo
-    if folktale_app.stories:
-        first_story = list(folktale_app.stories.values())[0]
+    stories = folktale_app.stories
+    if stories:
+        first_story = next(iter(stories.values()))
         if first_story['chapters']:
             first_chapter = first_story['chapters'][1]
             # Retorna apenas um trecho do conteúdo
-            content_preview = first_chapter['content'][:300] + "..."
+            content_preview = folktale_app.chapter_preview(first_chapter, 300)
             return jsonify({
                 'title': first_chapter['title'],
                 'preview': content_preview,
@@ -1112,6 +1118,33 @@ def get_stories():
     """API endpoint para listar todas as histórias"""
     return jsonify(folktale_app.get_story_list())
 
+@app.route('/api/search')
+@login_required
+def search_stories():
+    """API endpoint para busca em títulos, capítulos, vocabulário e quizzes
+
+    Every word of q is matched as a prefix, ignoring case and accents.
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Search query (q) required.'}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 50)
+    except ValueError:
+        return jsonify({'error': 'limit must be a number.'}), 400
+    
+    stories = folktale_app.stories
+    results = []
+    for result in search_catalog(query, limit):
+        story = stories.get(result['story_id'])
+        # The index may briefly lag behind a reload
+        if story is None:
+            continue
+        result['story_title'] = story['title']
+        results.append(result)
+    
+    return jsonify({'query': query, 'count': len(results), 'results': results})
+
 @app.route('/api/story/<int:story_id>/chapter/<int:chapter_num>')
 @login_required
 def get_chapter(story_id, chapter_num):
@@ -1125,12 +1158,18 @@ def get_chapter(story_id, chapter_num):
                 'chapter_num': chapter_num,
                 'title': chapter.get('title', '')
             })
-            chapter['new_achievements'] = new_achievements
         except Exception as e:
             print(f"Achievement logging error: {e}")
-            chapter['new_achievements'] = []
+            new_achievements = []
         
-        return jsonify(chapter)
+        # The catalog chapter is shared (and read-only): respond with a copy,
+        # without the sentence offsets and word lists of the analysis
+        response = {key: value for key, value in chapter.items() if key != 'analysis'}
+        analysis = folktale_app.chapter_analysis(chapter)
+        response['word_count'] = analysis['word_count']
+        response['reading_minutes'] = analysis['reading_minutes']
+        response['new_achievements'] = new_achievements
+        return jsonify(response)
     return jsonify({'error': 'Chapter not found'}), 404
 
 @app.route('/api/audio/<int:story_id>/<int:chapter_num>')
@@ -1141,16 +1180,17 @@ def get_audio(story_id, chapter_num):
         return jsonify({'error': 'Chapter not found'}), 404
     
     try:
-        # Gera áudio usando gTTS
-        tts = gTTS(text=chapter['content'], lang='en', slow=False)
+        # Sintetiza só na primeira vez (ou nunca, com FOLKTALE_TTS_INLINE=0); depois vem do cache em disco
+        path, key = folktale_app.chapter_audio(chapter)
+        if path is None:
+            return jsonify({'error': 'Audio not rendered yet'}), 503
         
-        # Salva em arquivo temporário
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-        tts.save(temp_file.name)
-        
-        return send_file(temp_file.name, as_attachment=True, 
-                        download_name=f'chapter_{story_id}_{chapter_num}.mp3',
-                        mimetype='audio/mpeg')
+        # The file name is the content hash: it is the ETag, and conditional
+        # requests get 304 / Range responses
+        backend = folktale_app.tts_backend
+        return send_file(path, as_attachment=True,
+                        download_name=f'chapter_{story_id}_{chapter_num}{backend.suffix}',
+                        mimetype=backend.mimetype, conditional=True, etag=key)
     except Exception as e:
         return jsonify({'error': f'Audio generation failed: {str(e)}'}), 500
 
@@ -1256,83 +1296,40 @@ def get_statistics():
     if 'user_id' not in session:
         return jsonify({'error': 'No session found'}), 400
     
-    progress = folktale_app.get_user_progress(session['user_id'])
-    
-    # Calcula estatísticas
-    stats = {
-        'total_stories': len(folktale_app.stories),
-        'stories_started': len(progress['stories_completed']),
-        'stories_finished': 0,
-        'total_chapters_completed': 0,
-        'quiz_attempts': progress['total_quiz_attempts'],
-        'correct_answers': progress['total_correct_answers'],
-        'accuracy_percentage': 0,
-        'badges': progress['badges'],
-        'recent_scores': [],
-        'chapter_breakdown': {}
-    }
-    
-    # Analisa histórias completadas
-    for story_key, story_data in progress['stories_completed'].items():
-        chapters_completed = len(story_data['chapters_completed'])
-        stats['total_chapters_completed'] += chapters_completed
-        
-        if chapters_completed >= 3:  # História completa (assumindo 3 capítulos)
-            stats['stories_finished'] += 1
-        
-        # Scores recentes
-        for chapter_key, quiz_data in story_data['quiz_scores'].items():
-            stats['recent_scores'].append({
-                'story': story_key,
-                'chapter': chapter_key,
-                'percentage': quiz_data['percentage'],
-                'date': quiz_data['date']
-            })
-        
-        stats['chapter_breakdown'][story_key] = {
-            'chapters_completed': chapters_completed,
-            'total_chapters': 3,  # Assumindo 3 capítulos por história
-            'completion_percentage': round((chapters_completed / 3) * 100)
-        }
-    
-    # Ordena scores por data (mais recentes primeiro)
-    stats['recent_scores'].sort(key=lambda x: x['date'], reverse=True)
-    stats['recent_scores'] = stats['recent_scores'][:10]  # Últimos 10
-    
-    # Calcula precisão
-    if stats['quiz_attempts'] > 0:
-        stats['accuracy_percentage'] = round((stats['correct_answers'] / stats['quiz_attempts']) * 100)
-    
-    return jsonify(stats)
+    return jsonify(folktale_app.get_user_statistics(session['user_id']))
 
 @app.route('/api/reload_docx', methods=['POST'])
 @login_required_admin
 def reload_docx():
-    """API endpoint to force DOCX reconversion, replacing existing JSON"""
+    """API endpoint to force DOCX reconversion; only changed stories are parsed again"""
     try:
         print("Starting forced DOCX reconversion...")
         
         # Get old story count for comparison
         old_stories_count = len(folktale_app.stories)
         
-        success = folktale_app.force_reconvert_docx()
-        if success:
-            # Reload the stories from new JSON
-            folktale_app.load_from_json()
-            new_stories_count = len(folktale_app.stories)
+        changes = folktale_app.reload_catalog()
+        if changes is not None:
+            catalog = folktale_app.catalog
+            new_stories_count = len(catalog.stories)
             
             return jsonify({
                 'success': True, 
-                'message': f'DOCX successfully reconverted to new JSON',
+                'message': f'DOCX successfully reconverted to JSON',
                 'old_stories_count': old_stories_count,
                 'new_stories_count': new_stories_count,
-                'stories_changed': new_stories_count != old_stories_count,
+                'stories_changed': bool(changes['added'] or changes['changed'] or changes['removed']),
+                'added': changes['added'],
+                'changed': changes['changed'],
+                'removed': changes['removed'],
+                'unchanged_count': changes['unchanged'],
+                'catalog_version': catalog.version,
                 'conversion_timestamp': datetime.now().isoformat()
             })
         else:
             return jsonify({
                 'success': False, 
-                'message': f'DOCX file not found: {folktale_app.docx_file}'
+                'message': f'No DOCX file found in {folktale_app.assets_dir}'
             }), 404
     except Exception as e:
         print(f"Error during DOCX reconversion: {e}")
@@ -1346,13 +1343,14 @@ def reload_docx():
 def get_data_info():
     """API endpoint for information about loaded data"""
     try:
+        docx_files = folktale_app.docx_files
         info = {
             'json_exists': os.path.exists(folktale_app.json_file),
-            'docx_exists': os.path.exists(folktale_app.docx_file),
+            'docx_exists': bool(docx_files),
             'stories_count': len(folktale_app.stories),
             'source': 'unknown',
-            'json_file': folktale_app.json_file,
-            'docx_file': folktale_app.docx_file
+            'json_file': str(folktale_app.json_file),
+            'docx_files': [path.name for path in docx_files]
         }
         
         # Check JSON file info
@@ -1370,15 +1368,15 @@ def get_data_info():
             except:
                 pass
         
-        # Check DOCX file info
-        if folktale_app.docx_file.exists():
-            docx_time = datetime.fromtimestamp(folktale_app.docx_file.stat().st_mtime)
+        # Check DOCX file info (newest file, total size)
+        if docx_files:
+            docx_time = datetime.fromtimestamp(max(path.stat().st_mtime for path in docx_files))
             info['docx_last_modified'] = docx_time.isoformat()
-            info['docx_size_kb'] = round(folktale_app.docx_file.stat().st_size / 1024, 2)
+            info['docx_size_kb'] = round(sum(path.stat().st_size for path in docx_files) / 1024, 2)
         
         # Determine data source
         if info['json_exists'] and info['docx_exists']:
-            if folktale_app.json_file.stat().st_mtime >= folktale_app.docx_file.stat().st_mtime:
+            if folktale_app.should_use_json():
                 info['source'] = 'json (up to date)'
                 info['needs_reconversion'] = False
             else:
@@ -1419,8 +1417,8 @@ def get_achievements():
     """Get all achievements for current user"""
     try:
         user_id = session.get('user_id')
-        achievements = get_user_achievements(user_id)
-        return jsonify(achievements)
+        return cached_json_response(('achievements', user_id),
+                                    lambda: get_user_achievements(user_id))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1430,8 +1428,8 @@ def get_achievement_stats():
     """Get achievement statistics for current user"""
     try:
         user_id = session.get('user_id')
-        stats = get_user_achievement_stats(user_id)
-        return jsonify(stats)
+        return cached_json_response(('achievement_stats', user_id),
+                                    lambda: get_user_achievement_stats(user_id))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1455,6 +1453,43 @@ def log_activity():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Largest number of events accepted by a single batch request
+ACTIVITY_BATCH_LIMIT = 100
+
+@app.route('/api/log_activity/batch', methods=['POST'])
+@login_required
+def log_activity_batch():
+    """Log several activities at once and check achievements a single time
+
+    Accepts {"events": [...]} or a bare list of events. The body is parsed
+    regardless of Content-Type so navigator.sendBeacon() payloads work too.
+    """
+    try:
+        data = request.get_json(force=True, silent=True)
+        events = data.get('events') if isinstance(data, dict) else data
+        
+        if not isinstance(events, list):
+            return jsonify({'error': 'Expected a list of events'}), 400
+        if len(events) > ACTIVITY_BATCH_LIMIT:
+            return jsonify({'error': f'At most {ACTIVITY_BATCH_LIMIT} events per batch'}), 400
+        
+        batch = []
+        for event in events:
+            if not isinstance(event, dict) or not isinstance(event.get('activity_type'), str):
+                return jsonify({'error': 'Each event needs an activity_type'}), 400
+            batch.append((event['activity_type'], event.get('activity_data', {})))
+        
+        user_id = session.get('user_id')
+        new_achievements = log_user_activities(user_id, batch)
+        
+        return jsonify({
+            'success': True,
+            'logged': len(batch),
+            'new_achievements': new_achievements
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Ranking API Endpoints
 @app.route('/api/ranking/global')
 @login_required
@@ -1462,8 +1497,8 @@ def get_global_leaderboard():
     """Get global ranking leaderboard"""
     try:
         limit = request.args.get('limit', 50, type=int)
-        ranking = get_global_ranking(limit)
-        return jsonify(ranking)
+        return cached_json_response(('ranking_global', limit),
+                                    lambda: get_global_ranking(limit))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1483,10 +1518,19 @@ def get_user_ranking():
 def get_category_leaderboards():
     """Get rankings by achievement categories"""
     try:
-        rankings = get_category_rankings()
-        return jsonify(rankings)
+        return cached_json_response(('ranking_categories',), get_category_rankings)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/admin/cache_stats')
+@login_required_admin
+def get_cache_stats():
+    """Hit/miss counters of the ranking and achievement response cache (and of the audio cache)"""
+    return jsonify(dict(response_cache.stats(), audio=folktale_app.audio_cache.stats()))
+
 if __name__ == '__main__':
+    create_folktale_app()
+    # With the reloader on, only the child process that serves requests watches assets/
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        folktale_app.start_asset_watcher()
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Polling watcher for the DOCX sources in assets/
+
+Checks the name, size and mtime of the watched files every few seconds
+and calls on_change once a change has settled (two polls in a row see
+the same new state), so a file that is still being saved is not read
+half-written. Polling keeps it dependency-free and works on network and
+container filesystems where change notifications are unreliable.
+"""
+
+import threading
+
+class AssetWatcher:
+    """Background thread that calls on_change() when the listed files change
+
+    list_files returns the paths to watch (for example FolktaleApp.docx_files).
+    """
+
+    def __init__(self, list_files, on_change, interval=2.0):
+        self.list_files = list_files
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def signature(self):
+        """Name, size and mtime of every watched file"""
+        entries = []
+        for path in self.list_files():
+            stat = path.stat()
+            entries.append((path.name, stat.st_size, stat.st_mtime_ns))
+        return tuple(entries)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.run, name='asset-watcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run(self):
+        last = self.signature()
+        pending = None
+        while not self._stop.wait(self.interval):
+            try:
+                current = self.signature()
+            except OSError:
+                # A file disappeared between listing and stat; look again next time
+                continue
+
+            if current == last:
+                pending = None
+            elif current != pending:
+                # Changed since the last poll: wait until it stops changing
+                pending = current
+            else:
+                last = current
+                pending = None
+                try:
+                    self.on_change()
+                except Exception as e:
+                    print(f"Asset watcher: reload failed: {e}")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Atomic file replacement for Folktale Reader
+
+The catalog JSON, the story store and cached audio files are read by
+other threads and other gunicorn workers while they are rewritten. Each
+is written to a temporary file in the same directory and renamed over
+the target, so readers see either the old file or the complete new one.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+# mkstemp creates files readable by their owner only; the data files are
+# read by the web server user too
+FILE_MODE = 0o644
+
+@contextmanager
+def atomic_write(path, prefix='.tmp-', suffix='', file_mode=FILE_MODE):
+    """Yield a temporary path next to path; on success it replaces path
+
+    The block writes the complete file at the temporary path (the file
+    exists and is empty). When the block raises, the temporary file is
+    removed and path is left untouched.
+    """
+    path = os.fspath(path)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), prefix=prefix, suffix=suffix)
+    os.close(fd)
+    try:
+        yield temp_path
+        os.chmod(temp_path, file_mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Content-addressed on-disk cache for chapter audio
+
+A file's name is the hash of everything that decides its sound (text,
+language, voice, speed), so a chapter is synthesized once and a changed
+chapter gets a new file instead of a stale one. Files are written to a
+temporary name and renamed into place, so readers (other threads, other
+gunicorn workers) only ever see complete files.
+
+The total size is capped: when a write takes the cache over max_bytes the
+least recently used files are removed. Recency is the file mtime, touched
+on hits, so it is shared between workers and survives restarts.
+Temporary files left behind by a crash are removed once they are older
+than temp_max_age.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from atomic_file import atomic_write
+from cache import SingleFlight
+
+TEMP_PREFIX = '.tmp-'
+
+def audio_key(text, lang, voice, speed):
+    """Cache key for one synthesis: SHA-256 of its inputs"""
+    inputs = json.dumps([text, lang, voice, speed], ensure_ascii=False)
+    return hashlib.sha256(inputs.encode('utf-8')).hexdigest()
+
+class AudioCache:
+    """Directory of audio files named by audio_key(), capped at max_bytes"""
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, suffix='.mp3', temp_max_age=3600,
+                 touch_interval=60):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.temp_max_age = temp_max_age
+        # Hits refresh the mtime at most this often (seconds)
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.total_bytes = self._scan()
+
+    def path(self, key):
+        return self.directory / key[:2] / (key + self.suffix)
+
+    def get(self, key):
+        """Path of the cached file for key, or None (counted as a hit or a miss)"""
+        path = self.find(key)
+        if path is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return path
+
+    def find(self, key):
+        """Path of the cached file for key, or None, without counting the lookup"""
+        path = self.path(key)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        now = time.time()
+        if now - stat.st_mtime > self.touch_interval:
+            try:
+                os.utime(path, (now, now))
+            except FileNotFoundError:
+                # Evicted by another worker just now
+                return None
+        return path
+
+    def get_or_create(self, key, write):
+        """Path of the cached file for key, calling write(path) to create it on a miss
+
+        write must write the complete file at the path it is given.
+        Concurrent misses for the same key in this process share one call.
+        """
+        path = self.find(key)
+        if path is not None:
+            self.hits += 1
+            return path
+        self.misses += 1
+        return self._flights.do(lambda: self.find(key) or self._create(key, write), key=key)
+
+    def _create(self, key, write):
+        path = self.path(key)
+        path.parent.mkdir(exist_ok=True)
+        with atomic_write(path, prefix=TEMP_PREFIX + key[:16], suffix=self.suffix) as temp_path:
+            write(temp_path)
+            size = os.path.getsize(temp_path)
+
+        with self._lock:
+            self.total_bytes += size
+            over = self.total_bytes > self.max_bytes
+        if over:
+            self.evict(keep=str(path))
+        return path
+
+    def _entries(self):
+        """(path, stat) of every cached file; stale temporary files are deleted"""
+        entries = []
+        now = time.time()
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                if entry.name.startswith(TEMP_PREFIX):
+                    if now - stat.st_mtime > self.temp_max_age:
+                        self._unlink(entry.path)
+                else:
+                    # Files of any suffix, so a switch of TTS backend
+                    # still evicts the files of the old one
+                    entries.append((entry.path, stat))
+        return entries
+
+    def _scan(self):
+        return sum(stat.st_size for path, stat in self._entries())
+
+    def refresh(self):
+        """Re-read the total size from disk (after other processes wrote to the directory)"""
+        total = self._scan()
+        with self._lock:
+            self.total_bytes = total
+
+    def _unlink(self, path):
+        try:
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def evict(self, keep=None):
+        """Remove least recently used files until the cache is at 90% of max_bytes (never keep)
+
+        Sizes are re-read from disk, since other workers write to the same
+        directory.
+        """
+        with self._lock:
+            entries = sorted(self._entries(), key=lambda entry: entry[1].st_mtime)
+            total = sum(stat.st_size for path, stat in entries)
+            target = self.max_bytes * 0.9
+            for path, stat in entries:
+                if total <= target:
+                    break
+                if path == keep:
+                    continue
+                if self._unlink(path):
+                    self.evictions += 1
+                total -= stat.st_size
+            self.total_bytes = total
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'directory': str(self.directory),
+            'size_bytes': self.total_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Benchmark: SQL statements executed per logged activity, by activity type.
+
+Counts every statement run on the pooled connection while
+log_user_activity() inserts the event and evaluates achievements.
+
+Usage:
+    python benchmarks/bench_achievement_queries.py
+"""
+
+import time
+
+from bench_utils import use_temp_database
+
+EVENTS = [
+    ('chapter_read', {'story_id': 1, 'chapter_num': 1, 'title': 'Chapter 1'}),
+    ('quiz_completed', {'story_id': 1, 'chapter_num': 1, 'score': 2, 'total': 2, 'percentage': 100}),
+    ('theme_changed', {'theme': 'forest'}),
+    ('cursor_changed', {'cursor': 'leaf'}),
+    ('audio_played', {'story_id': 1, 'chapter_num': 1}),
+]
+
+def run_benchmark(repeat=200):
+    use_temp_database()
+    from database import init_database, create_user, authenticate_user, get_db_connection, log_user_activity
+
+    init_database()
+    create_user('bench_user', 'bench123')
+    _, user = authenticate_user('bench_user', 'bench123')
+
+    statements = []
+    conn = get_db_connection()
+    conn.set_trace_callback(statements.append)
+
+    print("Achievement evaluation cost per event")
+    print("=" * 60)
+    print(f"{'activity_type':<20}{'statements/event':>20}{'ms/event':>20}")
+    for activity_type, activity_data in EVENTS:
+        statements.clear()
+        start = time.perf_counter()
+        for _ in range(repeat):
+            log_user_activity(user['id'], activity_type, activity_data)
+        elapsed = time.perf_counter() - start
+        print(f"{activity_type:<20}{len(statements) / repeat:>20.1f}{elapsed / repeat * 1000:>20.3f}")
+
+    conn.set_trace_callback(None)
+
+if __name__ == "__main__":
+    run_benchmark()
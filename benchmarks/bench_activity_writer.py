@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark: a classroom burst of students opening the same chapter at once,
+with synchronous activity logging versus the write-behind writer.
+
+Usage:
+    python benchmarks/bench_activity_writer.py [students] [requests_per_student]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from bench_utils import use_temp_database, make_logged_in_client
+
+def run_single(students, requests_per_student):
+    """Run the burst in this process and print throughput/latency as JSON"""
+    use_temp_database()
+    from app import create_folktale_app
+    import database
+
+    folktale_app = create_folktale_app()
+    folktale_app.load_example_stories()
+    clients = [make_logged_in_client(f'student{i}', 'demo123') for i in range(students)]
+    latencies = []
+    latencies_lock = threading.Lock()
+    start_barrier = threading.Barrier(students)
+
+    def student(client):
+        own = []
+        start_barrier.wait()
+        for _ in range(requests_per_student):
+            started = time.perf_counter()
+            client.get('/api/story/1/chapter/1')
+            own.append(time.perf_counter() - started)
+        with latencies_lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target=student, args=(client,)) for client in clients]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    database.activity_writer.flush()
+
+    latencies.sort()
+    print(json.dumps({
+        'requests_per_sec': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95)] * 1000
+    }))
+
+def run_benchmark(students, requests_per_student):
+    """Run the burst in fresh processes with write-behind off and on"""
+    script = os.path.abspath(__file__)
+    results = {}
+    for label, flag in (('synchronous', '0'), ('write-behind', '1')):
+        env = dict(os.environ, FOLKTALE_ACTIVITY_WRITE_BEHIND=flag)
+        output = subprocess.run(
+            [sys.executable, script, '--single', str(students), str(requests_per_student)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        results[label] = json.loads(output.strip().splitlines()[-1])
+
+    print(f"Classroom burst: {students} students x {requests_per_student} chapter requests")
+    print("=" * 60)
+    print(f"{'mode':<16}{'req/s':>12}{'p50 ms':>12}{'p95 ms':>12}")
+    for label, result in results.items():
+        print(f"{label:<16}{result['requests_per_sec']:>12.1f}{result['p50_ms']:>12.2f}{result['p95_ms']:>12.2f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--single':
+        run_single(int(sys.argv[2]), int(sys.argv[3]))
+    else:
+        run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 30,
+                      int(sys.argv[2]) if len(sys.argv) > 2 else 50)
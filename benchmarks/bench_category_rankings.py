@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: category rankings, comparing the old loop (one aggregate query
+per hard-coded category) with the single ROW_NUMBER() window query.
+
+Usage:
+    python benchmarks/bench_category_rankings.py [users ...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from bench_leaderboard import populate, time_per_call
+from bench_utils import use_temp_database
+
+LEGACY_CATEGORIES = ['reading', 'quiz', 'streak', 'vocabulary', 'special', 'audio', 'exploration']
+LEGACY_CATEGORY_QUERY = '''
+    SELECT
+        u.id,
+        u.username,
+        COALESCE(SUM(a.points), 0) as category_points,
+        COUNT(ua.achievement_id) as category_achievements
+    FROM users u
+    LEFT JOIN user_achievements ua ON u.id = ua.user_id
+    LEFT JOIN achievements a ON ua.achievement_id = a.id AND a.category = ?
+    WHERE u.user_type = 'regular'
+    GROUP BY u.id, u.username
+    HAVING category_points > 0
+    ORDER BY category_points DESC, category_achievements DESC
+    LIMIT 10
+'''
+
+def legacy_category_rankings(conn):
+    return {
+        category: conn.execute(LEGACY_CATEGORY_QUERY, (category,)).fetchall()
+        for category in LEGACY_CATEGORIES
+    }
+
+def run_benchmark(users):
+    db_path = use_temp_database()
+    import database
+
+    database.DATABASE_FILE = Path(db_path)
+    database.init_database()
+    conn = database.get_db_connection()
+    _, unlocks = populate(conn, users)
+    print(f"{users:,} users / {unlocks:,} unlocks")
+
+    # Same top points per category (the old achievement count also included
+    # other categories' achievements, so only points are compared)
+    legacy = legacy_category_rankings(conn)
+    current = database.get_category_rankings()
+    same = all(
+        [row['category_points'] for row in legacy[category]] ==
+        [user['points'] for user in current[category]]
+        for category in LEGACY_CATEGORIES
+    )
+    print(f"Top 10 points per category match: {'OK' if same else 'MISMATCH'}")
+
+    repeat = 2 if users > 50000 else 5
+    print(f"{'7 queries in a loop (before)':<40}{time_per_call(lambda: legacy_category_rankings(conn), repeat):>12.1f} ms")
+    print(f"{'single window query (after)':<40}{time_per_call(database.get_category_rankings, repeat):>12.1f} ms")
+
+    conn.close()
+    database.close_db_connections()
+    print("=" * 60)
+
+if __name__ == "__main__":
+    for users in [int(arg) for arg in sys.argv[1:]] or [10000, 100000]:
+        run_benchmark(users)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: requests/sec for the chapter and quiz endpoints with and without
+the pooled, WAL-mode SQLite connections.
+
+Usage:
+    python benchmarks/bench_db_pool.py [seconds_per_endpoint]
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+from bench_utils import use_temp_database, make_logged_in_client, measure_rate
+
+def run_single(duration):
+    """Measure both endpoints in this process and print the rates as JSON"""
+    use_temp_database()
+    from app import create_folktale_app
+    folktale_app = create_folktale_app()
+
+    client = make_logged_in_client()
+
+    # The bundled example stories always ship quizzes
+    folktale_app.load_example_stories()
+
+    # First chapter that has a quiz, so both endpoints exercise the database
+    story_id, chapter_num, quiz = None, None, None
+    for sid, story in folktale_app.stories.items():
+        for num, chapter in story['chapters'].items():
+            if chapter.get('quiz'):
+                story_id, chapter_num, quiz = sid, num, chapter['quiz']
+                break
+        if quiz:
+            break
+    if not quiz:
+        raise RuntimeError("No chapter with a quiz found in the catalog")
+
+    chapter_url = f'/api/story/{story_id}/chapter/{chapter_num}'
+    quiz_payload = {
+        'story_id': story_id,
+        'chapter_num': chapter_num,
+        'answers': [question['correct'] for question in quiz]
+    }
+
+    results = {
+        'chapter': measure_rate(lambda: client.get(chapter_url), duration),
+        'submit_quiz': measure_rate(lambda: client.post('/api/submit_quiz', json=quiz_payload), duration)
+    }
+    print(json.dumps(results))
+
+def run_benchmark(duration):
+    """Run the measurement in fresh processes with pooling off and on"""
+    script = os.path.abspath(__file__)
+    rates = {}
+    for label, pool_flag in (('before (no pool)', '0'), ('after (pooled)', '1')):
+        env = dict(os.environ, FOLKTALE_DB_POOL=pool_flag)
+        output = subprocess.run(
+            [sys.executable, script, '--single', str(duration)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+        rates[label] = json.loads(output.strip().splitlines()[-1])
+
+    print("Connection pool benchmark (requests/sec, Flask test client)")
+    print("=" * 60)
+    print(f"{'mode':<20}{'/api/story/<id>/chapter/<n>':>30}{'/api/submit_quiz':>20}")
+    for label, result in rates.items():
+        print(f"{label:<20}{result['chapter']:>30.1f}{result['submit_quiz']:>20.1f}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--single':
+        run_single(float(sys.argv[2]))
+    else:
+        run_benchmark(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0)
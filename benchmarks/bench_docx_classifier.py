@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark: paragraphs/sec for DOCX paragraph classification, comparing the
+old chain of detector calls with the single-pass classifier, plus the full
+parse rate (DocumentProcessor.parse_paragraphs).
+
+Paragraphs come from the synthetic manuscript of bench_docx_parser.py and
+are read into memory first, so only classification and parsing are timed.
+
+Usage:
+    python benchmarks/bench_docx_classifier.py [pages]
+"""
+
+import os
+import re
+import sys
+import tempfile
+import time
+
+from bench_docx_parser import write_manuscript
+
+def legacy_classify(paragraph):
+    """The checks the parser used to run for each paragraph"""
+    def contains_quiz_elements(text):
+        text = text.strip()
+        return bool(
+            re.match(r'^\d+\.', text) or
+            re.match(r'^[A-D]\)', text) or
+            '✅' in text or
+            '[resposta:' in text.lower() or
+            ('Q:' in text and '?' in text) or
+            ('A)' in text and 'B)' in text)
+        )
+
+    text = paragraph.text.strip()
+    if not text:
+        return None
+    if paragraph.runs and ((paragraph.runs[0].bold and len(paragraph.text.strip()) < 50)
+                           or paragraph.text.isupper()):
+        return 'story_title'
+    if re.match(r'chapter\s+\d+', text.lower()) or re.match(r'capítulo\s+\d+', text.lower()):
+        re.search(r'(\d+)', text)
+        return 'chapter'
+    vocabulary_keywords = ['vocabulary', 'vocabulário', 'key words', 'palavras-chave', 'glossary']
+    if any(keyword in text.lower() for keyword in vocabulary_keywords):
+        return 'vocabulary_header'
+    if 'quiz' in text.lower() or 'question' in text.lower() or contains_quiz_elements(text):
+        return 'quiz_line' if contains_quiz_elements(text) else 'quiz_header'
+    return 'body'
+
+def rate(func, paragraphs, repeat=5):
+    """Best paragraphs/sec over several runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(paragraphs)
+        best = min(best, time.perf_counter() - start)
+    return len(paragraphs) / best
+
+def run_benchmark(pages):
+    from ingestion import DocumentProcessor
+    from docx_classifier import classify_paragraph
+    from docx_stream import iter_docx_paragraphs
+
+    path = os.path.join(tempfile.mkdtemp(prefix='folktale_bench_'), 'manuscript.docx')
+    write_manuscript(path, pages)
+    paragraphs = list(iter_docx_paragraphs(path))
+
+    def parse(paragraphs):
+        DocumentProcessor().parse_paragraphs(paragraphs)
+
+    legacy = rate(lambda ps: [legacy_classify(p) for p in ps], paragraphs)
+    single = rate(lambda ps: [classify_paragraph(p) for p in ps], paragraphs)
+    full = rate(parse, paragraphs)
+
+    print(f"{len(paragraphs):,} paragraphs from a {pages:,}-page synthetic manuscript")
+    print(f"{'detector chain (old)':<28}{legacy:>12,.0f} paragraphs/s")
+    print(f"{'single-pass classifier':<28}{single:>12,.0f} paragraphs/s  ({single / legacy:.2f}x)")
+    print(f"{'full parse':<28}{full:>12,.0f} paragraphs/s")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark: parse time and peak memory for a synthetic multi-thousand-page
+manuscript, comparing python-docx (whole document tree) with the streaming
+reader in docx_stream.py. Both parsers must produce the same paragraphs
+and the same stories.
+
+Usage:
+    python benchmarks/bench_docx_parser.py [pages]
+"""
+
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+
+import bench_utils  # noqa: F401 (puts the project root on sys.path)
+
+PARAGRAPHS_PER_PAGE = 8
+PAGES_PER_CHAPTER = 10
+CHAPTERS_PER_STORY = 10
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+PACKAGE_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+DOCUMENT_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"><w:body>'
+)
+DOCUMENT_END = '<w:sectPr/></w:body></w:document>'
+
+SENTENCE = ("The Saci ran through the forest at night, laughing as the wind carried "
+            "his red cap over the river where the Boto waited. ")
+
+def run(text, bold=None):
+    props = ''
+    if bold is True:
+        props = '<w:rPr><w:b/></w:rPr>'
+    elif bold is False:
+        props = '<w:rPr><w:b w:val="0"/></w:rPr>'
+    return f'<w:r>{props}<w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+def paragraph(*runs):
+    return f'<w:p>{"".join(runs)}</w:p>'
+
+def page_paragraphs(page):
+    """One page of story text, with the run shapes real manuscripts contain"""
+    yield paragraph(run(SENTENCE * 3), run(SENTENCE * 2, bold=False))
+    yield paragraph(run('Word\tby word'), '<w:r><w:br/><w:t>the story goes on.</w:t></w:r>')
+    # Hyperlink runs are not part of Paragraph.text in python-docx
+    yield paragraph(run(SENTENCE), '<w:hyperlink r:id="rId9">' + run('link text') + '</w:hyperlink>')
+    yield paragraph(run(SENTENCE * 4))
+    # Table paragraphs are not body paragraphs
+    yield ('<w:tbl><w:tr><w:tc>' + paragraph(run('CELL TEXT', bold=True)) + '</w:tc></w:tr></w:tbl>')
+    yield paragraph()
+    yield paragraph(run(f'Page {page} ends here. '), run(SENTENCE * 2))
+    yield paragraph(run(SENTENCE * 3))
+
+def chapter_extras(chapter):
+    yield paragraph(run('Vocabulary'))
+    yield paragraph(run(f'forest{chapter} - a large area covered with trees'))
+    yield paragraph(run('Quiz'))
+    yield paragraph(run(f'1. Where did the Saci live in chapter {chapter}?'))
+    yield paragraph(run('a) In the forest ✓'))
+    yield paragraph(run('b) In the city'))
+
+def write_manuscript(path, pages):
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+        archive.writestr('_rels/.rels', PACKAGE_RELS)
+        with archive.open('word/document.xml', 'w', force_zip64=True) as document:
+            def write(xml):
+                document.write(xml.encode('utf-8'))
+
+            write(DOCUMENT_START)
+            chapter = 0
+            for page in range(pages):
+                if page % (PAGES_PER_CHAPTER * CHAPTERS_PER_STORY) == 0:
+                    story = page // (PAGES_PER_CHAPTER * CHAPTERS_PER_STORY) + 1
+                    write(paragraph(run(f'Story {story}: The Legend', bold=True)))
+                    chapter = 0
+                if page % PAGES_PER_CHAPTER == 0:
+                    if chapter:
+                        for xml in chapter_extras(chapter):
+                            write(xml)
+                    chapter += 1
+                    write(paragraph(run(f'Chapter {chapter}: Night {page}')))
+                for xml in page_paragraphs(page):
+                    write(xml)
+            write(DOCUMENT_END)
+
+def digest(value):
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+def run_mode(mode, path):
+    """Parse path with one parser and print its measurements as JSON"""
+    from ingestion import DocumentProcessor
+
+    if mode == 'python-docx':
+        from docx import Document
+        paragraphs = lambda: Document(path).paragraphs
+    else:
+        from docx_stream import iter_docx_paragraphs
+        paragraphs = lambda: iter_docx_paragraphs(path)
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    stories = DocumentProcessor().parse_paragraphs(paragraphs())
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    text = [(p.text, p.runs[0].bold if p.runs else None) for p in paragraphs()]
+    print(json.dumps({
+        'seconds': elapsed,
+        'peak_mb': (peak - baseline) / 1024,
+        'paragraphs': len(text),
+        'paragraphs_digest': digest(text),
+        'stories': len(stories),
+        'stories_digest': digest({str(k): v for k, v in stories.items()})
+    }))
+
+def run_benchmark(pages):
+    path = os.path.join(tempfile.mkdtemp(prefix='folktale_bench_'), 'manuscript.docx')
+    write_manuscript(path, pages)
+    print(f"Synthetic manuscript: {pages:,} pages, {os.path.getsize(path) / (1024 * 1024):.1f} MB on disk")
+
+    results = {}
+    for mode in ('python-docx', 'stream'):
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, path],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+        r = results[mode]
+        print(f"{mode:<12} {r['seconds']:>7.2f} s  peak +{r['peak_mb']:>7.1f} MB  "
+              f"{r['paragraphs']:,} paragraphs  {r['stories']} stories")
+
+    old, new = results['python-docx'], results['stream']
+    same = (old['paragraphs_digest'] == new['paragraphs_digest']
+            and old['stories_digest'] == new['stories_digest'])
+    print(f"Identical output: {'yes' if same else 'NO'}  "
+          f"speedup {old['seconds'] / new['seconds']:.1f}x, "
+          f"memory {old['peak_mb'] / max(new['peak_mb'], 0.1):.0f}x lower")
+    if not same:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == '--mode':
+        run_mode(sys.argv[2], sys.argv[3])
+    else:
+        run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
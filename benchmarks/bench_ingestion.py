@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Benchmark: parsing a corpus of DOCX manuscripts with 1..N worker processes
+(ingestion.ingest_documents), and a check that the merged catalog gets
+the same story ids whatever the worker count.
+
+Run it on a machine with several cores; workers beyond the core count
+cannot add throughput.
+
+Usage:
+    python benchmarks/bench_ingestion.py [documents] [pages_per_document] [workers ...]
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from bench_docx_parser import write_manuscript
+
+def run_benchmark(documents, pages, worker_counts):
+    from ingestion import ingest_catalog, ingest_documents, list_docx_files
+
+    corpus_dir = tempfile.mkdtemp(prefix='folktale_bench_')
+    for index in range(documents):
+        write_manuscript(os.path.join(corpus_dir, f'folktales_{index:03d}.docx'), pages)
+    paths = list_docx_files(corpus_dir)
+    print(f"{documents} documents x {pages} pages, {multiprocessing.cpu_count()} cores")
+
+    print(f"{'workers':>7}{'seconds':>10}{'docs/s':>9}{'speedup':>9}")
+    baseline = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        ingest_documents(paths, workers=workers)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>7}{elapsed:>10.2f}{documents / elapsed:>9.1f}{baseline / elapsed:>8.2f}x")
+
+    ids = [list(ingest_catalog(paths, {}, None, workers=workers)[0]) for workers in (1, max(worker_counts))]
+    print(f"Same story ids with 1 and {max(worker_counts)} workers: {'yes' if ids[0] == ids[1] else 'NO'}")
+    if ids[0] != ids[1]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:]]
+    documents = args[0] if len(args) > 0 else 50
+    pages = args[1] if len(args) > 1 else 100
+    cores = multiprocessing.cpu_count()
+    default_counts = sorted({1, cores} | {n for n in (2, 4, 8, 16) if n < cores})
+    run_benchmark(documents, pages, args[2:] or default_counts)
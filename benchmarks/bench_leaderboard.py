@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Benchmark: global ranking and single-user rank lookup, comparing the old
+full GROUP BY aggregation over user_achievements with the materialized
+leaderboard (sorted in-memory view + bisect).
+
+Usage:
+    python benchmarks/bench_leaderboard.py [users ...]
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+from bench_utils import use_temp_database
+
+# The queries get_global_ranking / get_user_rank used to run on every request
+LEGACY_AGGREGATE = '''
+    SELECT
+        u.id,
+        u.username,
+        COALESCE(SUM(a.points), 0) as total_points,
+        COUNT(ua.achievement_id) as achievements_count,
+        MAX(ua.unlocked_at) as last_achievement
+    FROM users u
+    LEFT JOIN user_achievements ua ON u.id = ua.user_id
+    LEFT JOIN achievements a ON ua.achievement_id = a.id
+    WHERE u.user_type = 'regular'
+    GROUP BY u.id, u.username
+'''
+LEGACY_TOP = LEGACY_AGGREGATE + '''
+    ORDER BY total_points DESC, achievements_count DESC, last_achievement DESC
+    LIMIT ?
+'''
+LEGACY_BETTER_USERS = '''
+    SELECT COUNT(*) as count
+    FROM (''' + LEGACY_AGGREGATE + ''') ranked
+    WHERE
+        ranked.total_points > ? OR
+        (ranked.total_points = ? AND ranked.achievements_count > ?) OR
+        (ranked.total_points = ? AND ranked.achievements_count = ? AND ranked.last_achievement > ?)
+'''
+
+def populate(conn, users):
+    """Create regular users with a random subset of achievements each"""
+    random.seed(42)
+    achievement_ids = [row['id'] for row in conn.execute('SELECT id FROM achievements')]
+    conn.executemany(
+        'INSERT INTO users (username, password_hash, user_type) VALUES (?, ?, ?)',
+        ((f'bench_{i}', 'x', 'regular') for i in range(users))
+    )
+    user_ids = [row['id'] for row in conn.execute("SELECT id FROM users WHERE user_type = 'regular'")]
+    unlocks = []
+    for user_id in user_ids:
+        for achievement_id in random.sample(achievement_ids, random.randrange(len(achievement_ids) // 2)):
+            unlocked_at = f'2026-{random.randrange(1, 13):02d}-{random.randrange(1, 29):02d} 12:00:00'
+            unlocks.append((user_id, achievement_id, 100, unlocked_at))
+    conn.executemany(
+        'INSERT INTO user_achievements (user_id, achievement_id, progress, unlocked_at) VALUES (?, ?, ?, ?)',
+        unlocks
+    )
+    conn.commit()
+    return user_ids, len(unlocks)
+
+def time_per_call(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+def legacy_rank(conn, user_id):
+    stats = conn.execute(LEGACY_AGGREGATE.replace("WHERE u.user_type = 'regular'",
+                                                  "WHERE u.id = ? AND u.user_type = 'regular'"),
+                         (user_id,)).fetchone()
+    better = conn.execute(LEGACY_BETTER_USERS, (
+        stats['total_points'],
+        stats['total_points'], stats['achievements_count'],
+        stats['total_points'], stats['achievements_count'], stats['last_achievement']
+    )).fetchone()['count']
+    return better + 1
+
+def run_benchmark(users):
+    db_path = use_temp_database()
+    import database
+
+    # Each size gets a fresh database, also when several sizes run in one process
+    database.DATABASE_FILE = Path(db_path)
+    database.init_database()
+    conn = database.get_db_connection()
+    user_ids, unlocks = populate(conn, users)
+
+    started = time.perf_counter()
+    database.rebuild_leaderboard()
+    database.get_global_ranking(1)
+    print(f"{users:,} users / {unlocks:,} unlocks - leaderboard rebuilt and loaded in "
+          f"{time.perf_counter() - started:.2f}s")
+
+    sample = random.sample(user_ids, 20)
+    mismatches = [user_id for user_id in sample
+                  if legacy_rank(conn, user_id) != database.get_user_rank(user_id)['rank']]
+    print(f"Rank check on {len(sample)} users: {'OK' if not mismatches else f'MISMATCH {mismatches}'}")
+
+    legacy_repeat = 3 if users > 50000 else 10
+    print(f"{'top 50 - GROUP BY (before)':<40}{time_per_call(lambda: conn.execute(LEGACY_TOP, (50,)).fetchall(), legacy_repeat):>12.3f} ms")
+    print(f"{'top 50 - leaderboard (after)':<40}{time_per_call(lambda: database.get_global_ranking(50), 1000):>12.3f} ms")
+    print(f"{'user rank - GROUP BY x2 (before)':<40}{time_per_call(lambda: legacy_rank(conn, random.choice(user_ids)), legacy_repeat):>12.3f} ms")
+    print(f"{'user rank - rank index (after)':<40}{time_per_call(lambda: database.get_user_rank(random.choice(user_ids)), 1000):>12.3f} ms")
+
+    # An unlock: one UPDATE in the unlock transaction + moving one key in the rank index on the next read
+    user_id = user_ids[len(user_ids) // 2]
+    def unlock_and_read():
+        database.record_leaderboard_unlocks(conn, user_id, 10, 1)
+        conn.commit()
+        database.get_user_rank(user_id)
+    print(f"{'unlock + rank read (after)':<40}{time_per_call(unlock_and_read, 200):>12.3f} ms")
+
+    conn.close()
+    database.close_db_connections()
+    database.leaderboard.reset()
+    print("=" * 60)
+
+if __name__ == "__main__":
+    for users in [int(arg) for arg in sys.argv[1:]] or [10000, 100000]:
+        run_benchmark(users)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throughput of the story-list and chapter endpoints under the
+preloaded gunicorn setup (wsgi.py + gunicorn.conf.py) with 1..N workers,
+plus per-worker memory split into shared and private pages.
+
+Run it on a machine with several cores; workers beyond the core count
+cannot add throughput.
+
+Usage:
+    python benchmarks/bench_prefork.py [workers ...] [--duration SECONDS]
+"""
+
+import http.client
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+from bench_utils import BASE_DIR, use_temp_database
+
+HOST = '127.0.0.1'
+PORT = 8791
+USERNAME = 'bench_user'
+PASSWORD = 'bench123'
+ENDPOINTS = ('/api/stories', '/api/story/1/chapter/1')
+
+def request(method, path, body=None, cookie=None):
+    conn = http.client.HTTPConnection(HOST, PORT, timeout=10)
+    headers = {'Content-Type': 'application/json'}
+    if cookie:
+        headers['Cookie'] = cookie
+    conn.request(method, path, body=body, headers=headers)
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response
+
+def login():
+    response = request('POST', '/api/login', f'{{"username": "{USERNAME}", "password": "{PASSWORD}"}}')
+    if response.status != 200:
+        raise RuntimeError(f"Login failed with HTTP {response.status}")
+    return response.getheader('Set-Cookie').split(';', 1)[0]
+
+def client_loop(args):
+    """One load-generating process: request path until the deadline"""
+    path, cookie, deadline = args
+    count = 0
+    while time.time() < deadline:
+        if request('GET', path, cookie=cookie).status == 200:
+            count += 1
+    return count
+
+def worker_memory_mb(master_pid):
+    """Average shared/private/PSS memory of the master's worker processes"""
+    with open(f'/proc/{master_pid}/task/{master_pid}/children') as children:
+        pids = [int(pid) for pid in children.read().split()]
+    totals = {'Shared': 0, 'Private': 0, 'Pss': 0}
+    for pid in pids:
+        with open(f'/proc/{pid}/smaps_rollup') as rollup:
+            for line in rollup:
+                name, value = line.split(':', 1)
+                kb = int(value.split()[0]) if value.strip().endswith('kB') else 0
+                if name in ('Shared_Clean', 'Shared_Dirty'):
+                    totals['Shared'] += kb
+                elif name in ('Private_Clean', 'Private_Dirty'):
+                    totals['Private'] += kb
+                elif name == 'Pss':
+                    totals['Pss'] += kb
+    return {key: value / len(pids) / 1024 for key, value in totals.items()}
+
+def wait_until_ready(server, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("gunicorn exited during startup")
+        try:
+            request('GET', '/api/demo/stories')
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("gunicorn did not start")
+
+def run_benchmark(worker_counts, duration):
+    use_temp_database()
+    import database
+
+    database.init_database()
+    database.create_user(USERNAME, PASSWORD)
+    database.close_db_connections()
+
+    print(f"{'workers':>7} {'endpoint':<26}{'req/s':>10}{'shared MB':>11}{'private MB':>12}{'PSS MB':>9}")
+    baseline = {}
+    for workers in worker_counts:
+        env = dict(os.environ, FOLKTALE_WORKERS=str(workers), FOLKTALE_BIND=f'{HOST}:{PORT}')
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:application'],
+            cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_until_ready(server)
+            cookie = login()
+            for path in ENDPOINTS:
+                clients = max(2, workers * 2)
+                deadline = time.time() + duration
+                with multiprocessing.Pool(clients) as pool:
+                    served = sum(pool.map(client_loop, [(path, cookie, deadline)] * clients))
+                rate = served / duration
+                memory = worker_memory_mb(server.pid)
+                speedup = f" ({rate / baseline[path]:.2f}x)" if path in baseline else ''
+                baseline.setdefault(path, rate)
+                print(f"{workers:>7} {path:<26}{rate:>10.0f}{memory['Shared']:>11.1f}"
+                      f"{memory['Private']:>12.1f}{memory['Pss']:>9.1f}{speedup}")
+        finally:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    duration = 5.0
+    if '--duration' in args:
+        index = args.index('--duration')
+        duration = float(args[index + 1])
+        del args[index:index + 2]
+    cores = multiprocessing.cpu_count()
+    default_counts = sorted({1, cores} | {n for n in (2, 4, 8, 16) if n < cores})
+    run_benchmark([int(arg) for arg in args] or default_counts, duration)
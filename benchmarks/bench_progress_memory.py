@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Benchmark: resident memory while 100k distinct anonymous sessions ask for
+their progress, comparing the old unbounded dict with the bounded LRU
+progress cache.
+
+Usage:
+    python benchmarks/bench_progress_memory.py [sessions]
+"""
+
+import os
+import subprocess
+import sys
+import uuid
+
+from bench_utils import use_temp_database
+
+def rss_mb():
+    """Current resident set size of this process (Linux)"""
+    with open('/proc/self/statm') as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+class UnboundedStore(dict):
+    """The old FolktaleApp.user_progress: a plain dict that never forgets"""
+
+    def set(self, key, value):
+        self[key] = value
+
+def run_mode(mode, sessions):
+    use_temp_database()
+    from app import create_folktale_app
+    folktale_app = create_folktale_app()
+
+    if mode == 'dict':
+        folktale_app.user_progress = UnboundedStore()
+
+    baseline = rss_mb()
+    checkpoints = []
+    for i in range(1, sessions + 1):
+        # What index() + /api/progress do for a visitor with a fresh cookie
+        folktale_app.get_user_progress(str(uuid.uuid4()))
+        if i % (sessions // 5) == 0:
+            checkpoints.append(f"{i // 1000}k: +{rss_mb() - baseline:.1f} MB")
+    print(f"{mode:<6} entries={len(folktale_app.user_progress):>7,}  " + "  ".join(checkpoints))
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == '--mode':
+        run_mode(sys.argv[2], int(sys.argv[3]))
+    else:
+        sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+        print(f"RSS growth over {sessions:,} distinct sessions (each mode in a fresh process)")
+        for mode in ('dict', 'lru'):
+            output = subprocess.run(
+                [sys.executable, __file__, '--mode', mode, str(sessions)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            print(output.strip().splitlines()[-1])
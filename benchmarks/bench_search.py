@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark: search latency as the catalog grows, comparing a linear scan of
+every chapter string (what a search over FolktaleApp.stories would cost)
+with the FTS5 index in search.py, plus the time to build the index.
+
+Chapter text is drawn from a fixed pseudo-random lexicon, so a query
+matches a realistic share of the corpus instead of every chapter.
+
+Usage:
+    python benchmarks/bench_search.py [chapters ...]
+"""
+
+import random
+import statistics
+import sys
+import time
+
+from bench_utils import use_temp_database
+
+SYLLABLES = ['ca', 'bo', 'ra', 'ti', 'lu', 'na', 'pe', 'qui', 'sa', 'ço', 'mã', 'ji', 'ru', 'fe', 'do']
+REAL_WORDS = ['saci', 'curupira', 'boto', 'iara', 'floresta', 'river', 'forest', 'capítulo', 'legend', 'magic']
+CHAPTERS_PER_STORY = 20
+QUERIES = ['curupira', 'flor', 'magic riv', 'capitulo', 'caboti']
+
+def make_catalog(chapters, seed=42):
+    rng = random.Random(seed)
+    lexicon = [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(5000)]
+    weights = [1 / (rank + 1) for rank in range(len(lexicon))]
+
+    def words(count):
+        text = rng.choices(lexicon, weights=weights, k=count)
+        for _ in range(count // 100):
+            text[rng.randrange(count)] = rng.choice(REAL_WORDS)
+        return ' '.join(text)
+
+    stories = {}
+    for index in range(chapters):
+        story_id = index // CHAPTERS_PER_STORY + 1
+        story = stories.setdefault(story_id, {'id': story_id, 'title': f'Story {story_id}: {words(3)}',
+                                              'total_chapters': 0, 'chapters': {}})
+        number = len(story['chapters']) + 1
+        story['chapters'][number] = {
+            'title': f'Chapter {number}: {words(3)}',
+            'content': words(400),
+            'vocabulary': [{'word': words(1), 'translation': words(1), 'context': ''} for _ in range(6)],
+            'quiz': [{'question': words(8) + '?', 'options': [words(2) for _ in range(4)], 'correct': 0}
+                     for _ in range(3)]
+        }
+        story['total_chapters'] = number
+    return stories
+
+def linear_search(stories, text, limit=20):
+    """Case-insensitive substring match of every word over every string"""
+    terms = text.casefold().split()
+    results = []
+    for story_id, story in stories.items():
+        for number, chapter in story['chapters'].items():
+            strings = [chapter['title'], chapter['content']]
+            strings += [item['word'] + ' ' + item['translation'] for item in chapter['vocabulary']]
+            strings += [question['question'] for question in chapter['quiz']]
+            for string in strings:
+                folded = string.casefold()
+                if all(term in folded for term in terms):
+                    results.append((story_id, number))
+    return results[:limit]
+
+def latency_ms(func, repeat=5):
+    """Median milliseconds per query over the query set"""
+    samples = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            start = time.perf_counter()
+            func(query)
+            samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def run_benchmark(sizes):
+    use_temp_database()
+    from database import init_database, get_db_connection
+    from search import index_catalog, search_catalog
+
+    init_database()
+    print(f"{'chapters':>9}{'index build':>13}{'linear scan':>13}{'FTS5':>10}")
+    for chapters in sizes:
+        stories = make_catalog(chapters)
+        conn = get_db_connection()
+        conn.execute('DELETE FROM story_search')
+        conn.execute('DELETE FROM story_search_state')
+        conn.commit()
+        conn.close()
+
+        start = time.perf_counter()
+        index_catalog(stories)
+        build = time.perf_counter() - start
+
+        scan = latency_ms(lambda query: linear_search(stories, query), repeat=1)
+        fts = latency_ms(lambda query: search_catalog(query))
+        print(f"{chapters:>9,}{build:>12.2f}s{scan:>10.1f} ms{fts:>7.2f} ms")
+
+if __name__ == "__main__":
+    run_benchmark([int(arg) for arg in sys.argv[1:]] or [500, 2000, 8000])
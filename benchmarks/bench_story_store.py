@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark: startup time and resident memory for a 2,000-chapter catalog,
+comparing the whole-file JSON load (FolktaleApp.load_from_json) with the
+memory-mapped story store (story_store.StoryStore), plus chapter read
+times from the store with a cold and a warm chapter LRU.
+
+Each mode runs in a fresh process; both must read back the same stories.
+
+Usage:
+    python benchmarks/bench_story_store.py [stories] [chapters_per_story]
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import bench_utils  # noqa: F401 (puts the project root on sys.path)
+
+PARAGRAPH = ("The Boto left the river on the night of the festival, dressed in white, "
+             "and danced with everyone in the village until the sun began to rise. ")
+
+def make_catalog(stories, chapters):
+    """{story id: story} shaped like the converted DOCX catalog"""
+    catalog = {}
+    for story_id in range(1, stories + 1):
+        catalog[story_id] = {
+            'id': story_id,
+            'title': f'STORY {story_id}: The Legend of the Boto',
+            'total_chapters': chapters,
+            'chapters': {
+                number: {
+                    'title': f'Chapter {number}: The Festival {story_id}-{number}',
+                    'content': '\n\n'.join(PARAGRAPH * 4 for _ in range(6)),
+                    'quiz': [
+                        {'question': f'Question {q} about chapter {number}?',
+                         'options': ['In the river', 'In the forest', 'In the city', 'In the sky'],
+                         'correct': q % 4}
+                        for q in range(5)
+                    ],
+                    'vocabulary': [
+                        {'word': f'word{w}', 'translation': f'palavra{w}', 'context': PARAGRAPH}
+                        for w in range(8)
+                    ]
+                }
+                for number in range(1, chapters + 1)
+            }
+        }
+    return catalog
+
+def rss_mb():
+    """Current resident set size of this process (Linux)"""
+    with open('/proc/self/statm') as statm:
+        resident_pages = int(statm.read().split()[1])
+    return resident_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+def load_json(path):
+    """What FolktaleApp.load_from_json does"""
+    from catalog import StoryCatalog
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    stories = {int(k): v for k, v in data['stories'].items()}
+    for story in stories.values():
+        story['chapters'] = {int(k): v for k, v in story['chapters'].items()}
+    return StoryCatalog(stories)
+
+def load_store(path):
+    from catalog import StoryCatalog
+    from story_store import StoryStore
+
+    return StoryCatalog(StoryStore(path).stories)
+
+def run_mode(mode, path):
+    import catalog  # noqa: F401 (imports are not part of startup)
+    import story_store  # noqa: F401
+    from catalog import thaw
+
+    baseline = rss_mb()
+    start = time.perf_counter()
+    stories = load_json(path) if mode == 'json' else load_store(path)
+    startup = time.perf_counter() - start
+    loaded = rss_mb()
+
+    # A few requests: each reads one chapter, then the same chapters again
+    keys = [(story_id, number) for story_id in list(stories)[:10] for number in (1, 2)]
+    start = time.perf_counter()
+    for story_id, number in keys:
+        stories[story_id]['chapters'][number]['content']
+    cold = (time.perf_counter() - start) / len(keys)
+    start = time.perf_counter()
+    for story_id, number in keys:
+        stories[story_id]['chapters'][number]['content']
+    warm = (time.perf_counter() - start) / len(keys)
+    after_reads = rss_mb()
+
+    chapters = sum(len(story['chapters']) for story in stories.values())
+    digest = hashlib.sha1(json.dumps(thaw(stories), sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    print(json.dumps({'startup': startup, 'rss_loaded': loaded - baseline, 'rss_reads': after_reads - baseline,
+                      'cold_us': cold * 1e6, 'warm_us': warm * 1e6, 'chapters': chapters, 'digest': digest}))
+
+def run_benchmark(stories, chapters):
+    from catalog import StoryCatalog
+    from story_store import write_story_store
+
+    temp_dir = tempfile.mkdtemp(prefix='folktale_bench_')
+    json_path = os.path.join(temp_dir, 'stories_data.json')
+    store_path = os.path.join(temp_dir, 'stories_data.store')
+    catalog = make_catalog(stories, chapters)
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'stories': catalog, 'version': '2.0'}, f, ensure_ascii=False, indent=2)
+    write_story_store(store_path, StoryCatalog(catalog))
+    print(f"{stories * chapters:,} chapters: JSON {os.path.getsize(json_path) / (1024 * 1024):.1f} MB, "
+          f"store {os.path.getsize(store_path) / (1024 * 1024):.1f} MB")
+
+    results = {}
+    print(f"{'':<7}{'startup':>10}{'RSS loaded':>12}{'RSS +20 reads':>15}{'chapter cold':>14}{'warm':>9}")
+    for mode, path in (('json', json_path), ('store', store_path)):
+        output = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, path],
+            capture_output=True, text=True, check=True
+        ).stdout
+        r = results[mode] = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<7}{r['startup'] * 1000:>8.1f}ms{r['rss_loaded']:>9.1f} MB{r['rss_reads']:>12.1f} MB"
+              f"{r['cold_us']:>11.1f} us{r['warm_us']:>6.1f} us")
+
+    old, new = results['json'], results['store']
+    same = old['digest'] == new['digest'] and old['chapters'] == new['chapters']
+    print(f"Identical stories: {'yes' if same else 'NO'}  "
+          f"startup {old['startup'] / new['startup']:.0f}x faster")
+    if not same:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    if len(sys.argv) > 2 and sys.argv[1] == '--mode':
+        run_mode(sys.argv[2], sys.argv[3])
+    else:
+        args = [int(arg) for arg in sys.argv[1:]]
+        run_benchmark(args[0] if args else 100, args[1] if len(args) > 1 else 20)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark: daily streak evaluation on a 1M-row activity_log, comparing the
+old per-event GROUP BY DATE scan with the stored incremental streak.
+
+Usage:
+    python benchmarks/bench_streaks.py [total_rows] [users]
+"""
+
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from bench_utils import use_temp_database
+
+# The query the daily_streak rule used to run once per streak achievement
+LEGACY_STREAK_QUERY = '''
+    SELECT DATE(timestamp) as activity_date
+    FROM activity_log
+    WHERE user_id = ?
+    GROUP BY DATE(timestamp)
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+STREAK_THRESHOLDS = (3, 7, 30)
+
+def populate(conn, total_rows, users):
+    """Insert total_rows activity rows spread over users and the last 400 days"""
+    random.seed(42)
+    start = datetime.utcnow() - timedelta(days=400)
+    batch = []
+    for i in range(total_rows):
+        timestamp = start + timedelta(seconds=random.randrange(400 * 86400))
+        batch.append((i % users + 1000, 'chapter_read', None, timestamp.strftime('%Y-%m-%d %H:%M:%S')))
+        if len(batch) == 50000:
+            conn.executemany('INSERT INTO activity_log (user_id, activity_type, activity_data, timestamp) VALUES (?, ?, ?, ?)', batch)
+            batch = []
+    if batch:
+        conn.executemany('INSERT INTO activity_log (user_id, activity_type, activity_data, timestamp) VALUES (?, ?, ?, ?)', batch)
+    conn.commit()
+
+def time_per_call(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1000
+
+def run_benchmark(total_rows, users):
+    use_temp_database()
+    import database
+
+    database.init_database()
+    conn = database.get_db_connection()
+
+    started = time.perf_counter()
+    populate(conn, total_rows, users)
+    print(f"Inserted {total_rows:,} activity rows for {users} users in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    database.rebuild_user_streaks()
+    print(f"Rebuilt streaks from history in {time.perf_counter() - started:.2f}s")
+
+    user_id = 1000
+    rows_for_user = total_rows // users
+
+    def legacy_evaluation():
+        for threshold in STREAK_THRESHOLDS:
+            conn.execute(LEGACY_STREAK_QUERY, (user_id, threshold + 5)).fetchall()
+
+    def incremental_evaluation():
+        database.record_activity_day(conn, user_id, datetime.utcnow().strftime('%Y-%m-%d'))
+        conn.commit()
+        database.count_daily_streak(conn, user_id, max(STREAK_THRESHOLDS))
+
+    print("=" * 60)
+    print(f"Streak evaluation per event (user with ~{rows_for_user:,} rows)")
+    print(f"{'GROUP BY DATE scan x3 (before)':<40}{time_per_call(legacy_evaluation, 20):>12.3f} ms")
+    print(f"{'stored streak (after)':<40}{time_per_call(incremental_evaluation, 2000):>12.3f} ms")
+
+if __name__ == "__main__":
+    run_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+                  int(sys.argv[2]) if len(sys.argv) > 2 else 100)
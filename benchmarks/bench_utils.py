@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the benchmark scripts
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BASE_DIR)
+
+def use_temp_database():
+    """Point database.py at a throwaway SQLite file (call before importing app/database)"""
+    temp_dir = tempfile.mkdtemp(prefix='folktale_bench_')
+    db_path = os.path.join(temp_dir, 'folktale_bench.db')
+    os.environ['FOLKTALE_DB_PATH'] = db_path
+    return db_path
+
+def make_logged_in_client(username='bench_user', password='bench123'):
+    """Create a regular user and return a Flask test client logged in as that user"""
+    from app import app, create_folktale_app
+    from database import create_user
+
+    create_folktale_app()
+    create_user(username, password)
+    client = app.test_client()
+    response = client.post('/api/login', json={'username': username, 'password': password})
+    if response.status_code != 200:
+        raise RuntimeError(f"Login failed: {response.get_json()}")
+    return client
+
+def measure_rate(func, duration=3.0):
+    """Call func repeatedly for `duration` seconds and return calls per second"""
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + duration
+    while time.perf_counter() < deadline:
+        func()
+        calls += 1
+    return calls / (time.perf_counter() - start)
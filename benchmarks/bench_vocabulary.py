@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark: automatic vocabulary extraction on long chapters, comparing the
+old extract_automatic_vocabulary (dict literal rebuilt per call, regex
+tokenization, one text.split('.') per hit) with the vocabulary engine
+(lexicon loaded once, one Aho-Corasick pass with a sentence-offset index).
+
+Chapters are built from the sentences of the built-in example stories,
+with lexicon words thinned out so the scan has to cover the chapter.
+
+Usage:
+    python benchmarks/bench_vocabulary.py [words_per_chapter ...]
+"""
+
+import json
+import re
+import sys
+import time
+
+import bench_utils  # noqa: F401 (puts the project root on sys.path)
+
+def legacy_extract(text, lexicon_entries, common_words):
+    """The old extract_automatic_vocabulary and get_word_context"""
+    def get_word_context(text, word):
+        sentences = text.split('.')
+        for sentence in sentences:
+            if word.lower() in sentence.lower():
+                return sentence.strip() + '.'
+        return f"Used in the story about {word}."
+
+    # Rebuilt on every call, like the literals were
+    vocabulary_dict = dict(lexicon_entries)
+    common_words = set(common_words)
+    words = re.findall(r'\b[A-Za-z]{3,}\b', text.lower())
+    vocabulary = []
+    seen = set()
+    for word in words:
+        if word in vocabulary_dict and word not in common_words and word not in seen and len(word) > 2:
+            vocabulary.append({
+                'word': word.capitalize(),
+                'translation': vocabulary_dict[word],
+                'context': get_word_context(text, word)
+            })
+            seen.add(word)
+            if len(vocabulary) >= 12:
+                break
+    return vocabulary
+
+FILLER = ("Long ago the old people of the village told this tale by the fire while the "
+          "children listened and the night grew cold around them. ")
+
+def make_chapter(words, lexicon_terms):
+    """About `words` words; one lexicon word roughly every 400 words"""
+    sentences = []
+    count = 0
+    term = 0
+    while count < words:
+        sentences.append(FILLER * 2)
+        count += 52
+        if count // 400 > term:
+            sentences.append(f"Then the {lexicon_terms[term % len(lexicon_terms)]} was there. ")
+            term += 1
+    return ''.join(sentences)
+
+def best_ms(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def run_benchmark(sizes):
+    from vocabulary import LEXICON_FILE, Lexicon
+
+    with open(LEXICON_FILE, encoding='utf-8') as f:
+        data = json.load(f)
+    entries = {term: translation for term, translation in data['entries'].items() if ' ' not in term}
+    common_words = data['common_words']
+    lexicon = Lexicon(data['entries'], common_words)
+    single_words = [term for term in entries if term not in common_words]
+
+    print(f"Lexicon: {len(lexicon)} terms")
+    print(f"{'words':>8}{'old':>11}{'engine':>11}{'speedup':>9}  same words")
+    for words in sizes:
+        text = make_chapter(words, single_words)
+        old = best_ms(lambda: legacy_extract(text, entries, common_words))
+        new = best_ms(lambda: lexicon.extract(text))
+        same = ([item['word'].lower() for item in legacy_extract(text, entries, common_words)]
+                == [item['word'].lower() for item in lexicon.extract(text)])
+        print(f"{words:>8,}{old:>8.2f} ms{new:>8.2f} ms{old / new:>8.1f}x  {'yes' if same else 'NO'}")
+
+if __name__ == "__main__":
+    run_benchmark([int(arg) for arg in sys.argv[1:]] or [2000, 10000, 50000])
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+In-process caches for Folktale Reader
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+class LRUCache:
+    """Size-bounded LRU cache with optional expiry and hit/miss counters
+
+    Keys are tuples whose first item names the kind of entry (for example
+    ('ranking_global', 50) or ('achievements', user_id)), so related entries
+    can be dropped together with invalidate_kind().
+
+    generation is bumped by every invalidation, so get_or_set() can tell
+    that its value was computed before one and must not be stored.
+    """
+
+    def __init__(self, capacity=1024, ttl=None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.generation = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value, generation=None):
+        """Store value; with generation, only if no invalidation ran since it was read"""
+        if self.capacity <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key, compute):
+        """Return the cached value, computing and storing it on a miss
+
+        compute() runs outside the lock. If an invalidation runs meanwhile,
+        the value may predate the change it was about, so it is returned
+        but not stored.
+        """
+        value = self.get(key)
+        if value is None:
+            generation = self.generation
+            value = compute()
+            self.set(key, value, generation)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self.generation += 1
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_kind(self, kind):
+        """Drop every entry whose key starts with kind"""
+        with self._lock:
+            self.generation += 1
+            stale = [key for key in self._entries if key[0] == kind]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self.invalidations += len(self._entries)
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'capacity': self.capacity,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+class SingleFlight:
+    """Run a function at most once at a time per key; concurrent callers share the result
+
+    While a call is in flight, further callers with the same key wait for
+    it and get its result (or its exception) instead of starting their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+
+    def do(self, func, key=None):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+
+        if not leader:
+            return flight.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    def in_flight(self, key=None):
+        return key in self._flights
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Immutable story catalog for Folktale Reader
+
+Stories are loaded once and frozen: dicts become read-only mappings and
+lists become tuples. Under a pre-fork server (gunicorn --preload) the
+catalog is built in the master process, so every worker reads the same
+memory pages instead of holding its own copy, and no request can change
+the shared data by accident.
+
+A reload never touches the published catalog: it builds a new
+CatalogSnapshot off to the side and swaps it in with one assignment, so a
+request that took a snapshot keeps a consistent view until it finishes.
+"""
+
+import sys
+import time
+from collections.abc import Mapping
+from types import MappingProxyType
+
+from flask.json.provider import DefaultJSONProvider
+
+def freeze(value):
+    """Deep-convert dicts to read-only mappings and lists to tuples
+
+    Mappings frozen earlier (and FrozenMapping views) are reused as they
+    are, so unchanged stories stay the same objects from one snapshot to
+    the next.
+    """
+    if isinstance(value, (MappingProxyType, FrozenMapping)):
+        return value
+    if isinstance(value, Mapping):
+        return MappingProxyType({
+            sys.intern(key) if isinstance(key, str) else key: freeze(item)
+            for key, item in value.items()
+        })
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+def thaw(value):
+    """Deep-convert a frozen structure back to plain dicts and lists"""
+    if isinstance(value, Mapping):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+class FrozenMapping(Mapping):
+    """Read-only mapping that freeze() keeps as it is
+
+    Base class for views that build their items on demand, like the
+    lazily decoded stories of story_store.StoryStore.
+    """
+
+    __slots__ = ()
+
+class StoryCatalog(Mapping):
+    """Read-only mapping of story id -> frozen story"""
+
+    __slots__ = ('_stories',)
+
+    def __init__(self, stories=None):
+        self._stories = {story_id: freeze(story) for story_id, story in (stories or {}).items()}
+
+    def __getitem__(self, story_id):
+        return self._stories[story_id]
+
+    def __iter__(self):
+        return iter(self._stories)
+
+    def __len__(self):
+        return len(self._stories)
+
+    def __repr__(self):
+        return f"StoryCatalog({len(self)} stories)"
+
+class CatalogSnapshot:
+    """One published version of the catalog: the stories and their manifest
+
+    Read-only once created; reloads publish a new snapshot instead.
+    """
+
+    __slots__ = ('version', 'stories', 'manifest', 'published_at')
+
+    def __init__(self, version, stories, manifest=None):
+        set_slot = super().__setattr__
+        set_slot('version', version)
+        set_slot('stories', stories if isinstance(stories, StoryCatalog) else StoryCatalog(stories))
+        set_slot('manifest', freeze(manifest) if manifest else None)
+        set_slot('published_at', time.time())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("CatalogSnapshot is read-only; publish a new snapshot instead")
+
+    def __repr__(self):
+        return f"CatalogSnapshot(version={self.version}, {len(self.stories)} stories)"
+
+class CatalogJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that also serializes frozen catalog mappings"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, Mapping):
+            return dict(o)
+        return DefaultJSONProvider.default(o)
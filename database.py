@@ -1,30 +1,171 @@
 import sqlite3
+import ast
+import atexit
 import hashlib
+import json
 import os
+import queue
+import random
+import threading
+import time
+import weakref
 from datetime import datetime
 from pathlib import Path
 
 # Use proper path configuration
 DATABASE_DIR = Path(__file__).parent / "data"
-DATABASE_FILE = DATABASE_DIR / 'folktale_users.db'
+DATABASE_FILE = Path(os.environ.get('FOLKTALE_DB_PATH', DATABASE_DIR / 'folktale_users.db'))
 
 # Ensure data directory exists
 DATABASE_DIR.mkdir(exist_ok=True)
 
-def get_db_connection():
-    """Get database connection with row factory"""
-    conn = sqlite3.connect(str(DATABASE_FILE))
+# Connection pool settings (one connection per thread, configured once)
+DB_POOL_ENABLED = os.environ.get('FOLKTALE_DB_POOL', '1') != '0'
+DB_BUSY_TIMEOUT_MS = int(os.environ.get('FOLKTALE_DB_BUSY_TIMEOUT_MS', 5000))
+DB_CACHE_SIZE_KB = int(os.environ.get('FOLKTALE_DB_CACHE_SIZE_KB', 16384))
+DB_MMAP_SIZE = int(os.environ.get('FOLKTALE_DB_MMAP_SIZE', 64 * 1024 * 1024))
+DB_STATEMENT_CACHE_SIZE = 256
+
+# Write-behind activity logging (rows queued in-process, group-committed
+# by a background thread)
+ACTIVITY_WRITE_BEHIND = os.environ.get('FOLKTALE_ACTIVITY_WRITE_BEHIND', '0') == '1'
+ACTIVITY_QUEUE_SIZE = int(os.environ.get('FOLKTALE_ACTIVITY_QUEUE_SIZE', 10000))
+ACTIVITY_FLUSH_BATCH_SIZE = 500
+
+_pool_local = threading.local()
+_pool_lock = threading.Lock()
+# Every open pooled connection, for close_db_connections(); weak, so the
+# connections of a finished thread are not kept open by this set
+_pool_connections = weakref.WeakSet()
+_pool_generation = 0
+
+def _close_connections(connections, pid):
+    if os.getpid() != pid:
+        # Inherited through fork: keep them unused (see _reset_after_fork)
+        _inherited_connections.extend(connections.values())
+    else:
+        for conn in connections.values():
+            try:
+                conn.close_for_real()
+            except sqlite3.Error:
+                pass
+    connections.clear()
+
+class _ThreadConnections:
+    """One thread's pooled connections (path -> connection)
+
+    Lives in the thread-local, so it is released when the thread ends;
+    its connections are closed then instead of leaking one SQLite handle
+    (and its file descriptors) per finished thread.
+    """
+
+    def __init__(self):
+        self.connections = {}
+        self.generation = _pool_generation
+        weakref.finalize(self, _close_connections, self.connections, os.getpid())
+
+class PooledConnection(sqlite3.Connection):
+    """SQLite connection that goes back to the thread pool on close()
+
+    Nested callers on one thread get the same connection; depth counts
+    the callers holding it, so only the outermost close() resets it.
+    """
+
+    depth = 0
+
+    def close(self):
+        # Callers release the connection with close(); once the last one
+        # has, discard any uncommitted work so the next user starts from
+        # a clean state. An enclosing caller's transaction is left alone.
+        self.depth = max(self.depth - 1, 0)
+        if not self.depth and self.in_transaction:
+            self.rollback()
+
+    def close_for_real(self):
+        super().close()
+
+def _open_pooled_connection(path):
+    """Open and configure a connection for the per-thread pool"""
+    conn = sqlite3.connect(
+        path,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        factory=PooledConnection,
+        cached_statements=DB_STATEMENT_CACHE_SIZE,
+        check_same_thread=False
+    )
     conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}')
+    conn.execute(f'PRAGMA cache_size = -{DB_CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size = {DB_MMAP_SIZE}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    with _pool_lock:
+        _pool_connections.add(conn)
     return conn
 
+def get_db_connection():
+    """Get database connection with row factory
+
+    Connections are pooled per thread: close() returns the connection to
+    the pool instead of closing the underlying SQLite handle, which is
+    closed when the thread ends. Callers on the same thread share one
+    connection: a nested caller's commit() also commits the enclosing
+    caller's work, and only the outermost close() rolls back what was
+    left uncommitted.
+    """
+    path = str(DATABASE_FILE)
+    if not DB_POOL_ENABLED:
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    holder = getattr(_pool_local, 'holder', None)
+    if holder is None:
+        holder = _pool_local.holder = _ThreadConnections()
+    elif holder.generation != _pool_generation:
+        # close_db_connections() closed them
+        holder.connections.clear()
+        holder.generation = _pool_generation
+
+    connections = holder.connections
+    conn = connections.get(path)
+    if conn is None:
+        conn = connections[path] = _open_pooled_connection(path)
+    conn.depth += 1
+    return conn
+
+def close_db_connections():
+    """Close every pooled connection (shutdown, tests)"""
+    global _pool_generation
+    with _pool_lock:
+        connections = list(_pool_connections)
+        _pool_connections.clear()
+        _pool_generation += 1
+    for conn in connections:
+        try:
+            conn.close_for_real()
+        except sqlite3.Error:
+            pass
+
 def hash_password(password):
     """Hash password using SHA256"""
     return hashlib.sha256(password.encode()).hexdigest()
 
 def init_database():
-    """Initialize database with tables and default admin user"""
+    """Initialize database with tables and default admin user
+
+    Applies pending schema migrations. When the stored schema version is
+    already current this is a single PRAGMA read.
+    """
     conn = get_db_connection()
-    
+    try:
+        run_migrations(conn)
+    finally:
+        conn.close()
+
+def migration_initial_schema(conn):
+    """Migration 1: base tables, default admin user and achievements"""
     # Create users table
     conn.execute('''
         CREATE TABLE IF NOT EXISTS users (
@@ -131,9 +272,225 @@ def init_database():
     
     if achievements_exist['count'] == 0:
         init_default_achievements(conn)
+
+def migration_hot_path_indexes(conn):
+    """Migration 2: indexes used by achievement checks and rankings"""
+    # user_achievements(user_id) is already covered by the
+    # UNIQUE(user_id, achievement_id) autoindex
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_activity_log_user_timestamp
+        ON activity_log (user_id, timestamp)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_user_progress_user_story
+        ON user_progress (user_id, story_id)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_users_user_type
+        ON users (user_type)
+    ''')
+
+def migration_user_counters(conn):
+    """Migration 3: per-user achievement counters, backfilled from user_progress"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_counters (
+            user_id INTEGER PRIMARY KEY,
+            stories_completed INTEGER NOT NULL DEFAULT 0,
+            chapters_read INTEGER NOT NULL DEFAULT 0,
+            quizzes_completed INTEGER NOT NULL DEFAULT 0,
+            perfect_quizzes INTEGER NOT NULL DEFAULT 0,
+            words_learned INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    ''')
+    _backfill_counters_from_progress_json(conn)
+
+def migration_daily_streaks(conn):
+    """Migration 4: incremental daily streak columns, backfilled from activity_log"""
+    conn.execute('ALTER TABLE user_counters ADD COLUMN current_streak INTEGER NOT NULL DEFAULT 0')
+    conn.execute('ALTER TABLE user_counters ADD COLUMN longest_streak INTEGER NOT NULL DEFAULT 0')
+    conn.execute('ALTER TABLE user_counters ADD COLUMN last_active_date TEXT')
+    _rebuild_user_streaks(conn)
+
+def migration_leaderboard(conn):
+    """Migration 5: materialized leaderboard, backfilled from user_achievements"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS leaderboard (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            total_points INTEGER NOT NULL DEFAULT 0,
+            achievements_count INTEGER NOT NULL DEFAULT 0,
+            last_achievement TIMESTAMP,
+            seq INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_leaderboard_seq ON leaderboard (seq)')
+    _rebuild_leaderboard(conn)
+
+def migration_progress_totals(conn):
+    """Migration 6: lifetime quiz totals and badges, so progress survives restarts"""
+    conn.execute('ALTER TABLE user_counters ADD COLUMN quiz_attempts INTEGER NOT NULL DEFAULT 0')
+    conn.execute('ALTER TABLE user_counters ADD COLUMN correct_answers INTEGER NOT NULL DEFAULT 0')
+    conn.execute("ALTER TABLE user_counters ADD COLUMN badges TEXT NOT NULL DEFAULT '[]'")
+
+def migration_normalized_progress(conn):
+    """Migration 7: move user_progress JSON lists into relational tables"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS chapter_completions (
+            user_id INTEGER NOT NULL,
+            story_id TEXT NOT NULL,
+            chapter INTEGER NOT NULL,
+            completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, story_id, chapter)
+        ) WITHOUT ROWID
+    ''')
+    # Latest result per chapter, like the old quiz_scores list
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS quiz_attempts (
+            user_id INTEGER NOT NULL,
+            story_id TEXT NOT NULL,
+            chapter INTEGER NOT NULL,
+            score INTEGER,
+            total INTEGER,
+            percentage INTEGER NOT NULL DEFAULT 0,
+            attempted_at TEXT,
+            PRIMARY KEY (user_id, story_id, chapter)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS learned_words (
+            user_id INTEGER NOT NULL,
+            story_id TEXT NOT NULL,
+            word TEXT NOT NULL,
+            learned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, story_id, word)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_quiz_attempts_user_percentage
+        ON quiz_attempts (user_id, percentage)
+    ''')
     
-    conn.commit()
-    conn.close()
+    rows = conn.execute(
+        'SELECT user_id, story_id, completed_chapters, quiz_scores, vocabulary_learned FROM user_progress'
+    ).fetchall()
+    for row in rows:
+        key = (row['user_id'], str(row['story_id']))
+        conn.executemany(
+            'INSERT OR IGNORE INTO chapter_completions (user_id, story_id, chapter) VALUES (?, ?, ?)',
+            [key + (chapter_number(chapter),) for chapter in parse_progress_list(row['completed_chapters'])]
+        )
+        conn.executemany('''
+            INSERT OR REPLACE INTO quiz_attempts
+            (user_id, story_id, chapter, score, total, percentage, attempted_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [key + (chapter,) + quiz
+               for chapter, quiz in quiz_rows(parse_progress_list(row['quiz_scores'])).items()])
+        conn.executemany(
+            'INSERT OR IGNORE INTO learned_words (user_id, story_id, word) VALUES (?, ?, ?)',
+            [key + (str(word),) for word in parse_progress_list(row['vocabulary_learned'])]
+        )
+    
+    # The lists now live in the tables above
+    conn.execute('''
+        UPDATE user_progress
+        SET completed_chapters = '[]', quiz_scores = '[]', vocabulary_learned = '[]'
+    ''')
+    _rebuild_user_counters(conn)
+
+def migration_story_search(conn):
+    """Migration 8: full-text index over the story catalog (filled by search.py)"""
+    # remove_diacritics lets "capitulo" match "capítulo"; the prefix
+    # indexes keep prefix queries ("cur*") from scanning the vocabulary
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS story_search USING fts5(
+            kind UNINDEXED,
+            story_id UNINDEXED,
+            chapter UNINDEXED,
+            title,
+            body,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        )
+    ''')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS story_search_state (
+            story_id INTEGER PRIMARY KEY,
+            content_hash TEXT NOT NULL
+        )
+    ''')
+
+def migration_leaderboard_generation(conn):
+    """Migration 9: leaderboard rebuild counter, so every process reloads after a rebuild"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS leaderboard_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    conn.execute('INSERT OR IGNORE INTO leaderboard_state (id, generation) VALUES (1, 0)')
+
+def _backfill_counters_from_progress_json(conn):
+    """Counter backfill used by migration 3, from the user_progress JSON lists"""
+    totals = {}
+    rows = conn.execute(
+        'SELECT user_id, completed_chapters, quiz_scores, vocabulary_learned FROM user_progress'
+    ).fetchall()
+    for row in rows:
+        completed_chapters = parse_progress_list(row['completed_chapters'])
+        quiz_scores = parse_progress_list(row['quiz_scores'])
+        user_totals = totals.setdefault(row['user_id'], dict.fromkeys(COUNTER_COLUMNS, 0))
+        user_totals['stories_completed'] += 1 if completed_chapters else 0
+        user_totals['chapters_read'] += len(completed_chapters)
+        user_totals['quizzes_completed'] += len(quiz_scores)
+        user_totals['perfect_quizzes'] += sum(1 for score in quiz_scores if quiz_percentage(score) >= 100)
+        user_totals['words_learned'] += len(parse_progress_list(row['vocabulary_learned']))
+    
+    conn.executemany(f'''
+        INSERT OR REPLACE INTO user_counters (user_id, {', '.join(COUNTER_COLUMNS)})
+        VALUES (?, {', '.join('?' for _ in COUNTER_COLUMNS)})
+    ''', [(uid, *(counts[column] for column in COUNTER_COLUMNS)) for uid, counts in totals.items()])
+
+# Numbered schema migrations, applied in order. Append new entries here;
+# never edit or renumber one that has shipped.
+MIGRATIONS = [
+    (1, 'initial schema', migration_initial_schema),
+    (2, 'hot path indexes', migration_hot_path_indexes),
+    (3, 'user counters', migration_user_counters),
+    (4, 'daily streaks', migration_daily_streaks),
+    (5, 'leaderboard', migration_leaderboard),
+    (6, 'progress totals', migration_progress_totals),
+    (7, 'normalized progress', migration_normalized_progress),
+    (8, 'story search', migration_story_search),
+    (9, 'leaderboard generation', migration_leaderboard_generation),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn):
+    """Return the schema version recorded in the database file"""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def run_migrations(conn):
+    """Apply every migration newer than the recorded schema version"""
+    if get_schema_version(conn) >= SCHEMA_VERSION:
+        return
+
+    for version, description, migrate in MIGRATIONS:
+        # BEGIN IMMEDIATE serializes workers starting up at the same time;
+        # re-read the version once the write lock is held
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if get_schema_version(conn) >= version:
+                conn.rollback()
+                continue
+            migrate(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        print(f"Applied database migration {version}: {description}")
 
 def init_default_achievements(conn):
     """Initialize default achievements"""
@@ -191,10 +548,12 @@ def create_user(username, password, user_type='regular'):
     conn = get_db_connection()
     try:
         password_hash = hash_password(password)
-        conn.execute(
+        cursor = conn.execute(
             'INSERT INTO users (username, password_hash, user_type) VALUES (?, ?, ?)',
             (username, password_hash, user_type)
         )
+        if user_type == 'regular':
+            add_leaderboard_user(conn, cursor.lastrowid, username)
         conn.commit()
         return True, "User created successfully"
     except sqlite3.IntegrityError:
@@ -303,35 +662,102 @@ def deactivate_user(user_id):
     finally:
         conn.close()
 
-def save_user_progress(user_id, story_id, chapter, completed_chapters, quiz_scores, vocabulary_learned):
-    """Save or update user progress"""
+def save_user_progress(user_id, story_id, chapter, completed_chapters, quiz_scores,
+                       vocabulary_learned=None, counter_deltas=None, badges=None):
+    """Save or update user progress
+
+    Only the chapters, quiz results and words that changed are written to
+    chapter_completions, quiz_attempts and learned_words, and the user's
+    counters in user_counters are adjusted by the same difference in the
+    same transaction, so achievement checks never see a half-applied update.
+    vocabulary_learned=None keeps the stored words. counter_deltas adds to
+    other user_counters columns (e.g. quiz_attempts) and badges replaces
+    the stored badge list.
+    """
+    story_id = str(story_id)
+    key = (user_id, story_id)
     conn = get_db_connection()
     try:
         # Check if progress exists
         existing = conn.execute(
-            'SELECT id FROM user_progress WHERE user_id = ? AND story_id = ?',
-            (user_id, story_id)
+            'SELECT id FROM user_progress WHERE user_id = ? AND story_id = ?', key
         ).fetchone()
         
         if existing:
-            # Update existing progress
             conn.execute(
-                '''UPDATE user_progress 
-                   SET chapter = ?, completed_chapters = ?, quiz_scores = ?, 
-                       vocabulary_learned = ?, last_accessed = ?
-                   WHERE user_id = ? AND story_id = ?''',
-                (chapter, str(completed_chapters), str(quiz_scores), 
-                 str(vocabulary_learned), datetime.now(), user_id, story_id)
+                'UPDATE user_progress SET chapter = ?, last_accessed = ? WHERE id = ?',
+                (chapter, datetime.now(), existing['id'])
             )
         else:
-            # Insert new progress
             conn.execute(
-                '''INSERT INTO user_progress 
-                   (user_id, story_id, chapter, completed_chapters, quiz_scores, vocabulary_learned)
-                   VALUES (?, ?, ?, ?, ?, ?)''',
-                (user_id, story_id, chapter, str(completed_chapters), 
-                 str(quiz_scores), str(vocabulary_learned))
+                'INSERT INTO user_progress (user_id, story_id, chapter) VALUES (?, ?, ?)',
+                key + (chapter,)
+            )
+        
+        deltas = dict(counter_deltas or {})
+        
+        # Completed chapters
+        old_chapters = {row[0] for row in conn.execute(
+            'SELECT chapter FROM chapter_completions WHERE user_id = ? AND story_id = ?', key
+        )}
+        new_chapters = {chapter_number(chapter) for chapter in completed_chapters}
+        conn.executemany(
+            'INSERT INTO chapter_completions (user_id, story_id, chapter) VALUES (?, ?, ?)',
+            [key + (chapter,) for chapter in new_chapters - old_chapters]
+        )
+        conn.executemany(
+            'DELETE FROM chapter_completions WHERE user_id = ? AND story_id = ? AND chapter = ?',
+            [key + (chapter,) for chapter in old_chapters - new_chapters]
+        )
+        deltas['chapters_read'] = deltas.get('chapters_read', 0) + len(new_chapters) - len(old_chapters)
+        deltas['stories_completed'] = (deltas.get('stories_completed', 0)
+                                       + bool(new_chapters) - bool(old_chapters))
+        
+        # Quiz results, one row per chapter
+        old_quizzes = {row[0]: tuple(row[1:]) for row in conn.execute(
+            '''SELECT chapter, score, total, percentage, attempted_at
+               FROM quiz_attempts WHERE user_id = ? AND story_id = ?''', key
+        )}
+        new_quizzes = quiz_rows(quiz_scores)
+        conn.executemany('''
+            INSERT OR REPLACE INTO quiz_attempts
+            (user_id, story_id, chapter, score, total, percentage, attempted_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [key + (chapter,) + quiz for chapter, quiz in new_quizzes.items()
+               if old_quizzes.get(chapter) != quiz])
+        conn.executemany(
+            'DELETE FROM quiz_attempts WHERE user_id = ? AND story_id = ? AND chapter = ?',
+            [key + (chapter,) for chapter in old_quizzes.keys() - new_quizzes.keys()]
+        )
+        deltas['quizzes_completed'] = (deltas.get('quizzes_completed', 0)
+                                       + len(new_quizzes) - len(old_quizzes))
+        deltas['perfect_quizzes'] = (deltas.get('perfect_quizzes', 0)
+                                     + sum(1 for quiz in new_quizzes.values() if quiz[2] >= 100)
+                                     - sum(1 for quiz in old_quizzes.values() if quiz[2] >= 100))
+        
+        # Learned words
+        if vocabulary_learned is not None:
+            old_words = {row[0] for row in conn.execute(
+                'SELECT word FROM learned_words WHERE user_id = ? AND story_id = ?', key
+            )}
+            new_words = {str(word) for word in vocabulary_learned}
+            conn.executemany(
+                'INSERT INTO learned_words (user_id, story_id, word) VALUES (?, ?, ?)',
+                [key + (word,) for word in new_words - old_words]
+            )
+            conn.executemany(
+                'DELETE FROM learned_words WHERE user_id = ? AND story_id = ? AND word = ?',
+                [key + (word,) for word in old_words - new_words]
             )
+            deltas['words_learned'] = deltas.get('words_learned', 0) + len(new_words) - len(old_words)
+        
+        apply_counter_deltas(conn, user_id, deltas)
+        
+        if badges is not None:
+            conn.execute('''
+                INSERT INTO user_counters (user_id, badges) VALUES (?, ?)
+                ON CONFLICT (user_id) DO UPDATE SET badges = excluded.badges
+            ''', (user_id, json.dumps(badges)))
         
         conn.commit()
         return True
@@ -341,238 +767,755 @@ def save_user_progress(user_id, story_id, chapter, completed_chapters, quiz_scor
     finally:
         conn.close()
 
-def get_user_progress(user_id, story_id=None):
-    """Get user progress for specific story or all stories"""
+def record_quiz_result(user_id, story_id, chapter, quiz, completed, badges=()):
+    """Record one quiz result in one transaction: the chapter's quiz row,
+    its completion when completed, and the user's counters
+
+    Only this chapter's rows are written (upserts, nothing is deleted), so
+    concurrent submits from several workers cannot undo each other. quiz
+    is a dict with score, total, percentage and date; badges are added to
+    the stored list. Returns the user's quiz_attempts counter after the
+    update, so the caller can tell whether its cached progress had every
+    earlier attempt, or None if the write failed.
+    """
+    story_id = str(story_id)
+    chapter = chapter_number(chapter)
+    key = (user_id, story_id)
     conn = get_db_connection()
     try:
-        if story_id:
-            progress = conn.execute(
-                'SELECT * FROM user_progress WHERE user_id = ? AND story_id = ?',
-                (user_id, story_id)
+        # The counter deltas depend on the rows read here
+        conn.execute('BEGIN IMMEDIATE')
+        updated = conn.execute(
+            'UPDATE user_progress SET chapter = ?, last_accessed = ? WHERE user_id = ? AND story_id = ?',
+            (chapter, datetime.now()) + key
+        ).rowcount
+        if not updated:
+            conn.execute(
+                'INSERT INTO user_progress (user_id, story_id, chapter) VALUES (?, ?, ?)',
+                key + (chapter,)
+            )
+        
+        deltas = {'quiz_attempts': 1, 'correct_answers': quiz['score']}
+        
+        old_quiz = conn.execute(
+            'SELECT percentage FROM quiz_attempts WHERE user_id = ? AND story_id = ? AND chapter = ?',
+            key + (chapter,)
+        ).fetchone()
+        conn.execute('''
+            INSERT OR REPLACE INTO quiz_attempts
+            (user_id, story_id, chapter, score, total, percentage, attempted_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', key + (chapter, quiz['score'], quiz['total'], quiz['percentage'], quiz['date']))
+        deltas['quizzes_completed'] = 0 if old_quiz else 1
+        deltas['perfect_quizzes'] = (quiz['percentage'] >= 100) - bool(old_quiz and old_quiz['percentage'] >= 100)
+        
+        if completed:
+            story_started = conn.execute(
+                'SELECT 1 FROM chapter_completions WHERE user_id = ? AND story_id = ? LIMIT 1', key
             ).fetchone()
-            return dict(progress) if progress else None
-        else:
-            progress = conn.execute(
-                'SELECT * FROM user_progress WHERE user_id = ?',
-                (user_id,)
-            ).fetchall()
-            return [dict(p) for p in progress]
+            deltas['chapters_read'] = conn.execute(
+                'INSERT OR IGNORE INTO chapter_completions (user_id, story_id, chapter) VALUES (?, ?, ?)',
+                key + (chapter,)
+            ).rowcount
+            deltas['stories_completed'] = 0 if story_started else 1
+        
+        apply_counter_deltas(conn, user_id, deltas)
+        
+        counters = conn.execute(
+            'SELECT quiz_attempts, badges FROM user_counters WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        stored_badges = parse_progress_list(counters['badges'])
+        new_badges = [badge for badge in badges if badge not in stored_badges]
+        if new_badges:
+            conn.execute('UPDATE user_counters SET badges = ? WHERE user_id = ?',
+                         (json.dumps(stored_badges + new_badges), user_id))
+        
+        conn.commit()
+        return counters['quiz_attempts']
+    except Exception as e:
+        print(f"Error saving quiz result: {e}")
+        return None
     finally:
         conn.close()
 
-# Initialize database when module is imported
-if __name__ == "__main__":
-    init_database()
+def get_user_progress(user_id, story_id=None):
+    """Get user progress for specific story or all stories
 
-# Achievement Functions
-def log_user_activity(user_id, activity_type, activity_data=None):
-    """Log user activity for achievement tracking"""
+    Each row carries completed_chapters, quiz_scores (dicts with chapter,
+    score, total, percentage, date) and vocabulary_learned as lists.
+    """
     conn = get_db_connection()
-    import json
+    try:
+        story_filter = '' if story_id is None else ' AND story_id = ?'
+        params = (user_id,) if story_id is None else (user_id, str(story_id))
+        
+        progress = {
+            row['story_id']: dict(row, completed_chapters=[], quiz_scores=[], vocabulary_learned=[])
+            for row in conn.execute(
+                f'SELECT * FROM user_progress WHERE user_id = ?{story_filter} ORDER BY id', params
+            )
+        }
+        for row in conn.execute(
+            f'''SELECT story_id, chapter FROM chapter_completions
+                WHERE user_id = ?{story_filter} ORDER BY completed_at, chapter''', params
+        ):
+            if row['story_id'] in progress:
+                progress[row['story_id']]['completed_chapters'].append(row['chapter'])
+        for row in conn.execute(
+            f'''SELECT story_id, chapter, score, total, percentage, attempted_at FROM quiz_attempts
+                WHERE user_id = ?{story_filter} ORDER BY chapter''', params
+        ):
+            if row['story_id'] in progress:
+                progress[row['story_id']]['quiz_scores'].append({
+                    'chapter': row['chapter'],
+                    'score': row['score'],
+                    'total': row['total'],
+                    'percentage': row['percentage'],
+                    'date': row['attempted_at']
+                })
+        for row in conn.execute(
+            f'''SELECT story_id, word FROM learned_words
+                WHERE user_id = ?{story_filter} ORDER BY learned_at, word''', params
+        ):
+            if row['story_id'] in progress:
+                progress[row['story_id']]['vocabulary_learned'].append(row['word'])
+        
+        if story_id is not None:
+            return next(iter(progress.values()), None)
+        return list(progress.values())
+    finally:
+        conn.close()
+
+# Progress Counters
+# Per-user totals feeding the threshold achievements, kept in user_counters
+COUNTER_COLUMNS = ('stories_completed', 'chapters_read', 'quizzes_completed',
+                   'perfect_quizzes', 'words_learned')
+
+def parse_progress_list(value):
+    """Parse a user_progress list column (JSON, or the legacy Python repr)"""
+    if not value:
+        return []
+    try:
+        parsed = json.loads(value)
+    except ValueError:
+        try:
+            parsed = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return []
+    return list(parsed) if isinstance(parsed, (list, tuple)) else []
+
+def quiz_percentage(score):
+    """Percentage of a quiz_scores entry (a number, or a dict with 'percentage')"""
+    if isinstance(score, dict):
+        return score.get('percentage') or 0
+    return score
+
+def chapter_number(chapter):
+    """Chapter numbers may arrive as strings from JSON; store them as integers"""
+    if isinstance(chapter, str) and chapter.isdigit():
+        return int(chapter)
+    return chapter
+
+def quiz_rows(quiz_scores):
+    """Map quiz_scores entries to {chapter: (score, total, percentage, attempted_at)}
+
+    Entries are dicts as built by FolktaleApp.update_progress, or bare
+    percentages from the old format, which carry no chapter and are keyed
+    by their position in the list instead.
+    """
+    rows = {}
+    for position, entry in enumerate(quiz_scores, start=1):
+        if isinstance(entry, dict):
+            chapter = entry.get('chapter', position)
+            row = (entry.get('score'), entry.get('total'), quiz_percentage(entry), entry.get('date'))
+        else:
+            chapter = position
+            row = (None, None, quiz_percentage(entry), None)
+        rows[chapter_number(chapter)] = row
+    return rows
+
+def apply_counter_deltas(conn, user_id, deltas):
+    """Add deltas to the user's counters (caller commits)"""
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if not deltas:
+        return
     
-    data_json = json.dumps(activity_data) if activity_data else None
+    columns = list(deltas)
+    updates = ', '.join(f'{column} = {column} + excluded.{column}' for column in columns)
+    conn.execute(f'''
+        INSERT INTO user_counters (user_id, {', '.join(columns)})
+        VALUES (?, {', '.join('?' for _ in columns)})
+        ON CONFLICT (user_id) DO UPDATE SET {updates}, updated_at = CURRENT_TIMESTAMP
+    ''', (user_id, *(deltas[column] for column in columns)))
+
+def get_user_counters(user_id):
+    """All user_counters columns for a user (None when the user has no row yet)"""
+    conn = get_db_connection()
+    try:
+        row = conn.execute('SELECT * FROM user_counters WHERE user_id = ?', (user_id,)).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+def get_user_counter(conn, user_id, column):
+    """Read one counter for a user (0 when the user has no row yet)"""
+    row = conn.execute(
+        f'SELECT {column} FROM user_counters WHERE user_id = ?', (user_id,)
+    ).fetchone()
+    return row[column] if row else 0
+
+def _rebuild_user_counters(conn, user_id=None):
+    """Recompute user_counters from the progress tables (caller commits)"""
+    reset = ', '.join(f'{column} = 0' for column in COUNTER_COLUMNS)
+    user_filter = '' if user_id is None else 'WHERE user_id = ?'
+    params = () if user_id is None else (user_id,)
     
-    conn.execute('''
-        INSERT INTO activity_log (user_id, activity_type, activity_data)
-        VALUES (?, ?, ?)
-    ''', (user_id, activity_type, data_json))
+    conn.execute(f'UPDATE user_counters SET {reset} {user_filter}', params)
     
-    conn.commit()
-    conn.close()
+    updates = ', '.join(f'{column} = excluded.{column}' for column in COUNTER_COLUMNS)
+    conn.execute(f'''
+        WITH chapters AS (
+            SELECT user_id, COUNT(DISTINCT story_id) as stories, COUNT(*) as chapters
+            FROM chapter_completions {user_filter}
+            GROUP BY user_id
+        ),
+        quizzes AS (
+            SELECT user_id, COUNT(*) as quizzes, SUM(percentage >= 100) as perfect
+            FROM quiz_attempts {user_filter}
+            GROUP BY user_id
+        ),
+        words AS (
+            SELECT user_id, COUNT(*) as words
+            FROM learned_words {user_filter}
+            GROUP BY user_id
+        ),
+        users_with_progress AS (
+            SELECT user_id FROM chapters
+            UNION SELECT user_id FROM quizzes
+            UNION SELECT user_id FROM words
+        )
+        INSERT INTO user_counters (user_id, {', '.join(COUNTER_COLUMNS)})
+        SELECT 
+            p.user_id,
+            COALESCE(c.stories, 0),
+            COALESCE(c.chapters, 0),
+            COALESCE(q.quizzes, 0),
+            COALESCE(q.perfect, 0),
+            COALESCE(w.words, 0)
+        FROM users_with_progress p
+        LEFT JOIN chapters c ON c.user_id = p.user_id
+        LEFT JOIN quizzes q ON q.user_id = p.user_id
+        LEFT JOIN words w ON w.user_id = p.user_id
+        WHERE true
+        ON CONFLICT (user_id) DO UPDATE SET {updates}
+    ''', params * 3)
     
-    # Check for new achievements after logging activity
-    return check_achievements(user_id, activity_type, activity_data)
+    return conn.execute('SELECT changes()').fetchone()[0]
 
-def check_achievements(user_id, activity_type, activity_data=None):
-    """Check if user has unlocked any new achievements"""
+def rebuild_user_counters(user_id=None):
+    """Rebuild the counters for one user, or for everyone, from the progress tables"""
     conn = get_db_connection()
+    try:
+        rebuilt = _rebuild_user_counters(conn, user_id)
+        conn.commit()
+        return rebuilt
+    finally:
+        conn.close()
+
+# Daily Streaks
+# current_streak/longest_streak/last_active_date live in user_counters and
+# are advanced when an activity arrives; only the first activity of a day
+# writes. Dates are UTC, matching CURRENT_TIMESTAMP in activity_log.
+
+def _advance_streak(current_streak, longest_streak, last_active_date, activity_date):
+    """Return the (current, longest) streak after activity on activity_date"""
+    if last_active_date is None:
+        current_streak = 1
+    else:
+        gap = (datetime.strptime(activity_date, '%Y-%m-%d') -
+               datetime.strptime(last_active_date, '%Y-%m-%d')).days
+        current_streak = current_streak + 1 if gap == 1 else 1
+    return current_streak, max(longest_streak, current_streak)
+
+def record_activity_day(conn, user_id, activity_date):
+    """Advance the user's daily streak for activity on activity_date (YYYY-MM-DD)
+
+    Returns True when the row changed; the caller commits.
+    """
+    row = conn.execute(
+        'SELECT current_streak, longest_streak, last_active_date FROM user_counters WHERE user_id = ?',
+        (user_id,)
+    ).fetchone()
     
-    # Get user's current achievements
-    unlocked = set()
-    user_achievements = conn.execute('''
-        SELECT a.achievement_key 
-        FROM user_achievements ua
-        JOIN achievements a ON ua.achievement_id = a.id
-        WHERE ua.user_id = ?
-    ''', (user_id,)).fetchall()
-    
-    for ua in user_achievements:
-        unlocked.add(ua['achievement_key'])
-    
-    # Get all achievements that could be unlocked
-    achievements = conn.execute('''
-        SELECT * FROM achievements WHERE achievement_key NOT IN (
-            SELECT a.achievement_key 
-            FROM user_achievements ua
-            JOIN achievements a ON ua.achievement_id = a.id
-            WHERE ua.user_id = ?
+    if row is None:
+        current_streak, longest_streak, last_active_date = 0, 0, None
+    else:
+        current_streak, longest_streak, last_active_date = row
+    
+    # Same day, or a late event older than the stored day: nothing to do
+    if last_active_date is not None and activity_date <= last_active_date:
+        return False
+    
+    current_streak, longest_streak = _advance_streak(
+        current_streak, longest_streak, last_active_date, activity_date
+    )
+    conn.execute('''
+        INSERT INTO user_counters (user_id, current_streak, longest_streak, last_active_date)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET
+            current_streak = excluded.current_streak,
+            longest_streak = excluded.longest_streak,
+            last_active_date = excluded.last_active_date,
+            updated_at = CURRENT_TIMESTAMP
+    ''', (user_id, current_streak, longest_streak, activity_date))
+    return True
+
+def _rebuild_user_streaks(conn, user_id=None):
+    """Recompute the streak columns from the whole activity_log (caller commits)"""
+    if user_id is None:
+        conn.execute('UPDATE user_counters SET current_streak = 0, longest_streak = 0, last_active_date = NULL')
+        rows = conn.execute('''
+            SELECT user_id, DATE(timestamp) as activity_date
+            FROM activity_log
+            GROUP BY user_id, DATE(timestamp)
+            ORDER BY user_id, activity_date
+        ''')
+    else:
+        conn.execute(
+            'UPDATE user_counters SET current_streak = 0, longest_streak = 0, last_active_date = NULL WHERE user_id = ?',
+            (user_id,)
         )
-    ''', (user_id,)).fetchall()
+        rows = conn.execute('''
+            SELECT user_id, DATE(timestamp) as activity_date
+            FROM activity_log
+            WHERE user_id = ?
+            GROUP BY DATE(timestamp)
+            ORDER BY activity_date
+        ''', (user_id,))
     
-    newly_unlocked = []
+    streaks = {}
+    for row in rows:
+        current_streak, longest_streak, last_active_date = streaks.get(row['user_id'], (0, 0, None))
+        current_streak, longest_streak = _advance_streak(
+            current_streak, longest_streak, last_active_date, row['activity_date']
+        )
+        streaks[row['user_id']] = (current_streak, longest_streak, row['activity_date'])
     
-    for achievement in achievements:
-        if should_unlock_achievement(conn, user_id, achievement):
-            # Unlock the achievement
-            conn.execute('''
-                INSERT INTO user_achievements (user_id, achievement_id, progress)
-                VALUES (?, ?, ?)
-            ''', (user_id, achievement['id'], achievement['requirement_value']))
-            
-            newly_unlocked.append({
-                'key': achievement['achievement_key'],
-                'name': achievement['name'],
-                'description': achievement['description'],
-                'icon': achievement['icon'],
-                'points': achievement['points']
-            })
+    conn.executemany('''
+        INSERT INTO user_counters (user_id, current_streak, longest_streak, last_active_date)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT (user_id) DO UPDATE SET
+            current_streak = excluded.current_streak,
+            longest_streak = excluded.longest_streak,
+            last_active_date = excluded.last_active_date
+    ''', [(uid, *streak) for uid, streak in streaks.items()])
     
-    conn.commit()
-    conn.close()
+    return len(streaks)
+
+def rebuild_user_streaks(user_id=None):
+    """Rebuild daily streaks for one user, or for everyone, from activity_log"""
+    activity_writer.flush()
+    conn = get_db_connection()
+    try:
+        rebuilt = _rebuild_user_streaks(conn, user_id)
+        conn.commit()
+        return rebuilt
+    finally:
+        conn.close()
+
+# Achievement Functions
+
+# Requirement types an activity can move forward. Every activity also counts
+# towards ACTIVITY_ANY_REQUIREMENTS. Unknown activity types evaluate every rule.
+ACTIVITY_REQUIREMENTS = {
+    'chapter_read': ('chapters_read', 'stories_completed', 'all_stories_completed', 'chapters_in_day'),
+    'quiz_completed': ('quizzes_completed', 'perfect_quizzes', 'quick_quiz',
+                       'chapters_read', 'stories_completed', 'all_stories_completed'),
+    'vocabulary_learned': ('words_learned',),
+    'audio_played': ('audio_used',),
+    'theme_changed': ('themes_used',),
+    'cursor_changed': ('cursors_used',),
+}
+ACTIVITY_ANY_REQUIREMENTS = ('daily_streak', 'early_study', 'night_study')
+
+def get_requirement_types(activity_type):
+    """Return the requirement types affected by an activity, or None for all"""
+    if activity_type not in ACTIVITY_REQUIREMENTS:
+        return None
+    return set(ACTIVITY_REQUIREMENTS[activity_type]) | set(ACTIVITY_ANY_REQUIREMENTS)
+
+def _activity_row(user_id, activity_type, activity_data):
+    """activity_log row with the timestamp taken now (UTC, CURRENT_TIMESTAMP format)"""
+    return (
+        user_id,
+        activity_type,
+        json.dumps(activity_data) if activity_data else None,
+        datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    )
+
+def _insert_activity_rows(conn, rows):
+    conn.executemany('''
+        INSERT INTO activity_log (user_id, activity_type, activity_data, timestamp)
+        VALUES (?, ?, ?, ?)
+    ''', rows)
+
+def _update_streak(user_id, activity_date):
+    """Advance the streak synchronously; it only writes on the first activity of a day"""
+    conn = get_db_connection()
+    try:
+        if record_activity_day(conn, user_id, activity_date):
+            conn.commit()
+    finally:
+        conn.close()
+
+def write_activity_rows(rows):
+    """Persist activity rows, through the write-behind queue when enabled"""
+    if ACTIVITY_WRITE_BEHIND and activity_writer.submit(rows):
+        return
     
-    return newly_unlocked
+    conn = get_db_connection()
+    try:
+        _insert_activity_rows(conn, rows)
+        conn.commit()
+    finally:
+        conn.close()
 
-def should_unlock_achievement(conn, user_id, achievement):
-    """Check if a specific achievement should be unlocked"""
-    req_type = achievement['requirement_type']
-    req_value = achievement['requirement_value']
-    
-    if req_type == 'stories_completed':
-        count = conn.execute('''
-            SELECT COUNT(DISTINCT story_id) as count
-            FROM user_progress 
-            WHERE user_id = ? AND completed_chapters != '[]'
-        ''', (user_id,)).fetchone()
-        return count['count'] >= req_value
-        
-    elif req_type == 'chapters_read':
-        # Count total chapters read by looking at completed_chapters JSON
-        import json
-        progress_records = conn.execute('''
-            SELECT completed_chapters FROM user_progress WHERE user_id = ?
-        ''', (user_id,)).fetchall()
-        
-        total = 0
-        for record in progress_records:
-            if record['completed_chapters']:
-                try:
-                    chapters = json.loads(record['completed_chapters'])
-                    total += len(chapters)
-                except:
-                    continue
-        
-        return total >= req_value
-        
-    elif req_type == 'quizzes_completed':
-        # Count total quiz attempts
-        import json
-        progress_records = conn.execute('''
-            SELECT quiz_scores FROM user_progress WHERE user_id = ?
-        ''', (user_id,)).fetchall()
-        
-        total = 0
-        for record in progress_records:
-            if record['quiz_scores']:
+class ActivityLogWriter:
+    """Background thread that group-commits queued activity_log rows
+
+    The queue is bounded: when it is full, submit() waits up to put_timeout
+    seconds and then reports failure so the caller writes synchronously.
+    """
+
+    def __init__(self, max_queue=10000, batch_size=500, put_timeout=0.5):
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._stopping = False
+
+    def start(self):
+        """Start the writer thread (again, e.g. after a fork) if it is not running"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name='activity-log-writer', daemon=True)
+            self._thread.start()
+
+    def submit(self, rows):
+        """Queue rows for writing
+
+        Rows that do not fit within put_timeout are written synchronously.
+        Returns False when the writer is shutting down.
+        """
+        if self._stopping:
+            return False
+        self.start()
+        for index, row in enumerate(rows):
+            try:
+                self._queue.put(row, timeout=self.put_timeout)
+            except queue.Full:
+                # Write the rows that did not fit synchronously
+                conn = get_db_connection()
                 try:
-                    scores = json.loads(record['quiz_scores'])
-                    total += len(scores)
-                except:
-                    continue
-        
-        return total >= req_value
-        
-    elif req_type == 'perfect_quizzes':
-        # Count perfect quiz scores (100%)
-        import json
-        count = 0
-        progress_records = conn.execute('''
-            SELECT quiz_scores FROM user_progress WHERE user_id = ?
-        ''', (user_id,)).fetchall()
-        
-        for record in progress_records:
-            if record['quiz_scores']:
+                    _insert_activity_rows(conn, rows[index:])
+                    conn.commit()
+                finally:
+                    conn.close()
+                break
+        return True
+
+    def flush(self):
+        """Block until every queued row has been committed"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def stop(self):
+        """Flush the queue and stop the writer thread (registered with atexit)"""
+        self._stopping = True
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            row = self._queue.get()
+            if row is None:
+                self._queue.task_done()
+                return
+            
+            batch = [row]
+            stop_after_batch = False
+            while len(batch) < self.batch_size:
                 try:
-                    scores = json.loads(record['quiz_scores'])
-                    count += sum(1 for score in scores if score >= 100)
-                except:
-                    continue
-        
-        return count >= req_value
-        
-    elif req_type == 'words_learned':
-        # Count unique vocabulary words learned
-        import json
-        total = 0
-        progress_records = conn.execute('''
-            SELECT vocabulary_learned FROM user_progress WHERE user_id = ?
-        ''', (user_id,)).fetchall()
+                    row = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is None:
+                    stop_after_batch = True
+                    break
+                batch.append(row)
+            
+            try:
+                self._write_batch(batch)
+            finally:
+                # flush() waits on these, whatever happened to the batch
+                for _ in range(len(batch) + stop_after_batch):
+                    self._queue.task_done()
+            if stop_after_batch:
+                return
+
+    def _write_batch(self, batch):
+        for attempt in range(3):
+            conn = get_db_connection()
+            try:
+                _insert_activity_rows(conn, batch)
+                conn.commit()
+                return
+            except Exception as e:
+                print(f"Activity log write failed (attempt {attempt + 1}): {e}")
+                time.sleep(0.1 * (attempt + 1))
+            finally:
+                conn.close()
+        self._write_rows(batch)
+
+    def _write_rows(self, batch):
+        """Last resort for a batch that keeps failing: one transaction per row
+
+        A bad row then only loses itself instead of the whole batch.
+        """
+        failed = 0
+        for row in batch:
+            conn = get_db_connection()
+            try:
+                _insert_activity_rows(conn, [row])
+                conn.commit()
+            except Exception as e:
+                failed += 1
+                print(f"Activity log row {row!r} could not be written: {e}")
+            finally:
+                conn.close()
+        if failed:
+            print(f"Dropped {failed} of {len(batch)} activity log rows")
+
+activity_writer = ActivityLogWriter(
+    max_queue=ACTIVITY_QUEUE_SIZE,
+    batch_size=ACTIVITY_FLUSH_BATCH_SIZE
+)
+atexit.register(activity_writer.stop)
+
+# Forked workers (gunicorn --preload) must not reuse the parent's SQLite
+# handles, locks or queued rows
+_inherited_connections = []
+
+def _reset_after_fork():
+    """Start a forked child with an empty pool, a fresh writer and new locks"""
+    global _pool_local, _pool_lock
+    # Keep the inherited handles referenced but unused: closing them here
+    # could checkpoint or unlock files the parent is still using
+    _inherited_connections.extend(_pool_connections)
+    _pool_connections.clear()
+    _pool_local = threading.local()
+    _pool_lock = threading.Lock()
+    
+    activity_writer.__init__(
+        max_queue=activity_writer._queue.maxsize,
+        batch_size=activity_writer.batch_size,
+        put_timeout=activity_writer.put_timeout
+    )
+    # The sorted view stays valid (it catches up by seq); only the lock is replaced
+    leaderboard._lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def log_user_activities(user_id, events):
+    """Log a batch of (activity_type, activity_data) events in one transaction
+
+    Achievements are evaluated once for the whole batch.
+    """
+    if not events:
+        return []
+    
+    rows = [
+        _activity_row(user_id, activity_type, activity_data)
+        for activity_type, activity_data in events
+    ]
+    write_activity_rows(rows)
+    _update_streak(user_id, rows[-1][3][:10])
+    
+    return check_achievements(user_id, [activity_type for activity_type, _ in events])
+
+def log_user_activity(user_id, activity_type, activity_data=None):
+    """Log user activity for achievement tracking"""
+    row = _activity_row(user_id, activity_type, activity_data)
+    write_activity_rows([row])
+    _update_streak(user_id, row[3][:10])
+    
+    # Check for new achievements after logging activity
+    return check_achievements(user_id, activity_type, activity_data)
+
+# Callbacks run after achievements are unlocked, as listener(user_id, unlocked).
+# user_id is None when unlocks were rebuilt for everyone.
+achievement_unlock_listeners = []
+
+def add_achievement_unlock_listener(listener):
+    """Register a callback for achievement unlocks (e.g. cache invalidation)"""
+    achievement_unlock_listeners.append(listener)
+
+def _notify_achievement_unlocks(user_id, unlocked):
+    for listener in achievement_unlock_listeners:
+        try:
+            listener(user_id, unlocked)
+        except Exception as e:
+            print(f"Achievement unlock listener failed: {e}")
+
+def check_achievements(user_id, activity_type, activity_data=None):
+    """Check if user has unlocked any new achievements
+
+    Only rules whose requirement type can be affected by the activity are
+    evaluated, and each requirement type is measured once for all of its
+    thresholds. activity_type may also be a list of types (batches).
+    """
+    conn = get_db_connection()
+    try:
+        activity_types = [activity_type] if activity_type is None or isinstance(activity_type, str) else set(activity_type)
+        requirement_types = set()
+        for logged_type in activity_types:
+            affected = get_requirement_types(logged_type)
+            if affected is None:
+                requirement_types = set(RULE_EVALUATORS)
+                break
+            requirement_types |= affected
+        requirement_types &= set(RULE_EVALUATORS)
         
-        for record in progress_records:
-            if record['vocabulary_learned']:
-                try:
-                    words = json.loads(record['vocabulary_learned'])
-                    total += len(words)
-                except:
-                    continue
+        if not requirement_types:
+            return []
         
-        return total >= req_value
+        # Locked achievements for the affected requirement types only
+        placeholders = ', '.join('?' for _ in requirement_types)
+        achievements = conn.execute(f'''
+            SELECT * FROM achievements a
+            WHERE a.requirement_type IN ({placeholders})
+              AND NOT EXISTS (
+                  SELECT 1 FROM user_achievements ua
+                  WHERE ua.user_id = ? AND ua.achievement_id = a.id
+              )
+            ORDER BY a.id
+        ''', (*sorted(requirement_types), user_id)).fetchall()
         
-    elif req_type == 'daily_streak':
-        # Check consecutive days of activity
-        from datetime import datetime, timedelta
+        by_requirement = {}
+        for achievement in achievements:
+            by_requirement.setdefault(achievement['requirement_type'], []).append(achievement)
         
-        activities = conn.execute('''
-            SELECT DATE(timestamp) as activity_date
-            FROM activity_log 
-            WHERE user_id = ? 
-            GROUP BY DATE(timestamp)
-            ORDER BY timestamp DESC
-            LIMIT ?
-        ''', (user_id, req_value + 5)).fetchall()
+        newly_unlocked = []
         
-        if not activities:
-            return False
-            
-        # Calculate consecutive days
-        current_streak = 1
-        if len(activities) < req_value:
-            return False
+        for req_type, candidates in by_requirement.items():
+            threshold = max(achievement['requirement_value'] for achievement in candidates)
+            value = RULE_EVALUATORS[req_type](conn, user_id, threshold)
             
-        for i in range(1, len(activities)):
-            prev_date = datetime.strptime(activities[i-1]['activity_date'], '%Y-%m-%d').date()
-            curr_date = datetime.strptime(activities[i]['activity_date'], '%Y-%m-%d').date()
-            
-            if (prev_date - curr_date).days == 1:
-                current_streak += 1
-                if current_streak >= req_value:
-                    return True
-            else:
-                break
+            for achievement in candidates:
+                if value < achievement['requirement_value']:
+                    continue
                 
-        return current_streak >= req_value
+                # Unlock the achievement
+                conn.execute('''
+                    INSERT INTO user_achievements (user_id, achievement_id, progress)
+                    VALUES (?, ?, ?)
+                ''', (user_id, achievement['id'], achievement['requirement_value']))
+                
+                newly_unlocked.append({
+                    'key': achievement['achievement_key'],
+                    'name': achievement['name'],
+                    'description': achievement['description'],
+                    'icon': achievement['icon'],
+                    'points': achievement['points']
+                })
+        
+        if newly_unlocked:
+            record_leaderboard_unlocks(
+                conn, user_id,
+                sum(achievement['points'] for achievement in newly_unlocked),
+                len(newly_unlocked)
+            )
+            conn.commit()
+    finally:
+        conn.close()
     
-    # Add more achievement types as needed
-    return False
+    if newly_unlocked:
+        _notify_achievement_unlocks(user_id, newly_unlocked)
+    
+    return newly_unlocked
+
+def should_unlock_achievement(conn, user_id, achievement):
+    """Check if a specific achievement should be unlocked"""
+    evaluate = RULE_EVALUATORS.get(achievement['requirement_type'])
+    if evaluate is None:
+        # Add more achievement types to RULE_EVALUATORS as needed
+        return False
+    return evaluate(conn, user_id, achievement['requirement_value']) >= achievement['requirement_value']
+
+def count_stories_completed(conn, user_id, threshold):
+    """Stories with at least one completed chapter"""
+    return get_user_counter(conn, user_id, 'stories_completed')
+
+def count_chapters_read(conn, user_id, threshold):
+    """Total chapters read, from completed_chapters"""
+    return get_user_counter(conn, user_id, 'chapters_read')
+
+def count_quizzes_completed(conn, user_id, threshold):
+    """Total quiz attempts"""
+    return get_user_counter(conn, user_id, 'quizzes_completed')
+
+def count_perfect_quizzes(conn, user_id, threshold):
+    """Quiz attempts scored at 100%"""
+    return get_user_counter(conn, user_id, 'perfect_quizzes')
+
+def count_words_learned(conn, user_id, threshold):
+    """Vocabulary words learned"""
+    return get_user_counter(conn, user_id, 'words_learned')
+
+def count_daily_streak(conn, user_id, threshold):
+    """Consecutive days of activity ending at the most recent active day"""
+    return get_user_counter(conn, user_id, 'current_streak')
+
+# requirement_type -> function(conn, user_id, threshold) returning the user's
+# current value; threshold is the highest requirement still locked
+RULE_EVALUATORS = {
+    'stories_completed': count_stories_completed,
+    'chapters_read': count_chapters_read,
+    'quizzes_completed': count_quizzes_completed,
+    'perfect_quizzes': count_perfect_quizzes,
+    'words_learned': count_words_learned,
+    'daily_streak': count_daily_streak,
+}
+
 
 def get_user_achievements(user_id):
     """Get all achievements for a user"""
     conn = get_db_connection()
-    
-    unlocked = conn.execute('''
-        SELECT a.*, ua.unlocked_at, ua.progress
-        FROM user_achievements ua
-        JOIN achievements a ON ua.achievement_id = a.id
-        WHERE ua.user_id = ?
-        ORDER BY ua.unlocked_at DESC
-    ''', (user_id,)).fetchall()
-    
-    all_achievements = conn.execute('''
-        SELECT * FROM achievements 
-        WHERE is_hidden = 0
-        ORDER BY category, points
-    ''').fetchall()
-    
-    conn.close()
+    try:
+        unlocked = conn.execute('''
+            SELECT a.*, ua.unlocked_at, ua.progress
+            FROM user_achievements ua
+            JOIN achievements a ON ua.achievement_id = a.id
+            WHERE ua.user_id = ?
+            ORDER BY ua.unlocked_at DESC
+        ''', (user_id,)).fetchall()
+        
+        all_achievements = conn.execute('''
+            SELECT * FROM achievements 
+            WHERE is_hidden = 0
+            ORDER BY category, points
+        ''').fetchall()
+    finally:
+        conn.close()
     
     # Convert to dictionaries and add unlock status
     unlocked_dict = {a['achievement_key']: dict(a) for a in unlocked}
@@ -590,26 +1533,26 @@ def get_user_achievements(user_id):
 def get_user_achievement_stats(user_id):
     """Get achievement statistics for a user"""
     conn = get_db_connection()
-    
-    total_achievements = conn.execute('''
-        SELECT COUNT(*) as count FROM achievements WHERE is_hidden = 0
-    ''').fetchone()['count']
-    
-    unlocked_achievements = conn.execute('''
-        SELECT COUNT(*) as count 
-        FROM user_achievements ua
-        JOIN achievements a ON ua.achievement_id = a.id
-        WHERE ua.user_id = ? AND a.is_hidden = 0
-    ''', (user_id,)).fetchone()['count']
-    
-    total_points = conn.execute('''
-        SELECT COALESCE(SUM(a.points), 0) as total
-        FROM user_achievements ua
-        JOIN achievements a ON ua.achievement_id = a.id
-        WHERE ua.user_id = ?
-    ''', (user_id,)).fetchone()['total']
-    
-    conn.close()
+    try:
+        total_achievements = conn.execute('''
+            SELECT COUNT(*) as count FROM achievements WHERE is_hidden = 0
+        ''').fetchone()['count']
+        
+        unlocked_achievements = conn.execute('''
+            SELECT COUNT(*) as count 
+            FROM user_achievements ua
+            JOIN achievements a ON ua.achievement_id = a.id
+            WHERE ua.user_id = ? AND a.is_hidden = 0
+        ''', (user_id,)).fetchone()['count']
+        
+        total_points = conn.execute('''
+            SELECT COALESCE(SUM(a.points), 0) as total
+            FROM user_achievements ua
+            JOIN achievements a ON ua.achievement_id = a.id
+            WHERE ua.user_id = ?
+        ''', (user_id,)).fetchone()['total']
+    finally:
+        conn.close()
     
     return {
         'total_achievements': total_achievements,
@@ -618,34 +1561,249 @@ def get_user_achievement_stats(user_id):
         'total_points': total_points
     }
 
-def get_global_ranking(limit=50):
-    """Get global ranking of users by achievement points"""
-    conn = get_db_connection()
-    
-    ranking = conn.execute('''
+# Leaderboard
+# Points per regular user are kept in the leaderboard table, updated in the
+# same transaction as an unlock. Each write stamps the row with a new seq so
+# every process can catch up on changed rows only; a rebuild (which also
+# deletes rows) bumps leaderboard_state.generation instead, and every
+# process then reloads all rows. In memory, the keys are kept in a
+# RankIndex, so an update and a user's rank are O(log n) and top-N is a
+# walk over the first N keys.
+
+def _timestamp_sort_value(timestamp):
+    """Numeric form of a 'YYYY-MM-DD HH:MM:SS' timestamp (0 for NULL)"""
+    if not timestamp:
+        return 0
+    digits = ''.join(ch for ch in str(timestamp) if ch.isdigit())[:14]
+    return int(digits) if digits else 0
+
+def _leaderboard_key(row):
+    """Sort key: total_points DESC, achievements_count DESC, last_achievement DESC"""
+    return (-row['total_points'], -row['achievements_count'],
+            -_timestamp_sort_value(row['last_achievement']))
+
+def _next_leaderboard_seq(conn):
+    return conn.execute('SELECT COALESCE(MAX(seq), 0) + 1 FROM leaderboard').fetchone()[0]
+
+def add_leaderboard_user(conn, user_id, username):
+    """Add a regular user with zero points (caller commits)"""
+    conn.execute('''
+        INSERT OR IGNORE INTO leaderboard (user_id, username, seq)
+        VALUES (?, ?, ?)
+    ''', (user_id, username, _next_leaderboard_seq(conn)))
+
+def record_leaderboard_unlocks(conn, user_id, points, count):
+    """Add newly unlocked achievements to the user's row (caller commits)"""
+    conn.execute('''
+        UPDATE leaderboard
+        SET total_points = total_points + ?,
+            achievements_count = achievements_count + ?,
+            last_achievement = (SELECT MAX(unlocked_at) FROM user_achievements WHERE user_id = ?),
+            seq = ?
+        WHERE user_id = ?
+    ''', (points, count, user_id, _next_leaderboard_seq(conn), user_id))
+
+def _rebuild_leaderboard(conn):
+    """Recompute the leaderboard table from user_achievements (caller commits)"""
+    seq = _next_leaderboard_seq(conn)
+    conn.execute('DELETE FROM leaderboard')
+    conn.execute('''
+        INSERT INTO leaderboard (user_id, username, total_points, achievements_count, last_achievement, seq)
         SELECT 
             u.id,
             u.username,
-            COALESCE(SUM(a.points), 0) as total_points,
-            COUNT(ua.achievement_id) as achievements_count,
-            MAX(ua.unlocked_at) as last_achievement
+            COALESCE(SUM(a.points), 0),
+            COUNT(ua.achievement_id),
+            MAX(ua.unlocked_at),
+            ?
         FROM users u
         LEFT JOIN user_achievements ua ON u.id = ua.user_id
         LEFT JOIN achievements a ON ua.achievement_id = a.id
         WHERE u.user_type = 'regular'
         GROUP BY u.id, u.username
-        ORDER BY total_points DESC, achievements_count DESC, last_achievement DESC
-        LIMIT ?
-    ''', (limit,)).fetchall()
-    
-    conn.close()
+    ''', (seq,))
+
+def rebuild_leaderboard():
+    """Rebuild the leaderboard after writing user_achievements directly
+
+    Other processes see the new generation and reload every row, since
+    the rows of users no longer ranked are deleted.
+    """
+    conn = get_db_connection()
+    try:
+        _rebuild_leaderboard(conn)
+        conn.execute('UPDATE leaderboard_state SET generation = generation + 1')
+        conn.commit()
+    finally:
+        conn.close()
+    leaderboard.reset()
+    _notify_achievement_unlocks(None, [])
+
+class RankIndex:
+    """Sorted set of distinct keys with O(log n) insert, remove and rank
+
+    An indexable skip list: every link also stores how many positions it
+    advances, so the number of keys before a key is summed on the way
+    down. Links that end the list advance to one past the last key.
+    """
+
+    MAX_LEVELS = 32
+
+    class _Node:
+        __slots__ = ('key', 'next', 'width')
+
+        def __init__(self, key, levels):
+            self.key = key
+            self.next = [None] * levels
+            self.width = [1] * levels
+
+    def __init__(self, seed=None):
+        self._head = self._Node(None, self.MAX_LEVELS)
+        self._size = 0
+        self._random = random.Random(seed)
+
+    def __len__(self):
+        return self._size
+
+    def _path(self, key):
+        """Last node before key on each level, and its position (head = 0)"""
+        chain = [None] * self.MAX_LEVELS
+        positions = [0] * self.MAX_LEVELS
+        node = self._head
+        position = 0
+        for level in reversed(range(self.MAX_LEVELS)):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                position += node.width[level]
+                node = following
+                following = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key):
+        chain, positions = self._path(key)
+        # A node reaches level k with probability 1/2**k
+        levels = 1
+        while levels < self.MAX_LEVELS and self._random.getrandbits(1):
+            levels += 1
+        
+        node = self._Node(key, levels)
+        position = positions[0] + 1
+        for level in range(levels):
+            before = chain[level]
+            distance = position - positions[level]
+            node.next[level] = before.next[level]
+            node.width[level] = before.width[level] - distance + 1
+            before.next[level] = node
+            before.width[level] = distance
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key):
+        chain, positions = self._path(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        
+        for level in range(len(node.next)):
+            before = chain[level]
+            before.width[level] += node.width[level] - 1
+            before.next[level] = node.next[level]
+        for level in range(len(node.next), self.MAX_LEVELS):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def rank(self, key):
+        """Number of keys smaller than key"""
+        node = self._head
+        position = 0
+        for level in reversed(range(self.MAX_LEVELS)):
+            following = node.next[level]
+            while following is not None and following.key < key:
+                position += node.width[level]
+                node = following
+                following = node.next[level]
+        return position
+
+    def first(self, count):
+        """The count smallest keys, in order"""
+        keys = []
+        node = self._head.next[0]
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+class Leaderboard:
+    """In-process ordered view of the leaderboard table"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Drop the in-memory copy; the next read reloads every row"""
+        self._keys = RankIndex()
+        self._rows = {}
+        self._seq = -1
+        self._generation = None
+
+    def sync(self, conn):
+        """Apply rows changed in the database since the last sync"""
+        generation = conn.execute('SELECT generation FROM leaderboard_state').fetchone()[0]
+        if generation != self._generation:
+            # Rebuilt (here or in another process): deleted rows have no seq to catch up on
+            self.reset()
+            self._generation = generation
+        
+        changed = conn.execute('''
+            SELECT * FROM leaderboard WHERE seq > ? ORDER BY seq
+        ''', (self._seq,)).fetchall()
+        
+        for row in changed:
+            old = self._rows.get(row['user_id'])
+            if old is not None:
+                self._keys.remove(old['key'])
+            
+            entry = dict(row)
+            entry['key'] = _leaderboard_key(row) + (row['user_id'],)
+            self._keys.insert(entry['key'])
+            self._rows[row['user_id']] = entry
+            self._seq = max(self._seq, row['seq'])
+
+    def top(self, conn, limit):
+        with self._lock:
+            self.sync(conn)
+            return [self._rows[key[-1]] for key in self._keys.first(max(limit, 0))]
+
+    def rank_of(self, conn, user_id):
+        """Return (rank, row) for a user, or None if the user is not ranked"""
+        with self._lock:
+            self.sync(conn)
+            entry = self._rows.get(user_id)
+            if entry is None:
+                return None
+            # Users sharing the same points/count/last achievement share a rank
+            return self._keys.rank(entry['key'][:-1]) + 1, entry
+
+leaderboard = Leaderboard()
+
+def get_global_ranking(limit=50):
+    """Get global ranking of users by achievement points"""
+    conn = get_db_connection()
+    try:
+        ranking = leaderboard.top(conn, limit)
+    finally:
+        conn.close()
     
     # Convert to list of dictionaries with rank
     result = []
     for i, user in enumerate(ranking):
         result.append({
             'rank': i + 1,
-            'user_id': user['id'],
+            'user_id': user['user_id'],
             'username': user['username'],
             'total_points': user['total_points'],
             'achievements_count': user['achievements_count'],
@@ -657,54 +1815,15 @@ def get_global_ranking(limit=50):
 def get_user_rank(user_id):
     """Get specific user's rank in global ranking"""
     conn = get_db_connection()
-    
-    # Get user's points and achievements
-    user_stats = conn.execute('''
-        SELECT 
-            u.username,
-            COALESCE(SUM(a.points), 0) as total_points,
-            COUNT(ua.achievement_id) as achievements_count,
-            MAX(ua.unlocked_at) as last_achievement
-        FROM users u
-        LEFT JOIN user_achievements ua ON u.id = ua.user_id
-        LEFT JOIN achievements a ON ua.achievement_id = a.id
-        WHERE u.id = ? AND u.user_type = 'regular'
-        GROUP BY u.id, u.username
-    ''', (user_id,)).fetchone()
-    
-    if not user_stats:
+    try:
+        ranked = leaderboard.rank_of(conn, user_id)
+    finally:
         conn.close()
-        return None
     
-    # Count how many users have better scores
-    better_users = conn.execute('''
-        SELECT COUNT(*) as count
-        FROM (
-            SELECT 
-                u.id,
-                COALESCE(SUM(a.points), 0) as total_points,
-                COUNT(ua.achievement_id) as achievements_count,
-                MAX(ua.unlocked_at) as last_achievement
-            FROM users u
-            LEFT JOIN user_achievements ua ON u.id = ua.user_id
-            LEFT JOIN achievements a ON ua.achievement_id = a.id
-            WHERE u.user_type = 'regular'
-            GROUP BY u.id
-        ) ranked
-        WHERE 
-            ranked.total_points > ? OR 
-            (ranked.total_points = ? AND ranked.achievements_count > ?) OR
-            (ranked.total_points = ? AND ranked.achievements_count = ? AND ranked.last_achievement > ?)
-    ''', (
-        user_stats['total_points'],
-        user_stats['total_points'], user_stats['achievements_count'],
-        user_stats['total_points'], user_stats['achievements_count'], user_stats['last_achievement']
-    )).fetchone()
-    
-    conn.close()
-    
-    rank = better_users['count'] + 1
+    if ranked is None:
+        return None
     
+    rank, user_stats = ranked
     return {
         'rank': rank,
         'username': user_stats['username'],
@@ -713,40 +1832,73 @@ def get_user_rank(user_id):
         'last_achievement': user_stats['last_achievement']
     }
 
-def get_category_rankings():
+def get_category_rankings(limit=10):
     """Get rankings by achievement categories"""
     conn = get_db_connection()
+    try:
+        # Every category present in the achievements table gets an entry, even if empty
+        rankings = {
+            row['category']: []
+            for row in conn.execute('SELECT DISTINCT category FROM achievements ORDER BY category')
+        }
+        
+        # Per-category totals and the top N of each category in one pass
+        ranked_users = conn.execute('''
+            WITH category_totals AS (
+                SELECT 
+                    a.category,
+                    ua.user_id,
+                    SUM(a.points) as category_points,
+                    COUNT(*) as category_achievements
+                FROM user_achievements ua
+                JOIN achievements a ON ua.achievement_id = a.id
+                JOIN users u ON ua.user_id = u.id
+                WHERE u.user_type = 'regular'
+                GROUP BY ua.user_id, a.category
+                HAVING category_points > 0
+            ),
+            ranked AS (
+                SELECT 
+                    category_totals.*,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY category
+                        ORDER BY category_points DESC, category_achievements DESC, user_id
+                    ) as category_rank
+                FROM category_totals
+            )
+            SELECT ranked.*, u.username
+            FROM ranked
+            JOIN users u ON ranked.user_id = u.id
+            WHERE category_rank <= ?
+            ORDER BY category, category_rank
+        ''', (limit,)).fetchall()
+    finally:
+        conn.close()
     
-    categories = ['reading', 'quiz', 'streak', 'vocabulary', 'special', 'audio', 'exploration']
-    rankings = {}
-    
-    for category in categories:
-        category_ranking = conn.execute('''
-            SELECT 
-                u.id,
-                u.username,
-                COALESCE(SUM(a.points), 0) as category_points,
-                COUNT(ua.achievement_id) as category_achievements
-            FROM users u
-            LEFT JOIN user_achievements ua ON u.id = ua.user_id
-            LEFT JOIN achievements a ON ua.achievement_id = a.id AND a.category = ?
-            WHERE u.user_type = 'regular'
-            GROUP BY u.id, u.username
-            HAVING category_points > 0
-            ORDER BY category_points DESC, category_achievements DESC
-            LIMIT 10
-        ''', (category,)).fetchall()
-        
-        rankings[category] = [
-            {
-                'rank': i + 1,
-                'user_id': user['id'],
-                'username': user['username'],
-                'points': user['category_points'],
-                'achievements': user['category_achievements']
-            }
-            for i, user in enumerate(category_ranking)
-        ]
+    for user in ranked_users:
+        rankings.setdefault(user['category'], []).append({
+            'rank': user['category_rank'],
+            'user_id': user['user_id'],
+            'username': user['username'],
+            'points': user['category_points'],
+            'achievements': user['category_achievements']
+        })
     
-    conn.close()
     return rankings
+
+if __name__ == "__main__":
+    import sys
+    
+    command = sys.argv[1] if len(sys.argv) > 1 else 'init'
+    init_database()
+    
+    if command == 'rebuild-counters':
+        print(f"Rebuilt counters for {rebuild_user_counters()} users")
+    elif command == 'rebuild-streaks':
+        print(f"Rebuilt daily streaks for {rebuild_user_streaks()} users")
+    elif command == 'rebuild-leaderboard':
+        rebuild_leaderboard()
+        print("Rebuilt leaderboard")
+    elif command != 'init':
+        print("Usage: python database.py [init|rebuild-counters|rebuild-streaks|rebuild-leaderboard]")
+        sys.exit(1)
@@ -7,7 +7,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import get_db_connection
+from database import get_db_connection, rebuild_leaderboard
 
 def add_carol_achievements():
     conn = get_db_connection()
@@ -31,6 +31,7 @@ def add_carol_achievements():
     
     conn.commit()
     conn.close()
+    rebuild_leaderboard()
     print("Carol's achievements added!")
 
 if __name__ == "__main__":
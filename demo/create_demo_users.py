@@ -7,7 +7,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import get_db_connection, create_user
+from database import get_db_connection, create_user, rebuild_leaderboard
 import hashlib
 
 def create_demo_users_and_achievements():
@@ -70,6 +70,7 @@ def create_demo_users_and_achievements():
     
     conn.commit()
     conn.close()
+    rebuild_leaderboard()
     
     print("\nDemo users and achievements created!")
     
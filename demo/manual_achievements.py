@@ -7,7 +7,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database import get_db_connection
+from database import get_db_connection, rebuild_leaderboard
 
 def manually_unlock_achievements():
     """Manually unlock some achievements for demo user"""
@@ -58,6 +58,7 @@ def manually_unlock_achievements():
     ''', (user_id,)).fetchone()['total']
     
     conn.close()
+    rebuild_leaderboard()
     
     print(f"\nDemo user now has {total_points} total achievement points!")
 
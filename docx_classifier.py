@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Paragraph classifier for the DOCX ingestion loop
+
+classify_paragraph() looks at a paragraph once and returns a Token naming
+what it is (story title, chapter title, vocabulary header, quiz header,
+quiz line, answer option or body text). FolktaleApp.parse_docx_content is
+the state machine that consumes the tokens.
+
+The rules, in priority order:
+
+- story title: has runs and either a bold first run with under 50
+  characters, or all-uppercase text
+- chapter: starts with "chapter N" / "capítulo N" (any case)
+- vocabulary header: mentions vocabulary, vocabulário, key words,
+  palavras-chave or glossary
+- option: starts with "A)" .. "D)"
+- quiz line: starts with "N.", or has a ✅ marker, a "[resposta:" tag,
+  "Q:" with a "?", or both "A)" and "B)"
+- quiz header: mentions quiz or question
+- body: anything else
+
+iter_story_sections() groups the tokens by story and section_hash()
+fingerprints a story's tokens, so reconversion can skip stories whose
+source did not change.
+"""
+
+import hashlib
+import re
+from collections import namedtuple
+
+STORY_TITLE = 'story_title'
+CHAPTER = 'chapter'
+VOCABULARY_HEADER = 'vocabulary_header'
+QUIZ_HEADER = 'quiz_header'
+QUIZ_LINE = 'quiz_line'
+OPTION = 'option'
+BODY = 'body'
+
+# Bump when the classification or parsing rules change, so stored section
+# hashes stop matching and every story is parsed again
+PARSER_VERSION = 1
+
+# number is the chapter number for CHAPTER tokens, None otherwise
+Token = namedtuple('Token', ['kind', 'text', 'number'])
+
+CHAPTER_TITLE = re.compile(r'(?:chapter|capítulo)\s+(\d+)')
+VOCABULARY_KEYWORDS = re.compile(r'vocabulary|vocabulário|key words|palavras-chave|glossary')
+QUIZ_KEYWORDS = re.compile(r'quiz|question')
+# "1." starts a question, "A)" an option
+QUIZ_PREFIX = re.compile(r'\d+\.|([A-D]\))')
+
+# Patterns used by FolktaleApp.parse_quiz_question
+QUESTION_START = re.compile(r'\d+\.')
+OPTION_START = re.compile(r'[A-D]\)')
+NUMBERED_QUESTION = re.compile(r'^\d+\.\s*(.+?)(?:\?|$)')
+LETTERED_OPTION = re.compile(r'^[a-d]\)\s*(.+?)(?:\s*✅)?$')
+CAPITAL_OPTION = re.compile(r'^[A-D]\)\s*(.+?)(?:\s*✅)?$')
+INLINE_OPTIONS = re.compile(r'[A-D]\)\s*([^A-D\[]+)')
+ANSWER_TAG = re.compile(r'resposta:\s*([A-D])')
+
+def classify_paragraph(paragraph):
+    """Token for a paragraph with .text and .runs, or None if it is blank"""
+    text = paragraph.text.strip()
+    if not text:
+        return None
+
+    runs = paragraph.runs
+    if runs and ((runs[0].bold and len(text) < 50) or text.isupper()):
+        return Token(STORY_TITLE, text, None)
+
+    lower = text.lower()
+    match = CHAPTER_TITLE.match(lower)
+    if match:
+        return Token(CHAPTER, text, int(match.group(1)))
+
+    if VOCABULARY_KEYWORDS.search(lower):
+        return Token(VOCABULARY_HEADER, text, None)
+
+    match = QUIZ_PREFIX.match(text)
+    if match:
+        return Token(OPTION if match.group(1) else QUIZ_LINE, text, None)
+
+    if ('✅' in text or '[resposta:' in lower or ('Q:' in text and '?' in text)
+            or ('A)' in text and 'B)' in text)):
+        return Token(QUIZ_LINE, text, None)
+
+    if QUIZ_KEYWORDS.search(lower):
+        return Token(QUIZ_HEADER, text, None)
+
+    return Token(BODY, text, None)
+
+def tokenize_paragraphs(paragraphs):
+    """Yield a Token for each non-blank paragraph"""
+    for paragraph in paragraphs:
+        token = classify_paragraph(paragraph)
+        if token is not None:
+            yield token
+
+def iter_story_sections(tokens):
+    """Group tokens into one list per story, each starting with its STORY_TITLE
+
+    Tokens before the first story title belong to no story and are dropped.
+    """
+    section = None
+    for token in tokens:
+        if token.kind == STORY_TITLE:
+            if section:
+                yield section
+            section = [token]
+        elif section is not None:
+            section.append(token)
+    if section:
+        yield section
+
+def section_hash(tokens):
+    """Content hash of a story section (what the parser sees, not the formatting)"""
+    digest = hashlib.sha1()
+    for token in tokens:
+        digest.update(f"{token.kind}\x1f{token.text}\x1e".encode('utf-8'))
+    return digest.hexdigest()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Streaming DOCX paragraph reader for Folktale Reader
+
+Reads the body paragraphs of a .docx straight from the zip with iterparse,
+without building the python-docx object tree. Each paragraph is released
+as soon as it has been read, so memory stays flat however long the
+manuscript gets.
+
+Only what the story parser needs is materialized: the paragraph text and
+the bold flag of its first run, with the same semantics as python-docx
+0.8.11 (Paragraph.text / Paragraph.runs[0].bold):
+
+- paragraphs are the w:p elements directly under w:body (not those in
+  tables or content controls)
+- runs are the w:r elements directly under the w:p (not those inside
+  hyperlinks or tracked insertions)
+- run text is w:t text, w:tab -> '\\t', w:br / w:cr -> '\\n'
+- bold is tri-state: None without w:rPr/w:b, else the w:b w:val flag
+"""
+
+import posixpath
+import zipfile
+from xml.etree import ElementTree
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+OFFICE_DOCUMENT_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+
+W_BODY = f'{{{W_NS}}}body'
+W_P = f'{{{W_NS}}}p'
+W_R = f'{{{W_NS}}}r'
+W_T = f'{{{W_NS}}}t'
+W_TAB = f'{{{W_NS}}}tab'
+W_BR = f'{{{W_NS}}}br'
+W_CR = f'{{{W_NS}}}cr'
+W_RPR = f'{{{W_NS}}}rPr'
+W_B = f'{{{W_NS}}}b'
+W_VAL = f'{{{W_NS}}}val'
+
+# ST_OnOff values python-docx reads as True
+TRUE_VALUES = ('1', 'true', 'on')
+
+class StreamedRun:
+    """First run of a streamed paragraph (only its bold flag is kept)"""
+
+    __slots__ = ('bold',)
+
+    def __init__(self, bold):
+        self.bold = bold
+
+class StreamedParagraph:
+    """Paragraph text plus its first run, duck-typed like python-docx's Paragraph
+
+    runs holds at most one StreamedRun: the parser only looks at runs[0].
+    """
+
+    __slots__ = ('text', 'runs')
+
+    def __init__(self, text, runs):
+        self.text = text
+        self.runs = runs
+
+def main_document_path(archive):
+    """Name of the main document part (usually word/document.xml)"""
+    try:
+        with archive.open('_rels/.rels') as rels:
+            for relationship in ElementTree.parse(rels).getroot():
+                if relationship.get('Type') == OFFICE_DOCUMENT_REL:
+                    return posixpath.normpath(relationship.get('Target').lstrip('/'))
+    except KeyError:
+        pass
+    return 'word/document.xml'
+
+def read_paragraph(p):
+    """Build a StreamedParagraph from a complete w:p element"""
+    text = []
+    first_run = None
+    for run in p.iterfind(W_R):
+        if first_run is None:
+            bold = None
+            rpr = run.find(W_RPR)
+            if rpr is not None:
+                b = rpr.find(W_B)
+                if b is not None:
+                    val = b.get(W_VAL)
+                    bold = True if val is None else val in TRUE_VALUES
+            first_run = StreamedRun(bold)
+
+        for child in run:
+            if child.tag == W_T:
+                if child.text is not None:
+                    text.append(child.text)
+            elif child.tag == W_TAB:
+                text.append('\t')
+            elif child.tag == W_BR or child.tag == W_CR:
+                text.append('\n')
+
+    return StreamedParagraph(''.join(text), (first_run,) if first_run is not None else ())
+
+def iter_docx_paragraphs(docx_path):
+    """Yield the body paragraphs of a .docx file, one at a time"""
+    with zipfile.ZipFile(docx_path) as archive:
+        with archive.open(main_document_path(archive)) as document:
+            open_elements = []
+            for event, element in ElementTree.iterparse(document, events=('start', 'end')):
+                if event == 'start':
+                    open_elements.append(element)
+                    continue
+
+                open_elements.pop()
+                parent = open_elements[-1] if open_elements else None
+                if parent is not None and parent.tag == W_BODY:
+                    if element.tag == W_P:
+                        yield read_paragraph(element)
+                    # Done with this block (paragraph, table, ...): drop it
+                    parent.remove(element)
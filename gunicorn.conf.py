@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Gunicorn settings for Folktale Reader (pre-fork, preloaded)
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('FOLKTALE_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('FOLKTALE_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('FOLKTALE_THREADS', 1))
+
+# Load the app (database migrations, frozen story catalog) once in the
+# master and fork workers from it (FOLKTALE_PRELOAD=0 loads it per worker)
+preload_app = os.environ.get('FOLKTALE_PRELOAD', '1') != '0'
+
+def pre_fork(server, worker):
+    """Close the master's SQLite connections so no worker inherits them"""
+    from database import close_db_connections
+    close_db_connections()
+
+def post_fork(server, worker):
+    server.log.info("Worker %s forked from preloaded master", worker.pid)
+
+def post_worker_init(worker):
+    """Start the assets/ watcher (FOLKTALE_WATCH_ASSETS) in each worker
+
+    Threads do not survive the fork, and each worker holds its own catalog
+    snapshot, so every worker watches and reloads for itself.
+    """
+    from app import create_folktale_app
+    create_folktale_app().start_asset_watcher()
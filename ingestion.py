@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+DOCX ingestion for Folktale Reader
+
+DocumentProcessor turns one .docx into stories. It keeps no parsing state
+on the instance (the multi-line quiz state lives in a local dict per
+story), so one processor can parse several documents, also from several
+threads, and documents can be parsed in worker processes with
+ingest_documents().
+
+merge_documents() combines the per-document results with the current
+catalog and its manifest: unchanged stories are reused, changed ones keep
+their id and new ones get ids that were never used before. IDs are
+assigned in file name order, then document order, so they do not depend
+on which worker finishes first.
+
+Parsed stories go through the text analysis stage (text_analysis.py)
+before they leave the worker, so the catalog carries each chapter's
+precomputed artifacts.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from atomic_file import atomic_write
+from catalog import thaw
+from docx_classifier import (tokenize_paragraphs, iter_story_sections, section_hash, PARSER_VERSION, CHAPTER,
+                             VOCABULARY_HEADER, QUIZ_HEADER, QUIZ_LINE, OPTION, QUESTION_START, OPTION_START,
+                             NUMBERED_QUESTION, LETTERED_OPTION, CAPITAL_OPTION, INLINE_OPTIONS, ANSWER_TAG)
+from docx_stream import iter_docx_paragraphs
+from text_analysis import analysis_version, analyze_story
+
+def list_docx_files(directory):
+    """The .docx files in directory, sorted by name (Word lock files skipped)"""
+    return sorted(path for path in Path(directory).glob('*.docx') if not path.name.startswith('~$'))
+
+def manifest_current(manifest):
+    """True if the manifest's stories were parsed and analyzed the way this version would"""
+    return (manifest.get('parser_version') == PARSER_VERSION
+            and manifest.get('analysis_version') == analysis_version())
+
+def file_hash(path):
+    """SHA-256 of a file, to skip documents whose bytes did not change"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class DocumentProcessor:
+    """Parser for one DOCX manuscript
+
+    docx_path is the document to read; json_path, if given, is where
+    force_reconvert_docx() writes the parsed stories.
+    """
+
+    def __init__(self, docx_path=None, json_path=None):
+        self.docx_path = Path(docx_path) if docx_path else None
+        self.json_path = Path(json_path) if json_path else None
+
+    def parse_paragraphs(self, paragraphs):
+        """Parse paragraphs (python-docx or docx_stream) into {story id: story}, ids from 1"""
+        stories = {}
+        for section in iter_story_sections(tokenize_paragraphs(paragraphs)):
+            story_id = len(stories) + 1
+            stories[story_id] = self.parse_story_section(section, story_id)
+        return stories
+
+    def parse_sections(self, known_hashes=frozenset()):
+        """Parse the document into a list of (title, hash, story) per story section
+
+        Sections whose hash is in known_hashes are not parsed (story is None):
+        the caller already has that story. Parsed stories have id None and
+        carry their text analysis artifacts.
+        """
+        sections = []
+        tokens = tokenize_paragraphs(iter_docx_paragraphs(self.docx_path))
+        for section in iter_story_sections(tokens):
+            digest = section_hash(section)
+            story = None if digest in known_hashes else analyze_story(self.parse_story_section(section))
+            sections.append((section[0].text, digest, story))
+        return sections
+
+    def force_reconvert_docx(self):
+        """Parse the whole document and write it to json_path; False if the DOCX is missing"""
+        if not self.docx_path or not self.docx_path.exists():
+            print(f"DOCX file not found: {self.docx_path}")
+            return False
+
+        stories = self.parse_paragraphs(iter_docx_paragraphs(self.docx_path))
+        for story in stories.values():
+            analyze_story(story)
+        data = {
+            'stories': stories,
+            'conversion_info': {
+                'conversion_timestamp': datetime.now().isoformat(),
+                'source_file': self.docx_path.name,
+                'stories_count': len(stories),
+                'docx_last_modified': datetime.fromtimestamp(self.docx_path.stat().st_mtime).isoformat()
+            },
+            'version': '2.0'
+        }
+        # Readers of json_path see the old file or the new one, never a partial write
+        with atomic_write(self.json_path, prefix='.stories_', suffix='.json') as temp_path:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+
+        print(f"Converted {self.docx_path} to {self.json_path} ({len(stories)} stories)")
+        return True
+
+    def parse_story_section(self, tokens, story_id=None):
+        """Builds one story from its tokens (the first one is the story title)"""
+        # Multi-line quiz questions waiting for their options
+        pending = {'question': None, 'options': [], 'correct': -1}
+
+        story = {
+            'id': story_id,
+            'title': tokens[0].text,
+            'chapters': {},
+            'total_chapters': 0
+        }
+        current_chapter = None
+        current_section = None
+
+        for token in tokens[1:]:
+            kind = token.kind
+            text = token.text
+
+            # Capítulo
+            if kind == CHAPTER:
+                chapter_num = token.number
+                story['chapters'][chapter_num] = {
+                    'title': text,
+                    'content': '',
+                    'quiz': [],
+                    'vocabulary': []
+                }
+                story['total_chapters'] = max(story['total_chapters'], chapter_num)
+                current_chapter = chapter_num
+                current_section = 'content'
+
+            # Nada antes do primeiro capítulo entra na história
+            elif not current_chapter:
+                continue
+
+            # Seção de vocabulário
+            elif kind == VOCABULARY_HEADER:
+                current_section = 'vocabulary'
+
+            # Seção de quiz; questões e opções são processadas imediatamente
+            elif kind in (QUIZ_HEADER, QUIZ_LINE, OPTION):
+                current_section = 'quiz'
+                if kind != QUIZ_HEADER:
+                    self.parse_quiz_question(text, story['chapters'][current_chapter]['quiz'], pending)
+
+            # Adiciona conteúdo
+            elif current_section == 'content':
+                story['chapters'][current_chapter]['content'] += text + '\n'
+            elif current_section == 'vocabulary':
+                self.parse_vocabulary_entry(text, story['chapters'][current_chapter]['vocabulary'])
+            elif current_section == 'quiz':
+                self.parse_quiz_question(text, story['chapters'][current_chapter]['quiz'], pending)
+
+        return story
+
+    def parse_vocabulary_entry(self, text, vocabulary_list):
+        """Parse de entrada de vocabulário do DOCX"""
+        # Formatos suportados:
+        # "- word = tradução"
+        # "word: tradução"
+        # "word - tradução"
+        # "word = tradução"
+
+        # Remove marcadores de lista
+        text = re.sub(r'^[-•*]\s*', '', text.strip())
+
+        # Tenta diferentes separadores
+        separators = [' = ', ': ', ' - ', ' – ', ' → ', ' -> ']
+
+        for separator in separators:
+            if separator in text:
+                parts = text.split(separator, 1)
+                if len(parts) == 2:
+                    word = parts[0].strip()
+                    translation = parts[1].strip()
+
+                    # Remove caracteres extras
+                    word = re.sub(r'[^\w\s]', '', word).strip()
+                    translation = re.sub(r'[^\w\s]', '', translation).strip()
+
+                    if word and translation and len(word) > 1:
+                        # Busca contexto no conteúdo do capítulo (se disponível)
+                        context = f"Used in the context of this chapter."
+
+                        vocabulary_list.append({
+                            'word': word.capitalize(),
+                            'translation': translation.lower(),
+                            'context': context
+                        })
+                    break
+
+    def parse_quiz_question(self, text, quiz_list, pending):
+        """Enhanced quiz parsing supporting multiple formats
+
+        pending carries a multi-line question (format 3) between calls.
+        """
+        text = text.strip()
+        if not text:
+            return
+
+        # Format 1: New format with numbered questions and ✅ markers
+        # Example: "1. What is Boitatá?\n   a) A dog\n   b) A snake made of fire ✅\n   c) A bird"
+        if QUESTION_START.match(text):
+            lines = text.split('\n')
+            question_line = lines[0]
+
+            # Extract question
+            question_match = NUMBERED_QUESTION.match(question_line)
+            if not question_match:
+                return
+
+            question = question_match.group(1).strip()
+            if not question.endswith('?'):
+                question += '?'
+
+            # Extract options from subsequent lines
+            options = []
+            correct_index = -1
+
+            for line in lines[1:]:
+                line = line.strip()
+                if not line:
+                    continue
+
+                # Match option patterns: a) text ✅ or a) text
+                option_match = LETTERED_OPTION.match(line)
+                if option_match:
+                    option_text = option_match.group(1).strip()
+                    options.append(option_text)
+
+                    # Check if this is the correct answer
+                    if '✅' in line:
+                        correct_index = len(options) - 1
+
+            # Add question if we have enough options and a correct answer
+            if len(options) >= 2 and correct_index >= 0:
+                quiz_list.append({
+                    'question': question,
+                    'options': options,
+                    'correct': correct_index
+                })
+                return
+
+        # Format 2: Old format with [resposta: X] pattern
+        # Example: "Q: How many legs does the Saci have? A) Two B) One C) Three [resposta: B]"
+        if 'Q:' in text or ('?' in text and any(marker in text for marker in ['A)', 'B)', 'C)', 'D)'])):
+            question_data = {
+                'question': '',
+                'options': [],
+                'correct': 0
+            }
+
+            # Extract question
+            if '?' in text:
+                question_data['question'] = text.split('?')[0].strip()
+                if 'Q:' in question_data['question']:
+                    question_data['question'] = question_data['question'].split('Q:')[1].strip()
+                question_data['question'] += '?'
+
+                rest = text.split('?', 1)[1] if '?' in text else text
+
+                # Extract options using regex
+                options = INLINE_OPTIONS.findall(rest)
+                question_data['options'] = [opt.strip() for opt in options[:4]]
+
+                # Extract correct answer
+                correct_match = ANSWER_TAG.search(text.lower())
+                if correct_match:
+                    correct_letter = correct_match.group(1).upper()
+                    question_data['correct'] = ord(correct_letter) - ord('A')
+
+                if len(question_data['options']) >= 2:
+                    quiz_list.append(question_data)
+                    return
+
+        # Format 3: Multi-line format where options are on separate lines
+        # Look for questions that might be split across multiple paragraphs
+        if '?' in text and not any(marker in text for marker in ['A)', 'B)', 'C)', 'D)']):
+            # This might be a question header, store it for potential combination with following options
+            pending['question'] = text.strip()
+            if not pending['question'].endswith('?'):
+                pending['question'] += '?'
+            return
+
+        # Check if this line contains options for a pending question
+        if pending['question']:
+            # Look for option patterns
+            if OPTION_START.match(text) or '✅' in text:
+                option_match = CAPITAL_OPTION.match(text)
+                if option_match:
+                    option_text = option_match.group(1).strip()
+                    pending['options'].append(option_text)
+
+                    if '✅' in text:
+                        pending['correct'] = len(pending['options']) - 1
+
+                # If we have enough options, create the quiz question
+                if len(pending['options']) >= 2 and pending['correct'] >= 0:
+                    quiz_list.append({
+                        'question': pending['question'],
+                        'options': pending['options'],
+                        'correct': pending['correct']
+                    })
+
+                    # Reset pending data
+                    pending['question'] = None
+                    pending['options'] = []
+                    pending['correct'] = -1
+
+def ingest_document(docx_path, known_hashes=frozenset()):
+    """Parse one document (runs in a worker process); see DocumentProcessor.parse_sections"""
+    return DocumentProcessor(docx_path).parse_sections(known_hashes)
+
+def ingest_documents(docx_paths, known_hashes=frozenset(), workers=None):
+    """Parse several documents, in a process pool when there is more than one
+
+    Returns the parse_sections() results in the order of docx_paths.
+    Workers are spawned, not forked: the app calls this while its own
+    threads (activity writer, pooled SQLite connections) are running.
+    """
+    docx_paths = list(docx_paths)
+    workers = min(workers or os.cpu_count() or 1, len(docx_paths))
+    if workers <= 1:
+        return [ingest_document(path, known_hashes) for path in docx_paths]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return list(pool.map(ingest_document, docx_paths, [known_hashes] * len(docx_paths)))
+
+def ingest_catalog(docx_paths, stories, manifest, workers=None):
+    """Bring the catalog up to date with docx_paths, parsing only what changed
+
+    Documents whose file hash matches the manifest are not read at all; the
+    others are parsed in parallel, skipping story sections whose content
+    hash is already known. Returns merge_documents()'s (stories, manifest,
+    changes).
+    """
+    manifest = manifest or {}
+    hashes_valid = manifest_current(manifest)
+    old_documents = manifest.get('documents') or {}
+    known_hashes = frozenset(
+        entry['hash'] for document in old_documents.values() for entry in document['stories']
+        if hashes_valid and entry['id'] in stories
+    )
+
+    source_hashes = [file_hash(path) for path in docx_paths]
+    to_parse = []
+    for path, source_hash in zip(docx_paths, source_hashes):
+        old = old_documents.get(path.name)
+        unchanged = (hashes_valid and old is not None and old['source_hash'] == source_hash
+                     and all(entry['id'] in stories for entry in old['stories']))
+        if not unchanged:
+            to_parse.append(path)
+
+    parsed = dict(zip(to_parse, ingest_documents(to_parse, known_hashes, workers))) if to_parse else {}
+    documents = [(path.name, source_hash, parsed.get(path))
+                 for path, source_hash in zip(docx_paths, source_hashes)]
+    return merge_documents(documents, stories, manifest)
+
+def merge_documents(documents, stories, manifest):
+    """Combine parsed documents with the current catalog
+
+    documents: (file name, file hash, sections) in file name order, where
+    sections come from parse_sections(), or are None for a document whose
+    file hash matches the manifest (all of its stories are unchanged).
+    stories: the current {story id: story}. manifest: the current manifest
+    (or None).
+
+    Matching goes same content first (preferring the same file), then
+    same title, then a fresh id.
+    Returns (stories, manifest, changes), where changes has 'added',
+    'changed' and 'removed' lists of {'id', 'title'} and an 'unchanged'
+    count.
+    """
+    manifest = manifest or {}
+    hashes_valid = manifest_current(manifest)
+    old_documents = manifest.get('documents') or {}
+
+    # Without a manifest entry (older JSON) a story can only be matched by title
+    old_entries = [dict(entry, document=name) for name, document in old_documents.items()
+                   for entry in document['stories'] if entry['id'] in stories]
+    listed = {entry['id'] for entry in old_entries}
+    old_entries += [{'id': story_id, 'title': story['title'], 'hash': None, 'document': None}
+                    for story_id, story in stories.items() if story_id not in listed]
+    if not hashes_valid:
+        for entry in old_entries:
+            entry['hash'] = None
+    stories_by_hash = {entry['hash']: stories[entry['id']] for entry in old_entries if entry['hash']}
+
+    # One row per story section: (file name, title, hash, parsed story)
+    rows = []
+    for name, source_hash, sections in documents:
+        if sections is None:
+            sections = [(entry['title'], entry['hash'], None) for entry in old_documents[name]['stories']]
+        rows.extend((name, title, digest, story) for title, digest, story in sections)
+
+    # Same file and content, same content (moved between files), same file
+    # and title, same title; entries without a file only match by title
+    passes = (
+        ('unchanged', lambda name, title, digest: (name, digest)),
+        ('unchanged', lambda name, title, digest: digest),
+        ('changed', lambda name, title, digest: (name, title)),
+        ('changed', lambda name, title, digest: title),
+    )
+    entry_keys = (
+        lambda entry: (entry['document'], entry['hash']) if entry['hash'] else None,
+        lambda entry: entry['hash'],
+        lambda entry: (entry['document'], entry['title']) if entry['document'] else None,
+        lambda entry: entry['title'],
+    )
+    assigned = [None] * len(rows)
+    used = set()
+    for (status, row_key), entry_key in zip(passes, entry_keys):
+        candidates = {}
+        for entry in old_entries:
+            key = entry_key(entry)
+            if key is not None and entry['id'] not in used:
+                candidates.setdefault(key, []).append(entry)
+        for index, (name, title, digest, story) in enumerate(rows):
+            if assigned[index] is None:
+                waiting = candidates.get(row_key(name, title, digest))
+                while waiting and waiting[0]['id'] in used:
+                    waiting.pop(0)
+                if waiting:
+                    match = waiting.pop(0)
+                    assigned[index] = (match['id'], status)
+                    used.add(match['id'])
+    unused = [entry for entry in old_entries if entry['id'] not in used]
+
+    known_ids = [entry['id'] for entry in old_entries] + list(stories)
+    next_id = max([manifest.get('next_story_id', 1)] + [story_id + 1 for story_id in known_ids])
+
+    changes = {'added': [], 'changed': [], 'removed': [], 'unchanged': 0}
+    merged = {}
+    new_documents = {name: {'source_hash': source_hash, 'stories': []} for name, source_hash, sections in documents}
+    for index, (name, title, digest, story) in enumerate(rows):
+        if assigned[index] is None:
+            assigned[index] = (next_id, 'added')
+            next_id += 1
+        story_id, status = assigned[index]
+
+        if status == 'unchanged':
+            merged[story_id] = stories[story_id]
+            changes['unchanged'] += 1
+        else:
+            if story is None:
+                # Same content as a story we already have, under another id
+                story = thaw(stories_by_hash[digest])
+            story['id'] = story_id
+            merged[story_id] = story
+            changes[status].append({'id': story_id, 'title': title})
+        new_documents[name]['stories'].append({'id': story_id, 'title': title, 'hash': digest})
+
+    changes['removed'] = [{'id': entry['id'], 'title': entry['title']} for entry in unused]
+    new_manifest = {
+        'parser_version': PARSER_VERSION,
+        'analysis_version': analysis_version(),
+        'next_story_id': next_id,
+        'documents': new_documents
+    }
+    return merged, new_manifest, changes
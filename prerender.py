@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Batch pre-rendering of chapter audio for Folktale Reader
+
+    python prerender.py [story_id ...]
+
+Synthesizes, with the configured TTS backend (FOLKTALE_TTS_BACKEND), every
+chapter of the catalog (or of the given stories) whose audio is not in the
+audio cache yet. Chapters are rendered in a process pool
+(FOLKTALE_TTS_WORKERS, 0 = one per core); a chapter that fails is reported
+and the others go on.
+
+Run it after deploying (and with FOLKTALE_TTS_PRERENDER=1 the server runs
+it by itself for the stories a DOCX reload added or changed), so that with
+FOLKTALE_TTS_INLINE=0 /api/audio only ever serves files from the cache.
+"""
+
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from audio_cache import AudioCache
+
+def chapter_texts(stories, backend, story_ids=None):
+    """{cache key: chapter text} of the stories (or only story_ids), in catalog order
+
+    Chapters with the same text share one key, so they are rendered once.
+    """
+    texts = {}
+    for story_id, story in stories.items():
+        if story_ids is not None and story_id not in story_ids:
+            continue
+        for chapter in story['chapters'].values():
+            text = chapter.get('content', '')
+            if text.strip():
+                texts.setdefault(backend.cache_key(text), text)
+    return texts
+
+# Backend and cache of a worker process (set by _init_worker)
+_worker = None
+
+def _init_worker(backend, directory, max_bytes):
+    global _worker
+    _worker = (backend, AudioCache(directory, max_bytes=max_bytes, suffix=backend.suffix))
+
+def render_chapter(backend, cache, key, text):
+    """Render one chapter into the cache; returns None or the error message"""
+    try:
+        cache.get_or_create(key, lambda path: backend.synthesize(text, path))
+        return None
+    except Exception as e:
+        return str(e) or type(e).__name__
+
+def _render_in_worker(job):
+    backend, cache = _worker
+    return render_chapter(backend, cache, *job)
+
+def prerender_catalog(stories, backend, cache, story_ids=None, workers=None):
+    """Render the audio missing from cache for stories (or only story_ids)
+
+    Returns {'rendered', 'failed', 'cached'} chapter counts (chapters
+    with the same text count once).
+    """
+    if story_ids is not None:
+        story_ids = set(story_ids)
+    texts = chapter_texts(stories, backend, story_ids)
+    # find() also marks the cached files as recently used; it does not
+    # count towards the hit rate of requests
+    jobs = [(key, text) for key, text in texts.items() if cache.find(key) is None]
+
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers <= 1:
+        errors = [render_chapter(backend, cache, key, text) for key, text in jobs]
+    else:
+        # Spawned, not forked: the server runs this from a thread while
+        # its other threads may hold locks or SQLite connections
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(backend, str(cache.directory), cache.max_bytes)) as pool:
+            errors = list(pool.map(_render_in_worker, jobs))
+        # The workers wrote to the directory through their own caches
+        cache.refresh()
+
+    failed = 0
+    for (key, text), error in zip(jobs, errors):
+        if error is not None:
+            failed += 1
+            print(f"Audio pre-render failed for {text[:40]!r}...: {error}")
+    return {'rendered': len(jobs) - failed, 'failed': failed, 'cached': len(texts) - len(jobs)}
+
+def main(args):
+    from app import create_folktale_app
+
+    folktale_app = create_folktale_app()
+    story_ids = [int(arg) for arg in args] or None
+    report = folktale_app.prerender_audio(story_ids)
+    print(f"Audio pre-render ({folktale_app.tts_backend.name}): {report['rendered']} rendered, "
+          f"{report['cached']} already cached, {report['failed']} failed")
+    return 1 if report['failed'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Full-text search over the story catalog for Folktale Reader
+
+The story_search FTS5 table (database migration 8) holds one row per
+story title, chapter, vocabulary entry (from the DOCX or from text
+analysis) and quiz question. index_catalog()
+keeps it in line with the published catalog: stories are re-indexed only
+when their content hash changes (the manifest hash for converted DOCX
+stories), so a reload touches just the stories that changed.
+
+Rows of a story use rowids story_id << 24 onwards, so dropping a story
+is a rowid range delete instead of a scan of the whole index.
+"""
+
+import hashlib
+import html
+import json
+import re
+
+from catalog import thaw
+from database import get_db_connection
+
+# Bump when the row layout changes, so every story is indexed again
+INDEX_VERSION = 2
+
+ROWID_BITS = 24
+MAX_QUERY_TERMS = 8
+TERM = re.compile(r'\w+')
+
+# Column weights for bm25(): kind, story_id, chapter, title, body
+RANK = 'bm25(story_search, 0, 0, 0, 4.0, 1.0)'
+
+# Highlight markers; replaced by <mark> once the text is HTML-escaped
+MARK_START, MARK_END = '\x02', '\x03'
+
+def chapter_vocabulary(chapter):
+    """Vocabulary entries of a chapter: the DOCX section, then the lexicon
+    terms found by text analysis, one entry per word
+    """
+    seen = set()
+    analysis = chapter.get('analysis') or {}
+    for item in list(chapter.get('vocabulary', ())) + list(analysis.get('vocabulary', ())):
+        word = item.get('word', '')
+        if word.lower() not in seen:
+            seen.add(word.lower())
+            yield item
+
+def story_rows(story_id, story):
+    """(kind, chapter, title, body) rows indexed for one story"""
+    yield 'story', None, story['title'], ''
+    for number, chapter in story['chapters'].items():
+        yield 'chapter', number, chapter.get('title', ''), chapter.get('content', '')
+        for item in chapter_vocabulary(chapter):
+            yield 'vocabulary', number, item.get('word', ''), item.get('translation', '')
+        for question in chapter.get('quiz', ()):
+            yield 'quiz', number, question.get('question', ''), ' / '.join(question.get('options', ()))
+
+def content_hashes(stories, manifest=None):
+    """{story id: hash} of what the index should hold for each story
+
+    Converted stories use their manifest hash and the manifest's analysis
+    version (the analysis vocabulary is indexed too, and changes with the
+    lexicon), so checking the index does not decode any chapter; other
+    stories (the built-in examples) are hashed from their content,
+    analysis included.
+    """
+    analysis = (manifest or {}).get('analysis_version')
+    known = {}
+    for document in ((manifest or {}).get('documents') or {}).values():
+        for entry in document['stories']:
+            if entry['hash']:
+                known[entry['id']] = f"{analysis}:{entry['hash']}"
+
+    hashes = {}
+    for story_id, story in stories.items():
+        digest = known.get(story_id)
+        if digest is None:
+            digest = hashlib.sha1(json.dumps(thaw(story), sort_keys=True, ensure_ascii=False,
+                                             default=str).encode('utf-8')).hexdigest()
+        hashes[story_id] = f'{INDEX_VERSION}:{digest}'
+    return hashes
+
+def index_catalog(stories, manifest=None):
+    """Re-index the stories that changed and drop the ones that are gone
+
+    Returns (indexed, removed) story counts; (0, 0) when the index is
+    already up to date, which costs one read of story_search_state.
+    """
+    hashes = content_hashes(stories, manifest)
+    conn = get_db_connection()
+    try:
+        def pending():
+            indexed = {row['story_id']: row['content_hash']
+                       for row in conn.execute('SELECT story_id, content_hash FROM story_search_state')}
+            stale = [story_id for story_id, digest in hashes.items() if indexed.get(story_id) != digest]
+            removed = [story_id for story_id in indexed if story_id not in hashes]
+            return stale, removed
+
+        stale, removed = pending()
+        if not stale and not removed:
+            return 0, 0
+
+        # Another worker may have indexed the same stories while we waited
+        conn.execute('BEGIN IMMEDIATE')
+        stale, removed = pending()
+        for story_id in stale + removed:
+            conn.execute('DELETE FROM story_search WHERE rowid BETWEEN ? AND ?',
+                         (story_id << ROWID_BITS, ((story_id + 1) << ROWID_BITS) - 1))
+            conn.execute('DELETE FROM story_search_state WHERE story_id = ?', (story_id,))
+        for story_id in stale:
+            conn.executemany('''
+                INSERT INTO story_search (rowid, kind, story_id, chapter, title, body)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [((story_id << ROWID_BITS) + seq, kind, story_id, chapter, title, body)
+                  for seq, (kind, chapter, title, body) in enumerate(story_rows(story_id, stories[story_id]))])
+            conn.execute('INSERT INTO story_search_state (story_id, content_hash) VALUES (?, ?)',
+                         (story_id, hashes[story_id]))
+        conn.commit()
+        return len(stale), len(removed)
+    except Exception:
+        if conn.in_transaction:
+            conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def match_query(text):
+    """FTS5 query for what the user typed: every word, as a prefix
+
+    Words are quoted, so FTS5 operators and punctuation in the input are
+    searched as plain text. Returns '' when there is nothing to search.
+    """
+    terms = TERM.findall(text)[:MAX_QUERY_TERMS]
+    return ' '.join(f'"{term}"*' for term in terms)
+
+def marked_html(text):
+    """HTML-escape text and turn the highlight markers into <mark> tags"""
+    return html.escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+def search_catalog(text, limit=20):
+    """Best matches for text, ranked by bm25 (title matches weigh more)
+
+    Returns dicts with kind ('story', 'chapter', 'vocabulary' or 'quiz'),
+    story_id, chapter, and title and snippet as HTML with <mark> around
+    the matched words.
+    """
+    query = match_query(text)
+    if not query:
+        return []
+
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(f'''
+            SELECT kind, story_id, chapter,
+                   highlight(story_search, 3, ?, ?) AS title,
+                   snippet(story_search, 4, ?, ?, '…', 16) AS snippet,
+                   {RANK} AS score
+            FROM story_search
+            WHERE story_search MATCH ?
+            ORDER BY score
+            LIMIT ?
+        ''', (MARK_START, MARK_END, MARK_START, MARK_END, query, limit)).fetchall()
+    finally:
+        conn.close()
+
+    return [{
+        'kind': row['kind'],
+        'story_id': row['story_id'],
+        'chapter': row['chapter'],
+        'title': marked_html(row['title']),
+        'snippet': marked_html(row['snippet']),
+        'score': round(-row['score'], 3)
+    } for row in rows]
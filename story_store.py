@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Compact, memory-mapped story store for Folktale Reader
+
+stories_data.json has to be parsed in full at startup, and every chapter
+then stays in memory whether anyone reads it or not. The store keeps the
+same catalog in one binary file:
+
+    MAGIC | index length (8 bytes) | index (JSON) | chapter blobs
+
+The index holds the manifest, each story's fields and the offset and
+length of each chapter's blob (the chapter as compact JSON). Opening the
+store reads only the index; the rest of the file is memory-mapped and a
+chapter is decoded the first time it is read, with the most recently
+used chapters kept in a small LRU. The mapped pages belong to the page
+cache, so forked workers share them.
+
+The JSON stays the editable interchange format; the store is rebuilt
+from it whenever it is missing or older than the JSON.
+"""
+
+import json
+import mmap
+import os
+import struct
+
+from atomic_file import atomic_write
+from cache import LRUCache
+from catalog import FrozenMapping, freeze, thaw
+
+MAGIC = b'FTSTORE1'
+HEADER = struct.Struct('<8sQ')
+
+class StoreFormatError(ValueError):
+    """The file is not a story store written by this version"""
+
+def write_story_store(path, stories, manifest=None):
+    """Write {story id: story} (and the manifest) to path as a story store
+
+    Writes a temporary file and renames it over path. A process that has
+    the old store mapped keeps reading the old file.
+    """
+    index_stories = []
+    blobs = []
+    offset = 0
+    for story_id, story in stories.items():
+        chapters = []
+        for number, chapter in story.get('chapters', {}).items():
+            blob = json.dumps(thaw(chapter), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            chapters.append([int(number), offset, len(blob)])
+            blobs.append(blob)
+            offset += len(blob)
+        fields = {key: thaw(value) for key, value in story.items() if key != 'chapters'}
+        index_stories.append([int(story_id), fields, chapters])
+
+    index = json.dumps({'stories': index_stories, 'manifest': thaw(manifest) if manifest else None},
+                       ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    with atomic_write(path, prefix='.stories_', suffix='.store') as temp_path:
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, len(index)))
+            f.write(index)
+            for blob in blobs:
+                f.write(blob)
+
+class StoryStore:
+    """Read side of a story store: stories decoded lazily from the mapped file
+
+    stories maps story id -> LazyStory and can be published like any
+    other catalog (see FolktaleApp.publish_catalog). The mapping stays
+    open as long as a story from it is referenced.
+    """
+
+    def __init__(self, path, cache_size=256):
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise StoreFormatError(f"{path} is too short to be a story store")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, index_length = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise StoreFormatError(f"{path} is not a story store")
+        index_end = HEADER.size + index_length
+        index = json.loads(self._map[HEADER.size:index_end])
+
+        self.path = path
+        self.chapters = LRUCache(capacity=cache_size)
+        self.manifest = index['manifest']
+        self.stories = {}
+        for story_id, fields, chapters in index['stories']:
+            spans = {number: (index_end + offset, length) for number, offset, length in chapters}
+            self.stories[story_id] = LazyStory(freeze(fields), LazyChapters(self, spans))
+
+    def read_chapter(self, start, length):
+        """Decoded (frozen) chapter stored at start, from the LRU when possible"""
+        key = ('chapter', start)
+        chapter = self.chapters.get(key)
+        if chapter is None:
+            chapter = freeze(json.loads(self._map[start:start + length]))
+            self.chapters.set(key, chapter)
+        return chapter
+
+    def __repr__(self):
+        return f"StoryStore({self.path!r}, {len(self.stories)} stories)"
+
+class LazyChapters(FrozenMapping):
+    """Chapter number -> chapter, decoded from the store on access"""
+
+    __slots__ = ('_store', '_spans')
+
+    def __init__(self, store, spans):
+        self._store = store
+        self._spans = spans
+
+    def __getitem__(self, number):
+        start, length = self._spans[number]
+        return self._store.read_chapter(start, length)
+
+    def __contains__(self, number):
+        return number in self._spans
+
+    def __iter__(self):
+        return iter(self._spans)
+
+    def __len__(self):
+        return len(self._spans)
+
+class LazyStory(FrozenMapping):
+    """A story whose fields are in memory and whose chapters are decoded on access"""
+
+    __slots__ = ('_fields', '_chapters')
+
+    def __init__(self, fields, chapters):
+        self._fields = fields
+        self._chapters = chapters
+
+    def __getitem__(self, key):
+        if key == 'chapters':
+            return self._chapters
+        return self._fields[key]
+
+    def __contains__(self, key):
+        return key == 'chapters' or key in self._fields
+
+    def __iter__(self):
+        yield from self._fields
+        yield 'chapters'
+
+    def __len__(self):
+        return len(self._fields) + 1
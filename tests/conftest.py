@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the tests (also imported by the test files when they
+run as scripts)
+"""
+
+import contextlib
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TESTS = os.path.join(ROOT, 'tests')
+
+sys.path.append(ROOT)
+
+import database
+
+@contextlib.contextmanager
+def throwaway_database(initialize=True):
+    """Point database.py (and the in-memory leaderboard) at a new database file
+
+    Yields the file's path, migrated unless initialize is false; the
+    previous database is in use again afterwards. Pooled connections are
+    per file, so they are closed on the way in and out.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix='folktale_test_'), 'folktale_test.db')
+    previous = database.DATABASE_FILE
+    database.close_db_connections()
+    database.DATABASE_FILE = path
+    database.leaderboard.reset()
+    try:
+        if initialize:
+            database.init_database()
+        yield path
+    finally:
+        database.close_db_connections()
+        database.DATABASE_FILE = previous
+        database.leaderboard.reset()
+
+@pytest.fixture
+def database_file():
+    """Path of the migrated throwaway database the test runs against"""
+    with throwaway_database() as path:
+        yield path
+
+def run_with_database(*tests):
+    """Run tests that take database_file outside pytest (python tests/test_x.py)"""
+    for test in tests:
+        with throwaway_database() as path:
+            test(path)
+
+def create_player(name, password='secret123'):
+    """Create a regular user; returns its id"""
+    created, message = database.create_user(name, password)
+    assert created, message
+    authenticated, user = database.authenticate_user(name, password)
+    return user['id']
+
+def run_with_app_main(code, env=None):
+    """Run code in a new interpreter whose __main__ is app.py, as under `python app.py`
+
+    Only the main module's file is borrowed (app.run() never starts), but
+    that is what spawned pool workers re-import, as __mp_main__. Returns
+    the CompletedProcess; a failing code raises with its output.
+    """
+    prelude = (
+        'import sys\n'
+        f'sys.path[:0] = [{ROOT!r}, {TESTS!r}]\n'
+        f"sys.modules['__main__'].__file__ = {os.path.join(ROOT, 'app.py')!r}\n"
+    )
+    result = subprocess.run([sys.executable, '-c', prelude + code], cwd=ROOT, env=dict(os.environ, **(env or {})),
+                            capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result
@@ -1,10 +1,19 @@
 #!/usr/bin/env python3
 """
-Test script to verify achievement system setup
+Test script to verify achievement system setup, and the daily streak
+transitions (on a throwaway database)
 """
 
+import os
 import sqlite3
 import json
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from conftest import run_with_database
 from database import get_db_connection, init_database
 
 def test_achievements_db():
@@ -48,5 +57,65 @@ def test_achievements_db():
     conn.close()
     print("\nDatabase test completed successfully!")
 
+def streak(conn, user_id):
+    row = conn.execute('SELECT current_streak, longest_streak, last_active_date FROM user_counters '
+                       'WHERE user_id = ?', (user_id,)).fetchone()
+    return tuple(row) if row else None
+
+def test_streak_transitions(database_file):
+    conn = database.get_db_connection()
+    try:
+        assert database.record_activity_day(conn, 7, '2026-03-01')
+        assert streak(conn, 7) == (1, 1, '2026-03-01')
+        # Same day: no write
+        assert not database.record_activity_day(conn, 7, '2026-03-01')
+        # Next days extend the streak
+        assert database.record_activity_day(conn, 7, '2026-03-02')
+        assert database.record_activity_day(conn, 7, '2026-03-03')
+        assert streak(conn, 7) == (3, 3, '2026-03-03')
+        # A gap resets the current streak; the longest one stays
+        assert database.record_activity_day(conn, 7, '2026-03-05')
+        assert streak(conn, 7) == (1, 3, '2026-03-05')
+        # A late event older than last_active_date changes nothing
+        assert not database.record_activity_day(conn, 7, '2026-03-04')
+        assert streak(conn, 7) == (1, 3, '2026-03-05')
+        # Month boundary counts as consecutive
+        database.record_activity_day(conn, 8, '2026-02-28')
+        database.record_activity_day(conn, 8, '2026-03-01')
+        assert streak(conn, 8) == (2, 2, '2026-03-01')
+        conn.commit()
+    finally:
+        conn.close()
+
+def test_streak_rebuild_matches_incremental(database_file):
+    days = {1: ['2026-01-01', '2026-01-02', '2026-01-03', '2026-01-07', '2026-01-08'],
+            2: ['2026-01-05'],
+            3: ['2026-01-01', '2026-01-03', '2026-01-04', '2026-01-05', '2026-01-06', '2026-01-09']}
+    conn = database.get_db_connection()
+    try:
+        # Several events a day, in order, as the app records them
+        for user_id, dates in days.items():
+            for date in dates:
+                for hour in ('08', '21'):
+                    conn.execute('INSERT INTO activity_log (user_id, activity_type, timestamp) VALUES (?, ?, ?)',
+                                 (user_id, 'chapter_read', f'{date} {hour}:00:00'))
+                    database.record_activity_day(conn, user_id, date)
+        conn.commit()
+        incremental = {user_id: streak(conn, user_id) for user_id in days}
+        assert incremental[1] == (2, 3, '2026-01-08')
+        assert incremental[3] == (1, 4, '2026-01-09')
+    finally:
+        conn.close()
+
+    assert database.rebuild_user_streaks() == len(days)
+    conn = database.get_db_connection()
+    try:
+        assert {user_id: streak(conn, user_id) for user_id in days} == incremental
+        database.rebuild_user_streaks(user_id=1)
+        assert streak(conn, 1) == incremental[1]
+    finally:
+        conn.close()
+
 if __name__ == "__main__":
     test_achievements_db()
+    run_with_database(test_streak_transitions, test_streak_rebuild_matches_incremental)
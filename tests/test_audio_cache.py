@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Tests for the chapter audio cache: files are named by the hash of their
+inputs, written atomically, capped by size (least recently used first),
+synthesized once per key even under concurrent requests, and every
+request lookup is counted as a hit or a miss.
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_cache import TEMP_PREFIX, AudioCache, audio_key
+
+def writer(data, calls=None):
+    def write(path):
+        if calls is not None:
+            calls.append(path)
+        with open(path, 'wb') as f:
+            f.write(data)
+    return write
+
+def test_key_covers_every_input():
+    key = audio_key('Once upon a time', 'en', 'com', 'normal')
+    assert key == audio_key('Once upon a time', 'en', 'com', 'normal')
+    assert len({key,
+                audio_key('Once upon a time.', 'en', 'com', 'normal'),
+                audio_key('Once upon a time', 'pt', 'com', 'normal'),
+                audio_key('Once upon a time', 'en', 'co.uk', 'normal'),
+                audio_key('Once upon a time', 'en', 'com', 'slow')}) == 5
+
+def test_miss_then_hit():
+    cache = AudioCache(tempfile.mkdtemp(prefix='folktale_test_'))
+    key = audio_key('text', 'en', 'com', 'normal')
+    calls = []
+    path = cache.get_or_create(key, writer(b'mp3', calls))
+    assert path == cache.path(key) and path.read_bytes() == b'mp3'
+    assert os.stat(path).st_mode & 0o777 == 0o644
+    assert cache.get_or_create(key, writer(b'other', calls)) == path
+    assert len(calls) == 1 and path.read_bytes() == b'mp3'
+    assert (cache.hits, cache.misses, cache.total_bytes) == (1, 1, 3)
+    # No temporary file left next to the cached one
+    assert os.listdir(path.parent) == [path.name]
+
+def test_lookups_are_counted():
+    cache = AudioCache(tempfile.mkdtemp(prefix='folktale_test_'))
+    key = audio_key('text', 'en', 'com', 'normal')
+    # Served from the cache only (FOLKTALE_TTS_INLINE=0): get() counts too
+    assert cache.get(key) is None
+    cache.get_or_create(key, writer(b'mp3'))
+    assert cache.get(key) == cache.path(key)
+    # find() is the uncounted lookup used by the pre-render
+    assert cache.find(key) == cache.path(key)
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.stats()['hit_rate'] == 0.333
+
+def test_failed_write_leaves_nothing():
+    cache = AudioCache(tempfile.mkdtemp(prefix='folktale_test_'))
+    key = audio_key('text', 'en', 'com', 'normal')
+
+    def broken(path):
+        with open(path, 'wb') as f:
+            f.write(b'half')
+        raise RuntimeError('TTS failed')
+
+    try:
+        cache.get_or_create(key, broken)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("the write error was swallowed")
+    assert cache.get(key) is None
+    assert os.listdir(cache.path(key).parent) == []
+
+def test_evicts_least_recently_used():
+    cache = AudioCache(tempfile.mkdtemp(prefix='folktale_test_'), max_bytes=250, touch_interval=0)
+    keys = [audio_key(f'chapter {n}', 'en', 'com', 'normal') for n in range(3)]
+    for age, key in zip((30, 20), keys):
+        path = cache.get_or_create(key, writer(b'x' * 100))
+        os.utime(path, (time.time() - age, time.time() - age))
+    # Reading the oldest file makes it the most recent
+    assert cache.get(keys[0]) is not None
+
+    cache.get_or_create(keys[2], writer(b'x' * 100))
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+    assert cache.evictions == 1 and cache.total_bytes == 200
+
+def test_stale_temp_files_removed():
+    directory = tempfile.mkdtemp(prefix='folktale_test_')
+    shard = os.path.join(directory, 'ab')
+    os.makedirs(shard)
+    stale = os.path.join(shard, TEMP_PREFIX + 'stale.mp3')
+    fresh = os.path.join(shard, TEMP_PREFIX + 'fresh.mp3')
+    for path in (stale, fresh):
+        with open(path, 'wb') as f:
+            f.write(b'partial')
+    os.utime(stale, (time.time() - 7200, time.time() - 7200))
+
+    cache = AudioCache(directory, temp_max_age=3600)
+    assert not os.path.exists(stale) and os.path.exists(fresh)
+    assert cache.total_bytes == 0
+
+def test_concurrent_misses_synthesize_once():
+    cache = AudioCache(tempfile.mkdtemp(prefix='folktale_test_'))
+    key = audio_key('text', 'en', 'com', 'normal')
+    calls = []
+
+    def slow_write(path):
+        calls.append(path)
+        time.sleep(0.2)
+        writer(b'mp3')(path)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_create(key, slow_write)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [cache.path(key)] * 4
+
+if __name__ == "__main__":
+    test_key_covers_every_input()
+    test_miss_then_hit()
+    test_lookups_are_counted()
+    test_failed_write_leaves_nothing()
+    test_evicts_least_recently_used()
+    test_stale_temp_files_removed()
+    test_concurrent_misses_synthesize_once()
+    print("✅ audio cache tests passed")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-process response cache: a value computed while an
+invalidation runs is returned but never stored.
+"""
+
+import os
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache import LRUCache
+
+def test_get_or_set_caches():
+    cache = LRUCache(capacity=4)
+    calls = []
+    assert cache.get_or_set(('ranking_global', 50), lambda: calls.append(1) or 'body') == 'body'
+    assert cache.get_or_set(('ranking_global', 50), lambda: calls.append(1) or 'other') == 'body'
+    assert len(calls) == 1
+
+def test_invalidation_during_compute_is_not_stored():
+    for invalidate in (lambda cache: cache.invalidate(('achievements', 7)),
+                       lambda cache: cache.invalidate_kind('achievements'),
+                       lambda cache: cache.clear()):
+        cache = LRUCache(capacity=4)
+        computing = threading.Event()
+        invalidated = threading.Event()
+
+        def compute():
+            computing.set()
+            # The unlock (and its invalidation) lands while the old body is built
+            invalidated.wait(timeout=5)
+            return 'before unlock'
+
+        def unlock():
+            computing.wait(timeout=5)
+            invalidate(cache)
+            invalidated.set()
+
+        thread = threading.Thread(target=unlock)
+        thread.start()
+        assert cache.get_or_set(('achievements', 7), compute) == 'before unlock'
+        thread.join()
+
+        assert cache.get(('achievements', 7)) is None
+        assert cache.get_or_set(('achievements', 7), lambda: 'after unlock') == 'after unlock'
+        assert cache.get(('achievements', 7)) == 'after unlock'
+
+if __name__ == "__main__":
+    test_get_or_set_caches()
+    test_invalidation_during_compute_is_not_stored()
+    print("✅ cache tests passed")
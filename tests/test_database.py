@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tests for database.py on a throwaway database: the per-thread connection
+pool releases the connections of finished threads and never rolls back
+an enclosing caller's transaction, the write-behind activity writer
+neither hangs nor drops rows when a batch fails, and migration 7 moves
+the user_progress lists (JSON or the old Python repr) into the progress
+tables with matching counters.
+"""
+
+import gc
+import os
+import sqlite3
+import sys
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from conftest import create_player, run_with_database, throwaway_database
+
+def test_pool_releases_finished_threads(database_file):
+    def query():
+        conn = database.get_db_connection()
+        conn.execute('SELECT COUNT(*) FROM users').fetchone()
+        conn.close()
+
+    open_before = len(database._pool_connections)
+    for _ in range(50):
+        thread = threading.Thread(target=query)
+        thread.start()
+        thread.join()
+    gc.collect()
+    assert len(database._pool_connections) == open_before
+
+    # The calling thread keeps reusing its own connection
+    assert database.get_db_connection() is database.get_db_connection()
+
+def test_nested_callers_share_the_transaction(database_file):
+    conn = database.get_db_connection()
+    conn.execute("INSERT INTO users (username, password_hash) VALUES ('outer', 'x')")
+    # A database function called in the middle of the outer transaction
+    assert database.get_user_counters(1) is None
+    assert database.get_user_achievement_stats(1)['unlocked_achievements'] == 0
+    assert conn.in_transaction
+    conn.commit()
+    conn.close()
+
+    # The outermost close() still discards uncommitted work
+    conn = database.get_db_connection()
+    conn.execute("INSERT INTO users (username, password_hash) VALUES ('abandoned', 'x')")
+    conn.close()
+    conn = database.get_db_connection()
+    usernames = {row[0] for row in conn.execute('SELECT username FROM users')}
+    conn.close()
+    assert 'outer' in usernames and 'abandoned' not in usernames
+    assert conn.depth == 0 and not conn.in_transaction
+
+def test_activity_writer_failed_batch(database_file):
+    insert_rows = database._insert_activity_rows
+
+    def insert_one_at_a_time(conn, rows):
+        # A batch error that is not an OperationalError
+        if len(rows) > 1:
+            raise ValueError('batch rejected')
+        insert_rows(conn, rows)
+
+    writer = database.ActivityLogWriter(batch_size=10)
+    database._insert_activity_rows = insert_one_at_a_time
+    try:
+        rows = [(1, 'chapter_read', None, f'2026-10-0{day} 10:00:00') for day in range(1, 6)]
+        # Queued before the thread starts, so they are written as one batch
+        for row in rows:
+            writer._queue.put(row)
+        writer.start()
+
+        flushed = threading.Thread(target=writer.flush)
+        flushed.start()
+        flushed.join(timeout=10)
+        assert not flushed.is_alive(), "flush() blocked after a failed batch"
+
+        conn = database.get_db_connection()
+        count = conn.execute('SELECT COUNT(*) FROM activity_log').fetchone()[0]
+        conn.close()
+        assert count == len(rows)
+    finally:
+        database._insert_activity_rows = insert_rows
+        writer.stop()
+
+# user_progress rows as older versions wrote them: JSON, Python repr
+# (str() of a list) and bare quiz percentages with no chapter
+BASELINE_PROGRESS = [
+    ('reader', '1', '["1", 2]',
+     '[{"chapter": "1", "score": 4, "total": 4, "percentage": 100, "date": "2026-01-05T10:00:00"}, '
+     '{"chapter": 2, "score": 2, "total": 4, "percentage": 50, "date": "2026-01-06T10:00:00"}]',
+     '["casa", "gato"]'),
+    ('reader', '2', '[1]', '[100, 80]', "['lobo']"),
+    ('listener', '1', '[]',
+     "[{'chapter': 3, 'score': 1, 'total': 2, 'percentage': 50, 'date': None}]", 'None'),
+]
+
+def create_baseline_database(path):
+    """A database file with the schema from before versioned migrations"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    database.migration_initial_schema(conn)
+    user_ids = {}
+    for username, story_id, chapters, quizzes, words in BASELINE_PROGRESS:
+        if username not in user_ids:
+            user_ids[username] = conn.execute(
+                'INSERT INTO users (username, password_hash) VALUES (?, ?)',
+                (username, database.hash_password('secret123'))
+            ).lastrowid
+        conn.execute(
+            'INSERT INTO user_progress (user_id, story_id, completed_chapters, quiz_scores, vocabulary_learned) '
+            'VALUES (?, ?, ?, ?, ?)', (user_ids[username], story_id, chapters, quizzes, words)
+        )
+    conn.commit()
+    conn.close()
+    return user_ids
+
+def counters(user_id):
+    row = database.get_user_counters(user_id)
+    return {column: row[column] for column in database.COUNTER_COLUMNS}
+
+def test_migration_normalizes_progress():
+    with throwaway_database(initialize=False) as path:
+        user_ids = create_baseline_database(path)
+        database.init_database()
+        conn = database.get_db_connection()
+        assert database.get_schema_version(conn) == database.SCHEMA_VERSION
+        # The lists now live only in the progress tables
+        leftover = conn.execute(
+            "SELECT COUNT(*) FROM user_progress WHERE "
+            "completed_chapters != '[]' OR quiz_scores != '[]' OR vocabulary_learned != '[]'"
+        ).fetchone()[0]
+        conn.close()
+        assert leftover == 0
+
+        reader = {row['story_id']: row for row in database.get_user_progress(user_ids['reader'])}
+        assert reader['1']['completed_chapters'] == [1, 2]
+        assert reader['1']['quiz_scores'] == [
+            {'chapter': 1, 'score': 4, 'total': 4, 'percentage': 100, 'date': '2026-01-05T10:00:00'},
+            {'chapter': 2, 'score': 2, 'total': 4, 'percentage': 50, 'date': '2026-01-06T10:00:00'},
+        ]
+        assert reader['1']['vocabulary_learned'] == ['casa', 'gato']
+        assert reader['2']['completed_chapters'] == [1]
+        # Bare percentages are keyed by their position in the list
+        assert [(quiz['chapter'], quiz['score'], quiz['percentage']) for quiz in reader['2']['quiz_scores']] == \
+            [(1, None, 100), (2, None, 80)]
+        assert reader['2']['vocabulary_learned'] == ['lobo']
+
+        listener = database.get_user_progress(user_ids['listener'], 1)
+        assert listener['completed_chapters'] == [] and listener['vocabulary_learned'] == []
+        assert listener['quiz_scores'] == [{'chapter': 3, 'score': 1, 'total': 2, 'percentage': 50, 'date': None}]
+
+        assert counters(user_ids['reader']) == {'stories_completed': 2, 'chapters_read': 3, 'quizzes_completed': 4,
+                                                'perfect_quizzes': 2, 'words_learned': 3}
+        assert counters(user_ids['listener']) == {'stories_completed': 0, 'chapters_read': 0, 'quizzes_completed': 1,
+                                                  'perfect_quizzes': 0, 'words_learned': 0}
+
+        # A second init_database finds the schema current and changes nothing
+        database.init_database()
+        assert counters(user_ids['reader'])['quizzes_completed'] == 4
+
+def test_save_user_progress_keeps_counters(database_file):
+    user_id = create_player('saver')
+
+    def quiz(chapter, percentage):
+        return {'chapter': chapter, 'score': percentage // 25, 'total': 4,
+                'percentage': percentage, 'date': '2026-02-01T10:00:00'}
+
+    updates = [
+        ('1', [1], [quiz(1, 100)], ['casa']),
+        ('1', [1, 2], [quiz(1, 100), quiz(2, 75)], ['casa', 'gato']),
+        ('2', ['1'], [quiz('1', 100)], None),
+        # Retake: chapter 1 is no longer perfect, chapter 2 now is
+        ('1', [1, 2], [quiz(1, 50), quiz(2, 100)], ['casa', 'gato']),
+        # Rows missing from the new lists are deleted
+        ('1', [2], [quiz(2, 100)], ['gato']),
+        ('2', [], [], []),
+    ]
+    for story_id, chapters, quizzes, words in updates:
+        assert database.save_user_progress(user_id, story_id, 1, chapters, quizzes, words)
+        incremental = counters(user_id)
+        database.rebuild_user_counters(user_id)
+        assert counters(user_id) == incremental, (story_id, chapters)
+
+    assert counters(user_id) == {'stories_completed': 1, 'chapters_read': 1, 'quizzes_completed': 1,
+                                 'perfect_quizzes': 1, 'words_learned': 1}
+
+if __name__ == "__main__":
+    run_with_database(test_pool_releases_finished_threads, test_nested_callers_share_the_transaction,
+                      test_activity_writer_failed_batch)
+    test_migration_normalizes_progress()
+    run_with_database(test_save_user_progress_keeps_counters)
+    print("✅ database tests passed")
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Regression tests for the DOCX paragraph classifier
+
+fixtures/docx_parser_regression.json holds the paragraphs of
+assets/BrazilianFolktales.docx plus edge cases (quiz formats, vocabulary
+separators, title and chapter variants), and the stories the parser
+produced for them before the classifier was introduced. The only change
+since then: a multi-line quiz question left pending at the end of a story
+no longer collects options from the next story.
+"""
+
+import json
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from docx_classifier import (classify_paragraph, STORY_TITLE, CHAPTER, VOCABULARY_HEADER, QUIZ_HEADER,
+                             QUIZ_LINE, OPTION, BODY)
+from docx_stream import StreamedParagraph, StreamedRun
+from ingestion import DocumentProcessor
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'docx_parser_regression.json')
+
+def paragraph(text, bold=None, has_runs=True):
+    return StreamedParagraph(text, (StreamedRun(bold),) if has_runs else ())
+
+def test_token_kinds():
+    cases = [
+        (paragraph('   '), None),
+        (paragraph('Bold title', bold=True), STORY_TITLE),
+        (paragraph('THE LEGEND OF IARA'), STORY_TITLE),
+        (paragraph('NO RUNS', has_runs=False), BODY),
+        (paragraph('Capítulo 12: O Rio'), CHAPTER),
+        (paragraph('Key words'), VOCABULARY_HEADER),
+        (paragraph('Quiz Time'), QUIZ_HEADER),
+        (paragraph('1. Where does Iara live?'), QUIZ_LINE),
+        (paragraph('Q: Who? A) One B) Two'), QUIZ_LINE),
+        (paragraph('B) Black ✅'), OPTION),
+        (paragraph('The Saci ran through the forest.'), BODY),
+    ]
+    for p, expected in cases:
+        token = classify_paragraph(p)
+        kind = token.kind if token else None
+        assert kind == expected, f"{p.text!r}: expected {expected}, got {kind}"
+
+    assert classify_paragraph(paragraph('CHAPTER 7 — NIGHT')).kind == STORY_TITLE
+    assert classify_paragraph(paragraph('chapter  7 - night')).number == 7
+
+def test_parser_output_unchanged():
+    with open(FIXTURE, encoding='utf-8') as f:
+        fixture = json.load(f)
+
+    parsed = DocumentProcessor().parse_paragraphs(
+        paragraph(text, bold, has_runs) for text, bold, has_runs in fixture['paragraphs']
+    )
+
+    stories = json.loads(json.dumps(parsed))
+    assert stories == fixture['stories']
+    print(f"✅ {len(fixture['paragraphs'])} paragraphs -> {len(stories)} stories, identical to the fixture")
+
+if __name__ == "__main__":
+    test_token_kinds()
+    test_parser_output_unchanged()
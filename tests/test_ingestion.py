@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for DOCX ingestion: the worker processes of ingest_documents()
+parse the documents without booting the app, even when app.py is the
+main module they re-import, and force_reconvert_docx() replaces its JSON
+file atomically.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import ingestion
+from conftest import ROOT, run_with_app_main
+from ingestion import DocumentProcessor
+
+DOCX = os.path.join(ROOT, 'assets', 'BrazilianFolktales.docx')
+
+def test_ingest_pool_under_app_main():
+    # Importing app.py must not migrate this database (or load the catalog)
+    db_path = os.path.join(tempfile.mkdtemp(prefix='folktale_test_'), 'workers.db')
+    result = run_with_app_main(
+        'from ingestion import ingest_documents, ingest_document\n'
+        f'paths = [{DOCX!r}] * 2\n'
+        'assert ingest_documents(paths, workers=2) == [ingest_document(path) for path in paths]\n'
+        "print('parsed')\n",
+        env={'FOLKTALE_DB_PATH': db_path, 'FOLKTALE_INGEST_WORKERS': '2'}
+    )
+    assert result.stdout.strip() == 'parsed', result.stdout
+    assert not os.path.exists(db_path)
+
+def test_reconvert_replaces_json_atomically():
+    json_path = os.path.join(tempfile.mkdtemp(prefix='folktale_test_'), 'stories.json')
+    processor = DocumentProcessor(DOCX, json_path)
+    assert processor.force_reconvert_docx()
+    with open(json_path, encoding='utf-8') as f:
+        written = f.read()
+    assert json.loads(written)['conversion_info']['stories_count'] > 0
+
+    def dump_half(data, f, **kwargs):
+        f.write('{"stories": {')
+        raise OSError('disk full')
+
+    dump = ingestion.json.dump
+    ingestion.json.dump = dump_half
+    try:
+        processor.force_reconvert_docx()
+        assert False, "the failed dump was not raised"
+    except OSError:
+        pass
+    finally:
+        ingestion.json.dump = dump
+    # The previous file is untouched and no temporary file is left behind
+    with open(json_path, encoding='utf-8') as f:
+        assert f.read() == written
+    assert os.listdir(os.path.dirname(json_path)) == ['stories.json']
+
+if __name__ == "__main__":
+    test_ingest_pool_under_app_main()
+    test_reconvert_replaces_json_atomically()
+    print("✅ ingestion tests passed")
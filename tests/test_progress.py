@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for quiz progress (on a throwaway database): a quiz result writes
+only its chapter's rows, concurrent writers do not undo each other, and
+the /api/statistics snapshot updated per quiz stays equal to one built
+from the whole progress.
+"""
+
+import os
+import random
+import sys
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from conftest import create_player, run_with_database
+
+def quiz(score, total=4, date='2026-04-01T10:00:00'):
+    return {'score': score, 'total': total, 'percentage': round(score / total * 100), 'date': date}
+
+def counters(user_id):
+    row = database.get_user_counters(user_id)
+    return {column: row[column] for column in database.COUNTER_COLUMNS + ('quiz_attempts', 'correct_answers')}
+
+def test_record_quiz_result(database_file):
+    user_id = create_player('reader')
+    # Two workers, each with its own (stale) view, write different chapters
+    assert database.record_quiz_result(user_id, 1, 1, quiz(4), True, ['first_chapter']) == 1
+    assert database.record_quiz_result(user_id, 1, 2, quiz(3), True, ['first_chapter']) == 2
+    # A failed retake of chapter 1 replaces its quiz row but keeps the completion
+    assert database.record_quiz_result(user_id, '1', '1', quiz(1), False) == 3
+    assert database.record_quiz_result(user_id, 2, 1, quiz(2), False, ['story_master']) == 4
+
+    rows = {row['story_id']: row for row in database.get_user_progress(user_id)}
+    assert rows['1']['completed_chapters'] == [1, 2]
+    assert [(entry['chapter'], entry['score']) for entry in rows['1']['quiz_scores']] == [(1, 1), (2, 3)]
+    assert rows['2']['completed_chapters'] == []
+
+    stored = counters(user_id)
+    assert stored == {'stories_completed': 1, 'chapters_read': 2, 'quizzes_completed': 3,
+                      'perfect_quizzes': 0, 'words_learned': 0, 'quiz_attempts': 4, 'correct_answers': 10}
+    assert database.parse_progress_list(database.get_user_counters(user_id)['badges']) == \
+        ['first_chapter', 'story_master']
+
+    # The incremental counters match a rebuild from the progress tables
+    database.rebuild_user_counters(user_id)
+    assert counters(user_id) == stored
+
+def test_update_progress(database_file):
+    from app import create_folktale_app
+    folktale_app = create_folktale_app()
+    check_statistics_snapshot(folktale_app)
+    check_other_worker(folktale_app)
+
+def snapshot(statistics):
+    return dict(statistics, recent_scores=list(statistics['recent_scores']))
+
+def check_statistics_snapshot(folktale_app):
+    rng = random.Random(3)
+    story_ids = list(folktale_app.stories) + [99]
+    for user_id in (str(uuid.uuid4()), create_player('snapshot')):
+        folktale_app.get_user_statistics(user_id)
+        for _ in range(60):
+            story_id = rng.choice(story_ids)
+            total = rng.randint(1, 5)
+            progress = folktale_app.update_progress(user_id, story_id, rng.randint(1, 4),
+                                                    rng.randint(0, total), total)
+            cached = folktale_app.user_statistics.get(user_id)
+            assert cached is not None
+            assert snapshot(cached) == snapshot(folktale_app.build_statistics(progress))
+
+def check_other_worker(folktale_app):
+    user_id = create_player('two_workers')
+    folktale_app.update_progress(user_id, 1, 1, 3, 3)
+    folktale_app.get_user_statistics(user_id)
+
+    # Another worker records chapter 2 behind this process's cache
+    database.record_quiz_result(user_id, 1, 2, quiz(3, 3), True)
+
+    progress = folktale_app.update_progress(user_id, 1, 3, 3, 3)
+    chapters = progress['stories_completed']['story_1']['chapters_completed']
+    assert sorted(chapters) == [1, 2, 3]
+    assert progress['total_quiz_attempts'] == 3
+    rows = database.get_user_progress(user_id, 1)
+    assert sorted(rows['completed_chapters']) == [1, 2, 3]
+    assert len(rows['quiz_scores']) == 3
+
+    statistics = folktale_app.get_user_statistics(user_id)
+    assert statistics['quiz_attempts'] == 3 and statistics['total_chapters_completed'] == 3
+
+if __name__ == "__main__":
+    run_with_database(test_record_quiz_result, test_update_progress)
+    print("✅ progress tests passed")
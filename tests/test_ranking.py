@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Tests for the materialized leaderboard (on a throwaway database): ranks
+and tie order after unlocks, checked against the GROUP BY / ORDER BY
+aggregation over user_achievements that get_global_ranking used to run,
+the rank index against a sorted list, and a rebuild made by another
+process.
+"""
+
+import bisect
+import os
+import random
+import subprocess
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import database
+from conftest import ROOT, create_player, run_with_database
+
+LEGACY_AGGREGATE = '''
+    SELECT
+        u.id,
+        COALESCE(SUM(a.points), 0) as total_points,
+        COUNT(ua.achievement_id) as achievements_count,
+        MAX(ua.unlocked_at) as last_achievement
+    FROM users u
+    LEFT JOIN user_achievements ua ON u.id = ua.user_id
+    LEFT JOIN achievements a ON ua.achievement_id = a.id
+    WHERE u.user_type = 'regular'
+    GROUP BY u.id, u.username
+'''
+LEGACY_TOP = LEGACY_AGGREGATE + '''
+    ORDER BY total_points DESC, achievements_count DESC, last_achievement DESC
+'''
+LEGACY_BETTER_USERS = '''
+    SELECT COUNT(*)
+    FROM (''' + LEGACY_AGGREGATE + ''') ranked
+    WHERE
+        ranked.total_points > ? OR
+        (ranked.total_points = ? AND ranked.achievements_count > ?) OR
+        (ranked.total_points = ? AND ranked.achievements_count = ? AND ranked.last_achievement > ?)
+'''
+
+def unlock(conn, user_id, achievements, unlocked_at):
+    """Unlock achievements (id, points) the way check_achievements does"""
+    conn.executemany('INSERT INTO user_achievements (user_id, achievement_id, progress, unlocked_at) '
+                     'VALUES (?, ?, 1, ?)', [(user_id, achievement_id, unlocked_at)
+                                             for achievement_id, points in achievements])
+    database.record_leaderboard_unlocks(conn, user_id, sum(points for _, points in achievements),
+                                        len(achievements))
+    conn.commit()
+
+def legacy_key(row):
+    return (row['total_points'], row['achievements_count'], row['last_achievement'])
+
+def check_against_legacy(conn):
+    legacy = conn.execute(LEGACY_TOP).fetchall()
+    ranking = database.get_global_ranking(limit=len(legacy))
+    # Same order (users that tie may come in either order)
+    assert [legacy_key(row) for row in ranking] == [legacy_key(row) for row in legacy]
+    assert sorted(row['user_id'] for row in ranking) == sorted(row['id'] for row in legacy)
+
+    for row in legacy:
+        points, count, last = legacy_key(row)
+        better = conn.execute(LEGACY_BETTER_USERS, (points, points, count, points, count, last)).fetchone()[0]
+        assert database.get_user_rank(row['id'])['rank'] == better + 1, row['id']
+
+def test_ties_share_a_rank(database_file):
+    conn = database.get_db_connection()
+    try:
+        achievements = [(row['id'], row['points']) for row in
+                        conn.execute('SELECT id, points FROM achievements ORDER BY id')]
+        ids = [create_player(f'player{n}') for n in range(4)]
+        unlock(conn, ids[0], achievements[:2], '2026-05-01 10:00:00')
+        unlock(conn, ids[1], achievements[:2], '2026-05-01 10:00:00')
+        unlock(conn, ids[2], achievements[:1], '2026-05-02 10:00:00')
+
+        ranks = {user_id: database.get_user_rank(user_id)['rank'] for user_id in ids}
+        assert ranks[ids[0]] == ranks[ids[1]] == 1
+        assert ranks[ids[2]] == 3 and ranks[ids[3]] == 4
+        # Ties are listed by user id
+        assert [row['user_id'] for row in database.get_global_ranking()] == ids
+
+        # A later unlock moves the user up; the old position is gone
+        unlock(conn, ids[3], achievements[2:5], '2026-05-03 10:00:00')
+        ranking = database.get_global_ranking()
+        assert ranking[0]['user_id'] == ids[3]
+        assert [row['user_id'] for row in ranking].count(ids[3]) == 1
+        assert database.get_user_rank(ids[0])['rank'] == 2
+        check_against_legacy(conn)
+    finally:
+        conn.close()
+
+def test_matches_legacy_query_after_updates(database_file):
+    conn = database.get_db_connection()
+    try:
+        rng = random.Random(7)
+        achievements = [(row['id'], row['points']) for row in
+                        conn.execute('SELECT id, points FROM achievements ORDER BY id')]
+        ids = [create_player(f'player{n}') for n in range(30)]
+        locked = {user_id: list(achievements) for user_id in ids}
+        for step in range(120):
+            user_id = rng.choice(ids)
+            if not locked[user_id]:
+                continue
+            picked = rng.sample(locked[user_id], min(len(locked[user_id]), rng.randint(1, 3)))
+            for achievement in picked:
+                locked[user_id].remove(achievement)
+            # Few distinct timestamps, so full ties happen
+            unlock(conn, user_id, picked, f'2026-06-0{rng.randint(1, 3)} 12:00:00')
+            if step % 20 == 0:
+                check_against_legacy(conn)
+        check_against_legacy(conn)
+
+        # A rebuild from user_achievements gives the same ranking
+        before = database.get_global_ranking(limit=len(ids))
+        database.rebuild_leaderboard()
+        assert database.get_global_ranking(limit=len(ids)) == before
+    finally:
+        conn.close()
+
+def test_rank_index_matches_sorted_list():
+    rng = random.Random(11)
+    index = database.RankIndex(seed=5)
+    expected = []
+    for _ in range(3000):
+        key = (-rng.randint(0, 50), -rng.randint(0, 5), rng.randint(0, 400))
+        if key in expected:
+            index.remove(key)
+            expected.remove(key)
+        else:
+            index.insert(key)
+            bisect.insort(expected, key)
+        probe = (-rng.randint(0, 50), -rng.randint(0, 5))
+        assert index.rank(probe) == bisect.bisect_left(expected, probe)
+    assert len(index) == len(expected)
+    assert index.first(len(expected) + 1) == expected
+    assert index.first(10) == expected[:10]
+
+def test_rebuild_in_another_process(database_file):
+    conn = database.get_db_connection()
+    try:
+        achievements = [(row['id'], row['points']) for row in
+                        conn.execute('SELECT id, points FROM achievements ORDER BY id')]
+        ids = [create_player(f'player{n}') for n in range(3)]
+        unlock(conn, ids[0], achievements[:3], '2026-05-01 10:00:00')
+        unlock(conn, ids[1], achievements[:1], '2026-05-01 10:00:00')
+        assert database.get_global_ranking()[0]['user_id'] == ids[0]
+
+        # Another process drops player0's achievements and rebuilds
+        conn.execute('DELETE FROM user_achievements WHERE user_id = ?', (ids[0],))
+        conn.execute("UPDATE users SET user_type = 'admin' WHERE id = ?", (ids[2],))
+        conn.commit()
+        subprocess.run([sys.executable, os.path.join(ROOT, 'database.py'), 'rebuild-leaderboard'],
+                       env=dict(os.environ, FOLKTALE_DB_PATH=database_file), check=True, capture_output=True)
+
+        ranking = database.get_global_ranking()
+        assert [row['user_id'] for row in ranking] == [ids[1], ids[0]]
+        assert ranking[1]['total_points'] == 0
+        assert database.get_user_rank(ids[2]) is None
+        check_against_legacy(conn)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    run_with_database(test_ties_share_a_rank, test_matches_legacy_query_after_updates)
+    test_rank_index_matches_sorted_list()
+    run_with_database(test_rebuild_in_another_process)
+    print("✅ ranking tests passed")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the story search index: query building, incremental indexing,
+ranked, highlighted results and the analysis vocabulary (on a throwaway
+database).
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import run_with_database
+from search import index_catalog, match_query, search_catalog
+
+STORIES = {
+    1: {'id': 1, 'title': 'The Legend of Curupira', 'total_chapters': 1, 'chapters': {
+        1: {'title': 'Chapter 1: The Forest Guardian',
+            'content': 'Curupira protects the forest. His feet point backward.',
+            'vocabulary': [{'word': 'Forest', 'translation': 'floresta', 'context': ''}],
+            'quiz': [{'question': 'Where does Curupira live?', 'options': ['Forest', 'City'], 'correct': 0}]}}},
+    2: {'id': 2, 'title': 'O Boto Cor-de-Rosa', 'total_chapters': 1, 'chapters': {
+        1: {'title': 'Capítulo 1: A Festa',
+            'content': 'O boto saiu do rio na noite da festa <junina>.',
+            'vocabulary': [], 'quiz': []}}}
+}
+
+def test_match_query():
+    assert match_query('saci cap') == '"saci"* "cap"*'
+    assert match_query('"OR NEAR(') == '"OR"* "NEAR"*'
+    assert match_query('  ?! ') == ''
+
+def test_index_and_search(database_file):
+    assert index_catalog(STORIES) == (2, 0)
+    assert index_catalog(STORIES) == (0, 0)
+
+    # Prefix, case and accents
+    kinds = {(r['story_id'], r['kind']) for r in search_catalog('CURUP')}
+    assert kinds == {(1, 'story'), (1, 'chapter'), (1, 'quiz')}
+    assert [r['story_id'] for r in search_catalog('capitulo')] == [2]
+    assert [r['kind'] for r in search_catalog('florest')] == ['vocabulary']
+
+    # Title matches rank first; snippets are escaped HTML with <mark>
+    assert search_catalog('curupira')[0]['kind'] == 'story'
+    snippet = search_catalog('festa junina')[0]['snippet']
+    assert '<mark>junina</mark>' in snippet and '&lt;' in snippet
+
+    # Only the changed story is indexed again; removed stories disappear
+    changed = {1: dict(STORIES[1], title='The Legend of Saci')}
+    assert index_catalog(changed) == (1, 1)
+    assert {r['kind'] for r in search_catalog('curupira')} == {'chapter', 'quiz'}
+    assert search_catalog('boto') == []
+    print("✅ search index and queries behave as expected")
+
+def analyzed_story(vocabulary):
+    return {3: {'id': 3, 'title': 'The Headless Mule', 'total_chapters': 1, 'chapters': {
+        1: {'title': 'Chapter 1: The Curse', 'content': 'A woman became a mule near the church.',
+            'vocabulary': [{'word': 'Church', 'translation': 'igreja', 'context': ''}], 'quiz': [],
+            'analysis': {'vocabulary': vocabulary}}}}}
+
+def analysis_manifest(version):
+    return {'analysis_version': version,
+            'documents': {'mula.docx': {'stories': [{'id': 3, 'title': 'The Headless Mule', 'hash': 'abc'}]}}}
+
+def test_analysis_vocabulary(database_file):
+    lexicon_terms = [{'word': 'church', 'translation': 'igreja', 'context': 'near the church.'},
+                     {'word': 'curse', 'translation': 'maldição', 'context': 'The Curse'}]
+    assert index_catalog(analyzed_story(lexicon_terms), analysis_manifest('1:lexicon-a')) == (1, 0)
+    # Lexicon terms are searchable by word and translation; a word in both lists is indexed once
+    assert [r['kind'] for r in search_catalog('maldicao')] == ['vocabulary']
+    assert [r['kind'] for r in search_catalog('igreja')] == ['vocabulary']
+
+    # Same DOCX content, new lexicon: the story is indexed again
+    lexicon_terms.append({'word': 'woman', 'translation': 'mulher', 'context': 'A woman'})
+    assert index_catalog(analyzed_story(lexicon_terms), analysis_manifest('1:lexicon-a')) == (0, 0)
+    assert index_catalog(analyzed_story(lexicon_terms), analysis_manifest('1:lexicon-b')) == (1, 0)
+    assert [r['kind'] for r in search_catalog('mulher')] == ['vocabulary']
+
+if __name__ == "__main__":
+    test_match_query()
+    run_with_database(test_index_and_search, test_analysis_vocabulary)
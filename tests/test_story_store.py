@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests for the memory-mapped story store: the stories read back lazily
+must equal the ones written, and chapters are decoded only on access.
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from catalog import StoryCatalog, thaw
+from story_store import StoryStore, StoreFormatError, write_story_store
+
+STORIES_JSON = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'stories_data.json')
+
+def load_stories():
+    with open(STORIES_JSON, encoding='utf-8') as f:
+        data = json.load(f)
+    stories = {int(k): v for k, v in data['stories'].items()}
+    for story in stories.values():
+        story['chapters'] = {int(k): v for k, v in story['chapters'].items()}
+    return stories, data.get('manifest')
+
+def test_round_trip():
+    stories, manifest = load_stories()
+    path = os.path.join(tempfile.mkdtemp(prefix='folktale_test_'), 'stories.store')
+    write_story_store(path, StoryCatalog(stories), manifest)
+
+    store = StoryStore(path, cache_size=2)
+    assert len(store.chapters) == 0
+    catalog = StoryCatalog(store.stories)
+    assert catalog[1] is store.stories[1]
+
+    story = catalog[1]
+    assert story['title'] == stories[1]['title']
+    assert 1 in story['chapters'] and 999 not in story['chapters']
+    assert story['chapters'][1] is story['chapters'][1]
+    assert len(store.chapters) == 1
+
+    assert thaw(catalog) == stories
+    assert thaw(store.manifest) == manifest
+    print(f"✅ {len(stories)} stories read back from the store unchanged")
+
+def test_rejects_other_files():
+    path = os.path.join(tempfile.mkdtemp(prefix='folktale_test_'), 'stories.store')
+    with open(path, 'wb') as f:
+        f.write(b'{"stories": {}}' + b' ' * 16)
+    try:
+        StoryStore(path)
+    except StoreFormatError:
+        pass
+    else:
+        raise AssertionError("a JSON file was accepted as a story store")
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_rejects_other_files()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests for the ingestion-time text analysis stage: chapter artifacts,
+story totals and DOCX vocabulary contexts.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_analysis import ANALYSIS_VERSION, PLACEHOLDER_CONTEXT, analyze_story, needs_analysis
+from vocabulary import Lexicon
+
+LEXICON = Lexicon({'forest': 'floresta', 'red cap': 'gorro vermelho'}, common_words=['the', 'and'])
+
+def make_story():
+    return {'id': 1, 'title': 'Saci', 'total_chapters': 2, 'chapters': {
+        1: {'title': 'Chapter 1', 'content': 'Saci lives in the forest. He has a red cap!\n\nThe forest is quiet.\n',
+            'quiz': [], 'vocabulary': []},
+        2: {'title': 'Chapter 2', 'content': 'Pedro ran home. Saci followed him.',
+            'quiz': [], 'vocabulary': [
+                {'word': 'Followed', 'translation': 'seguiu', 'context': PLACEHOLDER_CONTEXT},
+                {'word': 'Ran', 'translation': 'correu', 'context': 'Given by the author.'},
+                {'word': 'Dolphin', 'translation': 'golfinho', 'context': PLACEHOLDER_CONTEXT}]}
+    }}
+
+def test_chapter_artifacts():
+    story = make_story()
+    assert needs_analysis(story)
+    analyze_story(story, LEXICON)
+    assert not needs_analysis(story)
+
+    analysis = story['chapters'][1]['analysis']
+    content = story['chapters'][1]['content']
+    assert analysis['version'] == ANALYSIS_VERSION
+    assert [content[start:].split('.')[0].split('!')[0].strip() for start in analysis['sentences']] == [
+        'Saci lives in the forest', 'He has a red cap', 'The forest is quiet']
+    assert analysis['word_count'] == 14 and analysis['unique_words'] == 12
+    assert analysis['word_frequencies'][0] == ['forest', 2]
+    assert all(word not in ('the', 'and') for word, count in analysis['word_frequencies'])
+    assert [(item['word'], item['context']) for item in analysis['vocabulary']] == [
+        ('Forest', 'Saci lives in the forest.'), ('Red cap', 'He has a red cap!')]
+
+    assert story['word_count'] == 14 + 6
+    assert story['reading_minutes'] == round(14 / 150, 1) + round(6 / 150, 1)
+
+def test_docx_vocabulary_contexts():
+    story = analyze_story(make_story(), LEXICON)
+    contexts = [item['context'] for item in story['chapters'][2]['analysis']['vocabulary']]
+    assert contexts == ['Saci followed him.', 'Given by the author.', 'Used in the story about Dolphin.']
+    # The parsed vocabulary itself is left as it was
+    assert story['chapters'][2]['vocabulary'][0]['context'] == PLACEHOLDER_CONTEXT
+
+if __name__ == "__main__":
+    test_chapter_artifacts()
+    test_docx_vocabulary_contexts()
+    print("✅ text analysis tests passed")
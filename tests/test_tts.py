@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for the TTS backends and the batch audio pre-render: cache keys per
+backend settings, rendering only what is missing (in a process pool too)
+and failures reported per chapter; pool workers started under
+`python app.py` do not boot the app.
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conftest import run_with_app_main
+from audio_cache import AudioCache
+from prerender import prerender_catalog
+from tts import GTTSBackend, Pyttsx3Backend, TTSBackend, get_backend
+
+class FakeBackend(TTSBackend):
+    """Writes the text itself; 'fail' in the text raises"""
+
+    name = 'fake'
+    suffix = '.txt'
+    mimetype = 'text/plain'
+
+    def synthesize(self, text, path):
+        if 'fail' in text:
+            raise RuntimeError('voice not found')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f'{os.getpid()}:{text}')
+
+def make_stories(*texts_per_story):
+    return {story_id: {'id': story_id, 'title': f'Story {story_id}',
+                       'chapters': {number: {'content': text} for number, text in enumerate(texts, 1)}}
+            for story_id, texts in enumerate(texts_per_story, 1)}
+
+def test_backends():
+    assert isinstance(get_backend('gtts'), GTTSBackend)
+    assert get_backend('gtts').voice == 'com'
+    assert isinstance(get_backend('pyttsx3', voice='en-us'), Pyttsx3Backend)
+    try:
+        get_backend('festival')
+    except ValueError as e:
+        assert 'pyttsx3' in str(e)
+    else:
+        raise AssertionError("an unknown backend was accepted")
+
+    keys = {get_backend('gtts').cache_key('Once'), get_backend('pyttsx3').cache_key('Once'),
+            get_backend('gtts', voice='co.uk').cache_key('Once'), get_backend('gtts', slow=True).cache_key('Once'),
+            get_backend('gtts', lang='pt').cache_key('Once')}
+    assert len(keys) == 5
+    assert get_backend('gtts').cache_key('Once') == GTTSBackend(voice='com').cache_key('Once')
+
+def test_prerender_only_missing():
+    backend = FakeBackend()
+    cache = AudioCache(tempfile.mkdtemp(prefix='folktale_test_'), suffix=backend.suffix)
+    stories = make_stories(['One.', 'Two.', 'One.'], ['Three.', '   '])
+
+    report = prerender_catalog(stories, backend, cache, story_ids=[2], workers=1)
+    assert report == {'rendered': 1, 'failed': 0, 'cached': 0}
+
+    report = prerender_catalog(stories, backend, cache, workers=1)
+    assert report == {'rendered': 2, 'failed': 0, 'cached': 1}
+    path = cache.get(backend.cache_key('Two.'))
+    assert path.read_text(encoding='utf-8').endswith(':Two.')
+
+    # Checking what is already cached does not count as request hits
+    lookups = (cache.hits, cache.misses)
+    assert prerender_catalog(stories, backend, cache, workers=1)['rendered'] == 0
+    assert (cache.hits, cache.misses) == lookups
+
+def test_prerender_process_pool():
+    backend = FakeBackend()
+    cache = AudioCache(tempfile.mkdtemp(prefix='folktale_test_'), suffix=backend.suffix)
+    texts = [f'Chapter {n}.' for n in range(6)]
+    stories = make_stories(texts, ['This one will fail.'])
+
+    report = prerender_catalog(stories, backend, cache, workers=2)
+    assert report == {'rendered': 6, 'failed': 1, 'cached': 0}
+    pids = {cache.get(backend.cache_key(text)).read_text(encoding='utf-8').split(':')[0] for text in texts}
+    assert str(os.getpid()) not in pids
+    assert cache.total_bytes == sum(os.path.getsize(cache.get(backend.cache_key(text))) for text in texts)
+
+def test_prerender_pool_under_app_main():
+    # As when the server pre-renders: the workers re-import app.py, which
+    # must not migrate this database or load the catalog
+    directory = tempfile.mkdtemp(prefix='folktale_test_')
+    db_path = os.path.join(directory, 'workers.db')
+    result = run_with_app_main(
+        'import os\n'
+        'from audio_cache import AudioCache\n'
+        'from prerender import prerender_catalog\n'
+        'from test_tts import FakeBackend, make_stories\n'
+        f"cache = AudioCache({os.path.join(directory, 'audio')!r}, suffix=FakeBackend.suffix)\n"
+        "report = prerender_catalog(make_stories(['One.', 'Two.'], ['Three.']), FakeBackend(), cache, workers=2)\n"
+        "assert report == {'rendered': 3, 'failed': 0, 'cached': 0}, report\n"
+        "print('rendered')\n",
+        env={'FOLKTALE_DB_PATH': db_path}
+    )
+    assert result.stdout.strip() == 'rendered', result.stdout
+    assert not os.path.exists(db_path)
+
+if __name__ == "__main__":
+    test_backends()
+    test_prerender_only_missing()
+    test_prerender_process_pool()
+    test_prerender_pool_under_app_main()
+    print("✅ TTS backend and pre-render tests passed")
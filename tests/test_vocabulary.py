@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Tests for the vocabulary engine: phrase matching over word tokens,
+sentence contexts and the shipped lexicon file.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vocabulary import Lexicon, PhraseMatcher, ChapterIndex
+
+def test_phrase_matcher():
+    matcher = PhraseMatcher(['a b c', 'b c d', 'c', 'b'])
+    hits = ChapterIndex('x a b c d. b', matcher).hits
+    # Overlapping and nested terms are all found, in the order they end
+    assert list(hits) == ['b', 'a b c', 'c', 'b c d']
+    assert hits['b'] == 0
+    # Phrases do not run across sentences
+    assert 'b c d' not in ChapterIndex('a b. c d', matcher).hits
+
+def test_extract_with_contexts():
+    lexicon = Lexicon({'forest': 'floresta', 'red cap': 'gorro vermelho', 'the': 'o', 'cap': 'gorro'},
+                      common_words=['the'])
+    text = ("Saci lived in the Forest! He wore a RED\ncap. Where is the red cap?\n"
+            "He ran into the forest again.")
+    vocabulary = lexicon.extract(text)
+    assert [(item['word'], item['translation']) for item in vocabulary] == [
+        ('Forest', 'floresta'), ('Red cap', 'gorro vermelho'), ('Cap', 'gorro')]
+    assert vocabulary[0]['context'] == 'Saci lived in the Forest!'
+    assert vocabulary[1]['context'] == 'He wore a RED\ncap.'
+    assert len(lexicon.extract(text, limit=1)) == 1
+
+    index = lexicon.index(text)
+    assert index.context('WHERE is') == 'Where is the red cap?'
+    assert index.context('dolphin') is None
+
+def test_lexicon_file():
+    lexicon = Lexicon.load()
+    assert len(lexicon) > 100
+    assert 'the' not in lexicon.entries and 'pink dolphin' in lexicon.entries
+
+if __name__ == "__main__":
+    test_phrase_matcher()
+    test_extract_with_contexts()
+    test_lexicon_file()
+    print("✅ vocabulary engine tests passed")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Text analysis stage of DOCX ingestion for Folktale Reader
+
+analyze_story() runs once per story when it is converted (in the
+ingestion worker processes) and stores the results in the catalog, next
+to what they describe:
+
+    chapter['analysis'] = {
+        'version': ANALYSIS_VERSION,
+        'sentences': [start offset of each sentence in content],
+        'sentence_count', 'word_count', 'unique_words',
+        'reading_minutes',
+        'word_frequencies': [[word, count], ...] (most frequent first),
+        'vocabulary': [{'word', 'translation', 'context'}, ...]
+    }
+    story['word_count'], story['reading_minutes']: chapter totals
+    story['analysis_version']: ANALYSIS_VERSION
+
+Requests only read these artifacts; none of them processes chapter text.
+"""
+
+from collections import Counter
+
+from vocabulary import WORD, load_lexicon
+
+# Bump when the artifacts change, so every story is analyzed again
+ANALYSIS_VERSION = 1
+
+# Learners read English more slowly than native readers
+WORDS_PER_MINUTE = 150
+TOP_WORDS = 20
+VOCABULARY_LIMIT = 12
+
+# Context the DOCX parser gives vocabulary until analysis finds the sentence
+PLACEHOLDER_CONTEXT = "Used in the context of this chapter."
+
+def analysis_version(lexicon=None):
+    """Version of the artifacts this process would compute (analysis + lexicon)"""
+    lexicon = lexicon or load_lexicon()
+    return f'{ANALYSIS_VERSION}:{lexicon.fingerprint}'
+
+def chapter_vocabulary(chapter, index, lexicon):
+    """DOCX vocabulary with its contexts filled in, or lexicon terms found in the text"""
+    if not chapter.get('vocabulary'):
+        return lexicon.extract(index.text, limit=VOCABULARY_LIMIT, index=index)
+
+    vocabulary = []
+    for item in chapter['vocabulary']:
+        item = dict(item)
+        if item.get('context', PLACEHOLDER_CONTEXT) == PLACEHOLDER_CONTEXT:
+            item['context'] = index.context(item['word']) or f"Used in the story about {item['word']}."
+        vocabulary.append(item)
+    return vocabulary
+
+def analyze_chapter(chapter, lexicon=None):
+    """Artifacts for one chapter (see the module docstring)"""
+    lexicon = lexicon or load_lexicon()
+    index = lexicon.index(chapter.get('content', ''))
+    words = WORD.findall(index.lowered)
+    frequencies = Counter(word for word in words if len(word) > 2 and word not in lexicon.common_words)
+    # Offsets of sentences that have any text (the last one may be trailing whitespace)
+    sentences = [start for position, start in enumerate(index.sentence_starts) if index.sentence(position)]
+
+    return {
+        'version': ANALYSIS_VERSION,
+        'sentences': sentences,
+        'sentence_count': len(sentences),
+        'word_count': len(words),
+        'unique_words': len(set(words)),
+        'reading_minutes': round(len(words) / WORDS_PER_MINUTE, 1),
+        'word_frequencies': [[word, count] for word, count in frequencies.most_common(TOP_WORDS)],
+        'vocabulary': chapter_vocabulary(chapter, index, lexicon)
+    }
+
+def analyze_story(story, lexicon=None):
+    """Add the analysis artifacts to every chapter of story (a plain dict) and the story totals"""
+    lexicon = lexicon or load_lexicon()
+    for chapter in story['chapters'].values():
+        chapter['analysis'] = analyze_chapter(chapter, lexicon)
+    analyses = [chapter['analysis'] for chapter in story['chapters'].values()]
+    story['word_count'] = sum(analysis['word_count'] for analysis in analyses)
+    story['reading_minutes'] = round(sum(analysis['reading_minutes'] for analysis in analyses), 1)
+    story['analysis_version'] = ANALYSIS_VERSION
+    return story
+
+def needs_analysis(story):
+    """True if story has no artifacts from this ANALYSIS_VERSION
+
+    Checks a story field only, so lazily loaded chapters stay undecoded.
+    """
+    return story.get('analysis_version') != ANALYSIS_VERSION
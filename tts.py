@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Text-to-speech backends for Folktale Reader
+
+A backend turns chapter text into an audio file. Everything that changes
+the sound (backend, language, voice, speed) goes into its cache_key(), so
+the audio cache never serves a file rendered with other settings.
+
+    gtts     Google Text-to-Speech (MP3). Needs network access; voice is
+             the Google domain that sets the accent ('com', 'co.uk', ...)
+    pyttsx3  Local, offline synthesis through pyttsx3 (WAV). On Linux it
+             drives espeak / espeak-ng (libespeak1 or libespeak-ng1 must be
+             installed); voice is an engine voice id ('english', 'en-us', ...)
+
+Backends only hold their settings, so they can be sent to worker processes
+(see prerender.py).
+"""
+
+import threading
+
+from gtts import gTTS
+
+from audio_cache import audio_key
+
+class TTSBackend:
+    """Base class: subclasses set name, suffix, mimetype and implement synthesize()"""
+
+    name = None
+    suffix = None
+    mimetype = None
+    default_voice = ''
+
+    def __init__(self, lang='en', voice=None, slow=False):
+        self.lang = lang
+        self.voice = voice or self.default_voice
+        self.slow = slow
+
+    def cache_key(self, text):
+        """Audio cache key of text rendered with these settings"""
+        return audio_key(text, self.lang, f'{self.name}:{self.voice}', 'slow' if self.slow else 'normal')
+
+    def synthesize(self, text, path):
+        """Write the complete audio file for text to path"""
+        raise NotImplementedError
+
+    def __repr__(self):
+        return f"{type(self).__name__}(lang={self.lang!r}, voice={self.voice!r}, slow={self.slow})"
+
+class GTTSBackend(TTSBackend):
+    name = 'gtts'
+    suffix = '.mp3'
+    mimetype = 'audio/mpeg'
+    default_voice = 'com'
+
+    def synthesize(self, text, path):
+        gTTS(text=text, lang=self.lang, tld=self.voice, slow=self.slow).save(path)
+
+# One pyttsx3 engine per process: the engine runs a driver loop that is
+# not safe to share between threads
+_engine = None
+_engine_lock = threading.Lock()
+
+class Pyttsx3Backend(TTSBackend):
+    name = 'pyttsx3'
+    suffix = '.wav'
+    mimetype = 'audio/wav'
+
+    # Words per minute; espeak's default is about 200, too fast for learners
+    RATE = 150
+    SLOW_RATE = 110
+
+    def synthesize(self, text, path):
+        global _engine
+        with _engine_lock:
+            if _engine is None:
+                # Imported here: it needs the espeak libraries, which only
+                # the machines that use this backend have
+                import pyttsx3
+                _engine = pyttsx3.init()
+            if self.voice:
+                _engine.setProperty('voice', self.voice)
+            _engine.setProperty('rate', self.SLOW_RATE if self.slow else self.RATE)
+            _engine.save_to_file(text, path)
+            _engine.runAndWait()
+
+BACKENDS = {backend.name: backend for backend in (GTTSBackend, Pyttsx3Backend)}
+
+def get_backend(name, lang='en', voice=None, slow=False):
+    """Backend instance for a FOLKTALE_TTS_BACKEND name"""
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown TTS backend {name!r} (available: {', '.join(sorted(BACKENDS))})")
+    return backend(lang=lang, voice=voice, slow=slow)
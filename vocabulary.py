@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Vocabulary engine for Folktale Reader
+
+The English -> Portuguese lexicon lives in data/vocabulary_lexicon.json
+and is loaded once. Its terms (single words or multi-word phrases) are
+compiled into an Aho-Corasick automaton over word tokens, so a chapter is
+matched against the whole lexicon in one left-to-right pass, whatever the
+lexicon size.
+
+The text is cut into sentences once (their offsets are kept, so the
+context of a hit is sliced from the text instead of searched for again),
+and only sentences that contain the first word of some term are stepped
+through the automaton; the others are skipped with one set check.
+"""
+
+import bisect
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+
+LEXICON_FILE = Path(os.environ.get('FOLKTALE_LEXICON_FILE',
+                                   Path(__file__).parent / 'data' / 'vocabulary_lexicon.json'))
+
+WORD = re.compile(r'[^\W\d_]+')
+SENTENCE_END = re.compile(r'[.!?]+')
+
+class PhraseMatcher:
+    """Aho-Corasick automaton whose alphabet is words instead of characters
+
+    step() follows one word; outputs[state] holds the terms that end at
+    that state (including the shorter ones reached through failure links).
+    """
+
+    def __init__(self, terms):
+        self.goto = [{}]
+        self.fail = [0]
+        self.outputs = [()]
+
+        for term in terms:
+            state = 0
+            for word in term.split(' '):
+                next_state = self.goto[state].get(word)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][word] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append(())
+                state = next_state
+            self.outputs[state] = (term,)
+
+        # Breadth-first, so each failure target is complete before it is used
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for word, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(word, 0)
+                self.fail[child] = target if target != child else 0
+                self.outputs[child] = self.outputs[child] + self.outputs[self.fail[child]]
+                queue.append(child)
+        self.first_words = frozenset(self.goto[0])
+
+    def step(self, state, word):
+        goto = self.goto
+        while state and word not in goto[state]:
+            state = self.fail[state]
+        return goto[state].get(word, 0)
+
+class ChapterIndex:
+    """Sentence offsets and first lexicon hit of each term for one chapter text
+
+    With limit, hits stop being collected once that many terms were found
+    (the sentence offsets always cover the whole text).
+    """
+
+    __slots__ = ('text', 'sentence_starts', 'hits', '_lowered')
+
+    def __init__(self, text, matcher=None, limit=None):
+        self.text = text
+        self.sentence_starts = [0]
+        self.sentence_starts.extend(match.end() for match in SENTENCE_END.finditer(text))
+        # term -> index of the sentence where it first appears, in text order
+        self.hits = {}
+        self._lowered = None
+        if matcher is not None:
+            self._match(matcher, limit)
+
+    def _match(self, matcher, limit):
+        text = self.text
+        lowered = self.lowered
+        if len(lowered) != len(text):
+            # Lowercasing changed some offsets: find words in the original text
+            lowered = None
+        starts = self.sentence_starts
+        ends = starts[1:] + [len(text)]
+        first_words = matcher.first_words
+        outputs = matcher.outputs
+        hits = self.hits
+
+        for sentence, (start, end) in enumerate(zip(starts, ends)):
+            if lowered is None:
+                words = [word.lower() for word in WORD.findall(text, start, end)]
+            else:
+                words = WORD.findall(lowered, start, end)
+            if first_words.isdisjoint(words):
+                continue
+            # Phrases do not run across sentences
+            state = 0
+            for word in words:
+                state = matcher.step(state, word)
+                for term in outputs[state]:
+                    if term not in hits:
+                        hits[term] = sentence
+            if limit and len(hits) >= limit:
+                break
+
+    @property
+    def lowered(self):
+        if self._lowered is None:
+            self._lowered = self.text.lower()
+        return self._lowered
+
+    def sentence(self, index):
+        starts = self.sentence_starts
+        end = starts[index + 1] if index + 1 < len(starts) else len(self.text)
+        return self.text[starts[index]:end].strip()
+
+    def context(self, word):
+        """The sentence where word (any text, case-insensitive) first appears, or None"""
+        position = self.lowered.find(word.lower())
+        if position < 0:
+            return None
+        return self.sentence(bisect.bisect_right(self.sentence_starts, position) - 1)
+
+class Lexicon:
+    """Terms and translations, compiled into a PhraseMatcher
+
+    fingerprint identifies the content, so artifacts computed with one
+    lexicon can tell when it changed.
+    """
+
+    def __init__(self, entries, common_words=()):
+        self.common_words = frozenset(word.lower() for word in common_words)
+        # normalized term -> (term as written, translation)
+        self.entries = {}
+        for term, translation in entries.items():
+            key = ' '.join(WORD.findall(term.lower()))
+            if len(key) > 2 and key not in self.common_words and key not in self.entries:
+                self.entries[key] = (term, translation)
+        self.matcher = PhraseMatcher(self.entries)
+        content = json.dumps([self.entries, sorted(self.common_words)], sort_keys=True, ensure_ascii=False)
+        self.fingerprint = hashlib.sha1(content.encode('utf-8')).hexdigest()[:12]
+
+    @classmethod
+    def load(cls, path=LEXICON_FILE):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['entries'], data.get('common_words', ()))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def index(self, text, limit=None):
+        return ChapterIndex(text, self.matcher, limit)
+
+    def extract(self, text, limit=12, index=None):
+        """Lexicon terms found in text, in order of appearance, with translation and context"""
+        index = index or self.index(text, limit)
+        vocabulary = []
+        for term, sentence in index.hits.items():
+            written, translation = self.entries[term]
+            vocabulary.append({
+                'word': written.capitalize(),
+                'translation': translation,
+                'context': index.sentence(sentence)
+            })
+            if len(vocabulary) >= limit:
+                break
+        return vocabulary
+
+@functools.lru_cache(maxsize=None)
+def load_lexicon(path=LEXICON_FILE):
+    """The lexicon at path, loaded once per process"""
+    return Lexicon.load(path)
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Production entry point for Folktale Reader
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+With preload_app (see gunicorn.conf.py) create_app() runs once in the
+master: the database is migrated and the story catalog is loaded and
+frozen before the workers are forked, so they share those pages.
+"""
+
+import gc
+
+def create_app():
+    """Build the Flask app and load everything that workers can share"""
+    # No collections while the long-lived objects are being created, then
+    # move them to the permanent generation: later collections in the
+    # workers will not touch (and copy) their pages
+    gc.disable()
+    try:
+        from app import app, create_folktale_app
+        
+        folktale_app = create_folktale_app()
+        
+        print(f"Catalog ready: {len(folktale_app.stories)} stories")
+        gc.collect()
+        gc.freeze()
+    finally:
+        gc.enable()
+    return app
+
+application = create_app()